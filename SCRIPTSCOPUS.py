@@ -2,6 +2,7 @@ import pandas as pd
 import unicodedata
 import os
 import re
+from indice_iniciais import IndiceIniciais
 
 # --- 1. CONFIGURAÇÃO DE CAMINHOS (macOS) ---
 BASE_PATH = "/Users/leonardorcarvalho/Documents/SCRIPTSCOPUS"
@@ -36,7 +37,8 @@ def get_parts(full_name):
 
 # --- 3. CARREGAMENTO DA BASE DE REFERÊNCIA ---
 print("Lendo base de orientadores...")
-ref_map = {} 
+# (sobrenome, iniciais) com todos os prefixos -> orientadores (abreviação encontra o nome completo por consulta)
+ref_indice = IndiceIniciais()
 
 try:
     ref_df = pd.read_csv(path_ref)
@@ -52,13 +54,12 @@ try:
         surname, initials = get_parts(orig_name)
         
         if surname:
-            if surname not in ref_map: ref_map[surname] = []
-            ref_map[surname].append({
+            ref_indice.adicionar({
                 'initials': initials, 
                 'ppg': prog_name,
                 'full_name_orig': orig_name # Guardamos o nome original para a nova coluna
-            })
-    print(f"Base carregada: {len(ref_map)} sobrenomes mapeados.")
+            }, surname, initials)
+    print(f"Base carregada: {len(ref_indice.sobrenomes())} sobrenomes mapeados.")
 except Exception as e:
     print(f"Erro na referência: {e}"); exit()
 
@@ -78,19 +79,14 @@ def identify_venculo(authors_str):
         s_surname, s_initials = get_parts(auth)
         if not s_surname or not s_initials: continue
         
-        if s_surname in ref_map:
-            for ref in ref_map[s_surname]:
-                ref_initials = ref['initials']
-                
-                # Regra de Segurança para nomes comuns
-                if s_surname in TOP_SURNAMES and len(s_initials) < 2:
-                    continue
-                
-                # Batimento de iniciais (prefixo)
-                if len(s_initials) <= len(ref_initials):
-                    if s_initials == ref_initials[:len(s_initials)]:
-                        found_ppgs.add(ref['ppg'])
-                        found_advisors.add(ref['full_name_orig'])
+        # Regra de Segurança para nomes comuns
+        if s_surname in TOP_SURNAMES and len(s_initials) < 2:
+            continue
+        
+        # Batimento de iniciais (prefixo): o índice já devolve só os orientadores compatíveis
+        for ref in ref_indice.buscar(s_surname, s_initials):
+            found_ppgs.add(ref['ppg'])
+            found_advisors.add(ref['full_name_orig'])
                         
     res_ppg = " ; ".join(sorted(list(found_ppgs))) if found_ppgs else None
     res_adv = " ; ".join(sorted(list(found_advisors))) if found_advisors else None
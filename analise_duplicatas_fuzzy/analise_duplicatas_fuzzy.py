@@ -7,11 +7,31 @@ import os
 import glob
 import sys
 import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from rapidfuzz import fuzz, process
+
+# Índice de iniciais compartilhado (raiz do repositório)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from indice_iniciais import IndiceIniciais, iniciais_de
 
 # --- CONFIGURAÇÕES ---
 OUTPUT_DIR = 'analise_autoridades_v4'
-if not os.path.exists(OUTPUT_DIR):
-    os.makedirs(OUTPUT_DIR)
+LIMITE_SCORE = 0.85      # Pares acima disto entram no relatório
+LIMITE_UNIFICAR = 0.90   # Acima disto: UNIFICAR_ABNT; senão REVISAO_MANUAL
+
+# Linhas por bloco do cdist dentro de um bucket (SILVA: 256 x 2.8k em float32 ~ 3 MB)
+LINHAS_POR_BLOCO = 256
+
+# Pares (aprox.) por tarefa do pool: buckets pequenos vão juntos, os grandes sozinhos
+PARES_POR_TAREFA = 50_000
+
+# Buckets maiores que isto (SILVA, OLIVEIRA, SANTOS...) usam vizinhança ordenada:
+# cada nome só é comparado com os JANELA - 1 seguintes em cada ordenação (0 = todos os pares)
+LIMITE_BUCKET = 1000
+JANELA = 40
+
+# Nomes sorteados por bucket janelado para estimar o recall (comparação completa na amostra; 0 = não mede)
+AMOSTRA_RECALL = 400
 
 def imprimir_status(msg):
     sys.stdout.write(f"\r\033[K⏳ {msg}")
@@ -72,25 +92,174 @@ def match_iniciais(partes1, partes2):
             
     return matches >= len(menor)
 
-def calcular_similaridade_avancada(t1, t2):
-    """Combina Fuzzy com Lógica de Iniciais."""
-    # 1. Normalização
-    n1, n2 = normalizar_para_comparacao(t1), normalizar_para_comparacao(t2)
-    
-    # 2. Fuzzy Score Base
+def match_estrutural(partes1, partes2):
+    """Mesmo sobrenome (ou inicial dele) e prenomes compatíveis por iniciais. Partes vêm de split_nome."""
+    sobrenome1, nomes1 = partes1
+    sobrenome2, nomes2 = partes2
+    if sobrenome1 == sobrenome2 or (len(sobrenome1) == 1 and sobrenome1[0] == sobrenome2[0]):
+        return match_iniciais(nomes1, nomes2)
+    return False
+
+def similaridade_preparada(n1, partes1, n2, partes2):
+    """calcular_similaridade_avancada com a normalização e o split já feitos."""
+    # 1. Fuzzy Score Base
     score_base = SequenceMatcher(None, n1, n2).ratio()
     if score_base > 0.92: return score_base
     
-    # 3. Análise de Iniciais (Carvalho, L. R. vs Carvalho, Leonardo Rodrigues)
-    sobrenome1, nomes1 = split_nome(n1)
-    sobrenome2, nomes2 = split_nome(n2)
-    
-    if sobrenome1 == sobrenome2 or (len(sobrenome1) == 1 and sobrenome1[0] == sobrenome2[0]):
-        if match_iniciais(nomes1, nomes2):
-            return 0.95 # Score alto para match de iniciais
+    # 2. Análise de Iniciais (Carvalho, L. R. vs Carvalho, Leonardo Rodrigues)
+    if match_estrutural(partes1, partes2):
+        return 0.95 # Score alto para match de iniciais
             
     return score_base
 
+def calcular_similaridade_avancada(t1, t2):
+    """Combina Fuzzy com Lógica de Iniciais."""
+    n1, n2 = normalizar_para_comparacao(t1), normalizar_para_comparacao(t2)
+    return similaridade_preparada(n1, split_nome(n1), n2, split_nome(n2))
+
+def _pontuar(formas, partes, i, j, passa_cota):
+    """Score do par ou None se não passar de LIMITE_SCORE."""
+    if passa_cota:
+        score = similaridade_preparada(formas[i], partes[i], formas[j], partes[j])
+    elif match_estrutural(partes[i], partes[j]):
+        score = 0.95
+    else:
+        return None
+    return score if score > LIMITE_SCORE else None
+
+def _preparar(nomes, papeis):
+    formas = [normalizar_para_comparacao(t) for t in nomes]
+    partes = [split_nome(f) for f in formas]
+    return formas, partes, np.asarray(papeis, dtype=object)
+
+def pares_iniciais(partes):
+    """
+    Códigos i * n + j (i < j) dos pares em que as iniciais de um nome são prefixo das
+    do outro: condição necessária de match_iniciais, achada pelo índice de iniciais
+    (junção por assinatura) em vez de testar os n² pares. O bucket já fixa o
+    sobrenome; a igualdade dele é conferida depois em match_estrutural.
+    """
+    n = len(partes)
+    indice = IndiceIniciais()
+    for k, (_, nomes) in enumerate(partes):
+        indice.adicionar(k, "", iniciais_de(nomes))
+    codigos = [min(a, b) * n + max(a, b) for a, b in indice.pares()]
+    return np.unique(np.array(codigos, dtype=np.int64))
+
+def _pontuar_candidatos(formas, partes, papeis, codigos, por_iniciais, cota=None):
+    """
+    Pontua os pares candidatos (códigos ordenados) de mesmo papel. O SequenceMatcher só
+    roda nos pares que podem passar: a razão Indel do rapidfuzz (LCS) nunca é menor
+    que a dele, então abaixo do limite nela o par só entra pelas iniciais (0.95),
+    e esses estão todos em 'por_iniciais'. 'cota' (opcional) diz quem já passou na Indel.
+    """
+    n = len(formas)
+    i, j = codigos // n, codigos % n
+    manter = papeis[i] == papeis[j]
+    i, j, codigos = i[manter], j[manter], codigos[manter]
+    if cota is None:
+        cota = process.cpdist([formas[x] for x in i], [formas[x] for x in j], scorer=fuzz.ratio,
+                              processor=None, score_cutoff=LIMITE_SCORE * 100 - 0.01, workers=1) > 0
+    else:
+        cota = np.isin(codigos, cota)
+    pares = []
+    for k in np.flatnonzero(cota | np.isin(codigos, por_iniciais)):
+        score = _pontuar(formas, partes, i[k], j[k], cota[k])
+        if score is not None:
+            pares.append((int(i[k]), int(j[k]), score))
+    return pares
+
+def pares_todos(nomes, papeis):
+    """
+    Pares (idx1, idx2, score) de um bucket com calcular_similaridade_avancada > LIMITE_SCORE,
+    mesmo papel e idx1 < idx2, na ordem do laço duplo original.
+    Candidatos: os que passam na razão Indel (cdist em blocos de linhas) e os do índice de iniciais.
+    """
+    formas, partes, papeis = _preparar(nomes, papeis)
+    n = len(nomes)
+    por_cota = []
+    for inicio in range(0, n, LINHAS_POR_BLOCO):
+        fim = min(inicio + LINHAS_POR_BLOCO, n)
+        # Margem de 0.01 contra arredondamento do float32
+        cota = process.cdist(formas[inicio:fim], formas, scorer=fuzz.ratio, processor=None,
+                             score_cutoff=LIMITE_SCORE * 100 - 0.01, workers=1)
+        a, j = np.nonzero(cota)
+        manter = inicio + a < j
+        por_cota.append((inicio + a[manter]) * n + j[manter])
+    por_cota = np.concatenate(por_cota).astype(np.int64)
+    por_iniciais = pares_iniciais(partes)
+    codigos = np.union1d(por_cota, por_iniciais)
+    return _pontuar_candidatos(formas, partes, papeis, codigos, por_iniciais, cota=por_cota)
+
+def chaves_ordenacao(partes):
+    """Ordenações da vizinhança: prenomes, prenomes invertidos e iniciais (+ prenomes para desempate)."""
+    _, nomes = partes
+    return (
+        " ".join(nomes),
+        " ".join(reversed(nomes)),
+        "".join(p[0] for p in nomes) + " " + " ".join(nomes),
+    )
+
+def vizinhos_ordenados(partes, janela):
+    """Códigos i * n + j (i < j) dos pares a menos de 'janela' posições em alguma das ordenações."""
+    n = len(partes)
+    chaves = [chaves_ordenacao(p) for p in partes]
+    codigos = [np.empty(0, dtype=np.int64)]
+    for k in range(len(chaves[0]) if chaves else 0):
+        ordem = np.array(sorted(range(n), key=lambda x: (chaves[x][k], x)), dtype=np.int64)
+        for d in range(1, min(janela, n)):
+            a, b = ordem[:-d], ordem[d:]
+            codigos.append(np.minimum(a, b) * n + np.maximum(a, b))
+    return np.unique(np.concatenate(codigos))
+
+def pares_janela(nomes, papeis, janela):
+    """
+    Como pares_todos, mas a grafia só é comparada entre os vizinhos de vizinhos_ordenados
+    (tempo ~ n x janela). Os pares de iniciais vêm todos do índice: 'Santos, R.' casa com
+    dezenas de nomes que nenhuma janela deixaria juntos.
+    """
+    formas, partes, papeis = _preparar(nomes, papeis)
+    por_iniciais = pares_iniciais(partes)
+    codigos = np.union1d(vizinhos_ordenados(partes, janela), por_iniciais)
+    return _pontuar_candidatos(formas, partes, papeis, codigos, por_iniciais)
+
+def estimar_recall(nomes, papeis, pares):
+    """
+    (encontrados, esperados): na amostra de AMOSTRA_RECALL nomes do bucket (sorteio fixo),
+    quantos pares da comparação completa também saíram da janela.
+    """
+    amostra = np.sort(np.random.default_rng(0).choice(len(nomes), AMOSTRA_RECALL, replace=False))
+    esperados = pares_todos([nomes[x] for x in amostra], [papeis[x] for x in amostra])
+    achados = {(i, j) for i, j, _ in pares}
+    encontrados = sum((int(amostra[a]), int(amostra[b])) in achados for a, b, _ in esperados)
+    return encontrados, len(esperados)
+
+def pares_do_bucket(nomes, papeis):
+    """(pares, recall): todos os pares até LIMITE_BUCKET nomes; acima, vizinhança ordenada com recall estimado."""
+    if not JANELA or len(nomes) <= LIMITE_BUCKET:
+        return pares_todos(nomes, papeis), None
+    pares = pares_janela(nomes, papeis, JANELA)
+    recall = estimar_recall(nomes, papeis, pares) if 0 < AMOSTRA_RECALL < len(nomes) else None
+    return pares, recall
+
+def analisar_tarefa(tarefa):
+    """Processo de trabalho: [(sobrenome, nomes, papéis)] -> [(sobrenome, pares, recall)]."""
+    return [(sobrenome, *pares_do_bucket(nomes, papeis)) for sobrenome, nomes, papeis in tarefa]
+
+def montar_tarefas(buckets, papel_de):
+    """Agrupa os buckets com mais de um nome em tarefas de ~PARES_POR_TAREFA pares, maiores primeiro."""
+    ordenados = sorted((b for b in buckets.items() if len(b[1]) > 1), key=lambda b: len(b[1]), reverse=True)
+    tarefas, atual, pares_atual = [], [], 0
+    for sobrenome, nomes in ordenados:
+        atual.append((sobrenome, nomes, [papel_de[t] for t in nomes]))
+        pares_atual += len(nomes) * (len(nomes) - 1) // 2
+        if pares_atual >= PARES_POR_TAREFA:
+            tarefas.append(atual)
+            atual, pares_atual = [], 0
+    if atual:
+        tarefas.append(atual)
+    return tarefas
+
 # --- 3. LÓGICA DE DECISÃO ---
 
 def definir_mestre(t1, f1, t2, f2):
@@ -111,66 +280,85 @@ def definir_mestre(t1, f1, t2, f2):
 
 # --- 4. EXECUÇÃO ---
 
-arquivos = glob.glob("*.csv")
-FILE_PATH = [f for f in arquivos if "relatorio" not in f][0]
+def main():
+    arquivos = [f for f in glob.glob("*.csv") if "relatorio" not in f]
+    if not arquivos:
+        print("Nenhum CSV encontrado na pasta.")
+        return
+    FILE_PATH = arquivos[0]
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    inicio = time.time()
 
-if FILE_PATH:
     print(f"🚀 RIUnB Authority Engine v4.0 | Arquivo: {FILE_PATH}")
     df = pd.read_csv(FILE_PATH)
     col = 'Orientador' if 'Orientador' in df.columns else df.columns[0]
     
     # Passo 1: Extração e Limpeza Primária
     imprimir_status("Desmembrando Papéis e Nomes...")
-    dados_processados = []
+    counts = {}
+    papel_de = {}  # nome limpo -> papel da primeira ocorrência (trava de segurança)
     for nome_bruto in df[col].astype(str):
         nome_limpo, papel = extrair_papel(nome_bruto)
-        dados_processados.append({'original': nome_bruto, 'limpo': nome_limpo, 'papel': papel})
-    
-    df_proc = pd.DataFrame(dados_processados)
-    counts = df_proc['limpo'].value_counts().to_dict()
+        counts[nome_limpo] = counts.get(nome_limpo, 0) + 1
+        papel_de.setdefault(nome_limpo, papel)
     
     # Passo 2: Agrupamento por Sobrenome para Performance
     imprimir_status("Agrupando por linhagem de sobrenome...")
-    nomes_unicos = sorted(list(counts.keys()))
+    nomes_unicos = sorted(counts)
     buckets = {}
     for nome in nomes_unicos:
-        sobrenome = nome.split(',')[0].strip().upper() if ',' in nome else nome.split()[0].upper()
-        buckets.setdefault(sobrenome, []).append(nome)
+        partes = nome.split(',')[0].strip() if ',' in nome else (nome.split() or [""])[0]
+        buckets.setdefault(partes.upper(), []).append(nome)
     
-    # Passo 3: Análise
-    resultados = []
-    total = len(buckets)
-    print("\n🧠 Analisando variantes e iniciais...")
+    # Passo 3: Análise (buckets em paralelo, maiores primeiro)
+    tarefas = montar_tarefas(buckets, papel_de)
+    total = sum(len(t) for t in tarefas)
+    print(f"\n🧠 Analisando variantes e iniciais... ({total} sobrenomes com mais de um nome, {os.cpu_count() or 1} processos)")
     
-    for i, (sobrenome, nomes) in enumerate(buckets.items(), 1):
-        if i % 100 == 0: imprimir_status(f"Progresso: {(i/total)*100:.2f}% | Sobrenome: {sobrenome}")
-        
-        n = len(nomes)
-        for idx1 in range(n):
-            for idx2 in range(idx1 + 1, n):
-                t1, t2 = nomes[idx1], nomes[idx2]
-                
-                # Pega papéis originais (para a trava de segurança)
-                papel1 = df_proc[df_proc['limpo'] == t1]['papel'].iloc[0]
-                papel2 = df_proc[df_proc['limpo'] == t2]['papel'].iloc[0]
-                
-                if papel1 != papel2: continue # Trava de Segurança
-                
-                score = calcular_similaridade_avancada(t1, t2)
-                
-                if score > 0.85:
-                    mestre = definir_mestre(t1, counts[t1], t2, counts[t2])
-                    resultados.append({
-                        'Termo_A': t1 + (" " + papel1 if papel1 else ""),
-                        'Freq_A': counts[t1],
-                        'Termo_B': t2 + (" " + papel2 if papel2 else ""),
-                        'Freq_B': counts[t2],
-                        'Score': round(score, 4),
-                        'Sugestao_Mestre': mestre + (" " + papel1 if papel1 else ""),
-                        'Acao': 'UNIFICAR_ABNT' if score > 0.90 else 'REVISAO_MANUAL'
-                    })
-
-    df_res = pd.DataFrame(resultados)
+    pares_por_bucket = {}
+    recalls = {}
+    with ProcessPoolExecutor() as pool:
+        futuros = [pool.submit(analisar_tarefa, tarefa) for tarefa in tarefas]
+        for futuro in as_completed(futuros):
+            for sobrenome, pares, recall in futuro.result():
+                pares_por_bucket[sobrenome] = pares
+                if recall is not None:
+                    recalls[sobrenome] = recall
+            imprimir_status(f"Progresso: {len(pares_por_bucket) / total * 100:.2f}% dos sobrenomes")
+
+    if recalls:
+        # Recall da vizinhança ordenada, estimado na amostra de cada bucket grande
+        print(f"\n🔎 Buckets com mais de {LIMITE_BUCKET} nomes comparados em janela de {JANELA}:")
+        for sobrenome, (encontrados, esperados) in sorted(recalls.items(), key=lambda r: -len(buckets[r[0]])):
+            taxa = encontrados / esperados * 100 if esperados else 100.0
+            print(f"   {sobrenome} ({len(buckets[sobrenome])} nomes): recall {taxa:.1f}% ({encontrados}/{esperados} pares da amostra)")
+        encontrados = sum(r[0] for r in recalls.values())
+        esperados = sum(r[1] for r in recalls.values())
+        print(f"   Recall estimado: {encontrados / esperados * 100 if esperados else 100.0:.1f}%")
+
+    # Relatório na mesma ordem da análise sequencial
+    resultados = []
+    for sobrenome, nomes in buckets.items():
+        for idx1, idx2, score in pares_por_bucket.get(sobrenome, ()):
+            t1, t2 = nomes[idx1], nomes[idx2]
+            papel1, papel2 = papel_de[t1], papel_de[t2]
+            mestre = definir_mestre(t1, counts[t1], t2, counts[t2])
+            resultados.append({
+                'Termo_A': t1 + (" " + papel1 if papel1 else ""),
+                'Freq_A': counts[t1],
+                'Termo_B': t2 + (" " + papel2 if papel2 else ""),
+                'Freq_B': counts[t2],
+                'Score': round(score, 4),
+                'Sugestao_Mestre': mestre + (" " + papel1 if papel1 else ""),
+                'Acao': 'UNIFICAR_ABNT' if score > LIMITE_UNIFICAR else 'REVISAO_MANUAL'
+            })
+
+    colunas = ['Termo_A', 'Freq_A', 'Termo_B', 'Freq_B', 'Score', 'Sugestao_Mestre', 'Acao']
+    df_res = pd.DataFrame(resultados, columns=colunas)
     out = f"{OUTPUT_DIR}/relatorio_autoridades_v4.csv"
     df_res.sort_values(by='Score', ascending=False).to_csv(out, index=False)
-    print(f"\n✅ Concluído! Relatório em: {out}")
\ No newline at end of file
+    print(f"\n✅ Concluído em {time.time() - inicio:.1f}s! Relatório em: {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,63 @@
 import sys
 import time
+import unicodedata
 
 # --- VERIFICAÇÃO DE BIBLIOTECAS ---
 try:
+    import numpy as np
     import pandas as pd
-    from fuzzywuzzy import fuzz
-    from fuzzywuzzy import process
+    from rapidfuzz import fuzz, process, utils
 except ImportError as e:
     print("\nERRO: Falta uma biblioteca necessária.")
-    print("Por favor, instale rodando: python3 -m pip install pandas fuzzywuzzy python-Levenshtein")
+    print("Por favor, instale rodando: python3 -m pip install pandas numpy rapidfuzz")
     sys.exit()
 
 # --- CONFIGURAÇÕES ---
 LIMITE_SIMILARIDADE = 90  # Ajustado para 90% para capturar pequenas variações
 
+# Linhas por bloco na busca de vizinhos (bloco x todos os nomes em float32: 256 x 53k ~ 54 MB)
+LINHAS_POR_BLOCO = 256
+
+# Agrupamento: pares candidatos pontuados por lote (cpdist multi-core)
+PARES_POR_LOTE = 500_000
+
+# Blocos maiores que isto são subdivididos (ex.: SILVA, M... pelas 3 primeiras letras do prenome)
+LIMITE_BLOCO = 2000
+
+# Partículas que não servem de chave de bloco
+PARTICULAS = {"das", "dos", "del", "van", "von", "der", "los", "las"}
+
+# O WRatio do fuzzywuzzy (usado nas versões anteriores) descartava os caracteres 128-255
+# (acentos do Latin-1) antes de comparar; as chaves abaixo fazem o mesmo para manter os resultados
+_SEM_LATIN1 = {i: None for i in range(128, 256)}
+
+def chave_busca(nome):
+    """Nome consultado como o process.extractOne(WRatio) o preparava: processado, sem Latin-1, processado de novo."""
+    return utils.default_process(utils.default_process(nome).translate(_SEM_LATIN1))
+
+def chave_par(nome):
+    """Nome como o fuzz.WRatio o preparava (escolhas do extractOne e etapa 2): sem Latin-1, depois processado."""
+    return utils.default_process(nome.translate(_SEM_LATIN1))
+
+def similaridade(chave_a, chave_b):
+    """
+    WRatio inteiro entre duas chaves já processadas, arredondado como no
+    fuzzywuzzy: cada estratégia é arredondada antes de aplicar a escala.
+    """
+    if not chave_a or not chave_b:
+        return 0
+    base = round(fuzz.ratio(chave_a, chave_b))
+    proporcao = max(len(chave_a), len(chave_b)) / min(len(chave_a), len(chave_b))
+    if proporcao < 1.5:
+        return round(max(base,
+                         round(fuzz.token_sort_ratio(chave_a, chave_b)) * .95,
+                         round(fuzz.token_set_ratio(chave_a, chave_b)) * .95))
+    escala = .6 if proporcao > 8 else .9
+    return round(max(base,
+                     round(fuzz.partial_ratio(chave_a, chave_b)) * escala,
+                     round(fuzz.partial_token_sort_ratio(chave_a, chave_b)) * .95 * escala,
+                     round(fuzz.partial_token_set_ratio(chave_a, chave_b)) * .95 * escala))
+
 def pontuacao_gramatical(nome):
     """Critério de desempate para o nome oficial."""
     pontos = 0
@@ -35,6 +79,167 @@ def barra_progresso(atual, total, tamanho=30):
     sys.stdout.write(f"\rProgresso: [{setas}{espacos}] {int(percentual * 100)}%")
     sys.stdout.flush()
 
+def tem_similar(consultas, chaves, posicoes):
+    """
+    Para cada posição em 'posicoes', diz se existe OUTRO nome (qualquer um da
+    lista 'chaves') com WRatio >= LIMITE_SIMILARIDADE contra 'consultas[posição]'.
+    Calcula em blocos de linhas com cdist multi-core (workers=-1); a própria
+    posição é zerada na matriz do bloco em vez de copiar a lista sem ela.
+    O WRatio contínuo do cdist difere do inteiro em no máximo meio ponto:
+    acima de LIMITE + 0.5 já é similar; a faixa [LIMITE - 1, LIMITE + 0.5)
+    é conferida par a par com similaridade().
+    """
+    resultado = np.zeros(len(posicoes), dtype=bool)
+    for inicio in range(0, len(posicoes), LINHAS_POR_BLOCO):
+        barra_progresso(inicio + 1, len(posicoes))
+        bloco = np.asarray(posicoes[inicio:inicio + LINHAS_POR_BLOCO])
+        matriz = process.cdist(
+            [consultas[i] for i in bloco], chaves, scorer=fuzz.WRatio, processor=None,
+            score_cutoff=LIMITE_SIMILARIDADE - 1, dtype=np.float32, workers=-1
+        )
+        matriz[np.arange(len(bloco)), bloco] = 0
+        certos = (matriz >= LIMITE_SIMILARIDADE + 0.5).any(axis=1)
+        for linha in np.flatnonzero(~certos & (matriz.max(axis=1) > 0)):
+            consulta = consultas[bloco[linha]]
+            colunas = np.flatnonzero(matriz[linha])
+            certos[linha] = any(similaridade(consulta, chaves[c]) >= LIMITE_SIMILARIDADE for c in colunas)
+        resultado[inicio:inicio + len(bloco)] = certos
+    barra_progresso(len(posicoes), len(posicoes))
+    return resultado
+
+def _sem_acentos(texto):
+    return "".join(c for c in unicodedata.normalize("NFKD", texto) if not unicodedata.combining(c))
+
+def chaves_bloqueio(nome):
+    """
+    (sobrenome, primeiro prenome, demais tokens) normalizados, sem acentos:
+    'Göttems, Leila Bernarda' -> ('gottems', 'leila', ('bernarda', 'gottems')).
+    Sem vírgula, o primeiro token é o sobrenome.
+    """
+    texto = _sem_acentos(str(nome))
+    if "," in texto:
+        sobrenome, resto = texto.split(",", 1)
+    else:
+        partes = texto.split(None, 1)
+        sobrenome, resto = (partes + ["", ""])[:2]
+    sobrenome = utils.default_process(sobrenome)
+    prenomes = utils.default_process(resto).split()
+    prenome = prenomes[0] if prenomes else ""
+    tokens = {t for t in sobrenome.split() + prenomes[1:] if len(t) >= 3 and t not in PARTICULAS}
+    tokens.discard(prenome)
+    return sobrenome, prenome, tuple(sorted(tokens))
+
+def _chaves_bloco(bloqueio):
+    """
+    Chaves de bloco de um nome, cada uma com o refinamento usado se o bloco passar de LIMITE_BLOCO:
+    - (sobrenome, inicial do prenome): abreviações e nomes do meio;
+    - (4 primeiras letras do sobrenome, prenome): grafias diferentes do sobrenome;
+    - (prenome, outro token): sobrenomes em outra ordem ('Alves, Ana Dornelles' x 'Dornelles, Ana Alves').
+    """
+    sobrenome, prenome, tokens = bloqueio
+    yield ("S", sobrenome, prenome[:1]), prenome[:3]
+    if prenome:
+        yield ("P", sobrenome[:4], prenome), sobrenome
+        for token in tokens:
+            yield ("T", prenome, token), sobrenome[:3]
+
+def blocos_candidatos(itens):
+    """
+    Blocos de posições que precisam ser comparadas entre si.
+    Retorna [(posições, so_sobrenomes_diferentes)]: nos blocos P e T os pares de
+    mesmo sobrenome são ignorados (o bloco S já os compara).
+    """
+    por_chave = {}
+    for i, item in enumerate(itens):
+        for chave, refinamento in _chaves_bloco(item['bloqueio']):
+            por_chave.setdefault(chave, []).append((i, refinamento))
+
+    blocos = []
+    for chave, membros in por_chave.items():
+        if len(membros) < 2:
+            continue
+        if len(membros) > LIMITE_BLOCO:
+            # Ex.: SILVA, M...: subdivide pelo refinamento da chave
+            sub = {}
+            for i, refinamento in membros:
+                sub.setdefault(refinamento, []).append(i)
+            # Refinamento curto (prenome abreviado: 'Silva, M.' -> 'm') é prefixo do refinamento dos nomes
+            # completos ('mar'): esses membros entram em todos os subblocos que começam por ele, e num
+            # bloco só deles. São poucos; os pares curto x curto repetidos não mudam as arestas.
+            curtos = {r: p for r, p in sub.items() if len(r) < 3} if chave[0] == "S" else {}
+            partes = [p + [i for r, c in curtos.items() if refinamento.startswith(r) for i in c]
+                      for refinamento, p in sub.items() if refinamento not in curtos]
+            if curtos:
+                partes.append([i for c in curtos.values() for i in c])
+            partes = [p for p in partes if len(p) > 1]
+        else:
+            partes = [[i for i, _ in membros]]
+        blocos.extend((p, chave[0] != "S") for p in partes)
+    return blocos
+
+def pares_dos_blocos(itens, blocos):
+    """Gera lotes (i, j) com i < j de todos os blocos, com até PARES_POR_LOTE pares cada."""
+    sobrenomes = {}
+    ids_sobrenome = np.array([sobrenomes.setdefault(item['bloqueio'][0], len(sobrenomes)) for item in itens])
+    lote_i, lote_j, tamanho = [], [], 0
+    for posicoes, so_diferentes in blocos:
+        posicoes = np.asarray(posicoes)
+        a, b = np.triu_indices(len(posicoes), 1)
+        i, j = posicoes[a], posicoes[b]
+        if so_diferentes:
+            manter = ids_sobrenome[i] != ids_sobrenome[j]
+            i, j = i[manter], j[manter]
+        lote_i.append(i)
+        lote_j.append(j)
+        tamanho += len(i)
+        if tamanho >= PARES_POR_LOTE:
+            yield np.concatenate(lote_i), np.concatenate(lote_j)
+            lote_i, lote_j, tamanho = [], [], 0
+    if tamanho:
+        yield np.concatenate(lote_i), np.concatenate(lote_j)
+
+def pares_similares(itens, blocos):
+    """
+    Pontua só os pares candidatos (cpdist multi-core, em lotes) e retorna as
+    arestas (i, j) com similaridade() >= LIMITE_SIMILARIDADE. Como na etapa 1,
+    a faixa [LIMITE - 1, LIMITE + 0.5) é conferida com o arredondamento do fuzzywuzzy.
+    """
+    chaves = np.array([item['chave'] for item in itens], dtype=object)
+    arestas = []
+    pontuados = 0
+    for i, j in pares_dos_blocos(itens, blocos):
+        scores = process.cpdist(
+            chaves[i], chaves[j], scorer=fuzz.WRatio, processor=None,
+            score_cutoff=LIMITE_SIMILARIDADE - 1, dtype=np.float32, workers=-1
+        )
+        pontuados += len(i)
+        certos = scores >= LIMITE_SIMILARIDADE + 0.5
+        arestas.extend(zip(i[certos].tolist(), j[certos].tolist()))
+        for k in np.flatnonzero(~certos & (scores > 0)):
+            if similaridade(chaves[i[k]], chaves[j[k]]) >= LIMITE_SIMILARIDADE:
+                arestas.append((int(i[k]), int(j[k])))
+    return arestas, pontuados
+
+def componentes(total, arestas):
+    """Union-find: lista de grupos (listas de posições) ligados pelas arestas, inclusive os isolados."""
+    pai = list(range(total))
+
+    def raiz(x):
+        while pai[x] != x:
+            pai[x] = pai[pai[x]]
+            x = pai[x]
+        return x
+
+    for a, b in arestas:
+        ra, rb = raiz(a), raiz(b)
+        if ra != rb:
+            pai[max(ra, rb)] = min(ra, rb)
+
+    grupos = {}
+    for x in range(total):
+        grupos.setdefault(raiz(x), []).append(x)
+    return list(grupos.values())
+
 def processar_nomes_v4(caminho_arquivo):
     print(f"\n--- Iniciando Análise Otimizada: {caminho_arquivo} ---")
     
@@ -64,91 +269,54 @@ def processar_nomes_v4(caminho_arquivo):
         print(f"ERRO Crítico: {e}")
         return
 
-    # Preparação para filtragem
-    dados_filtrados = []
-    # Cria uma lista auxiliar só com nomes para o 'process.extractOne' usar
-    nomes_apenas = [d['nome'] for d in dados]
-    total = len(dados)
+    # Preparação para filtragem: cada nome é processado uma única vez
+    consultas = [chave_busca(d['nome']) for d in dados]
+    for item in dados:
+        item['chave'] = chave_par(item['nome'])
+    chaves = [d['chave'] for d in dados]
     
     # 2. Filtragem Inteligente
     print("\nEtapa 1/3: Filtrando ruído (nomes únicos sem similares)...")
     
-    for i, item in enumerate(dados):
-        if i % 5 == 0: barra_progresso(i+1, total) # Atualiza a barra a cada 5 itens
-        
-        if item['frequencia'] > 1:
-            dados_filtrados.append(item)
-        else:
-            # Item tem frequência 1. Vamos ver se ele parece com ALGUÉM.
-            # Removemos o próprio item da busca
-            lista_busca = nomes_apenas[:i] + nomes_apenas[i+1:]
-            
-            if not lista_busca:
-                continue
-
-            # WRatio combina várias estratégias
-            melhor_match = process.extractOne(item['nome'], lista_busca, scorer=fuzz.WRatio)
-            
-            # --- CORREÇÃO AQUI ---
-            if melhor_match and melhor_match[1] >= LIMITE_SIMILARIDADE:
-                dados_filtrados.append(item)
-            else:
-                pass # Exclui
+    # Itens com frequência 1: ficam só se parecerem com ALGUÉM (WRatio combina várias estratégias)
+    raros = [i for i, item in enumerate(dados) if item['frequencia'] <= 1]
+    com_similar = dict(zip(raros, tem_similar(consultas, chaves, raros))) if len(dados) > 1 else {}
+    
+    dados_filtrados = [item for i, item in enumerate(dados)
+                       if item['frequencia'] > 1 or com_similar.get(i, False)]
 
     print(f"\nNomes mantidos para análise: {len(dados_filtrados)}")
     
     # 3. Agrupamento (Clustering)
-    print("\nEtapa 2/3: Agrupando por similaridade fuzzy...")
+    print("\nEtapa 2/3: Agrupando por similaridade fuzzy (blocos + componentes conexos)...")
     
-    # Ordena: Maiores frequências primeiro (serão os líderes dos grupos)
+    # Ordena: Maiores frequências primeiro (ordem dos membros no relatório)
     dados_filtrados.sort(key=lambda x: x['frequencia'], reverse=True)
+    for item in dados_filtrados:
+        item['bloqueio'] = chaves_bloqueio(item['nome'])
     
-    grupos = []
-    visitados = set()
-    total_filtrados = len(dados_filtrados)
-    
-    for i, item_principal in enumerate(dados_filtrados):
-        if i % 10 == 0: barra_progresso(i+1, total_filtrados)
-
-        nome_principal = item_principal['nome']
-        
-        if nome_principal in visitados:
-            continue
-            
-        grupo_atual = {'membros': []}
-        
-        # Adiciona o líder ao grupo
-        item_principal['score_fuzzy'] = 100
-        grupo_atual['membros'].append(item_principal)
-        visitados.add(nome_principal)
-        
-        # Busca membros similares na lista restante
-        for item_comparacao in dados_filtrados:
-            nome_comparacao = item_comparacao['nome']
-            
-            if nome_comparacao in visitados:
-                continue
-            
-            # Usa WRatio aqui também para consistência
-            score = fuzz.WRatio(nome_principal, nome_comparacao)
-            
-            if score >= LIMITE_SIMILARIDADE:
-                item_comparacao['score_fuzzy'] = score
-                grupo_atual['membros'].append(item_comparacao)
-                visitados.add(nome_comparacao)
-        
-        grupos.append(grupo_atual)
+    # Só os pares que dividem um bloco são pontuados; os grupos são as componentes conexas
+    blocos = blocos_candidatos(dados_filtrados)
+    arestas, pontuados = pares_similares(dados_filtrados, blocos)
+    grupos = componentes(len(dados_filtrados), arestas)
+    print(f"{len(blocos)} blocos, {pontuados} pares pontuados, {len(arestas)} pares similares, {len(grupos)} grupos.")
 
     # 4. Relatório Final
-    print("\n\nEtapa 3/3: Gerando CSV final...")
+    print("\nEtapa 3/3: Gerando CSV final...")
     resultado_final = []
     
     for grupo in grupos:
-        membros = grupo['membros']
+        membros = [dados_filtrados[i] for i in grupo]
         
         # Escolhe o oficial: maior frequência, depois melhor gramática
         oficial = max(membros, key=lambda x: (x['frequencia'], pontuacao_gramatical(x['nome'])))
         
+        # Similaridade de cada membro com o oficial (oficial primeiro na lista)
+        membros.remove(oficial)
+        membros.insert(0, oficial)
+        for m in membros:
+            m['score_fuzzy'] = 100 if m is oficial else similaridade(oficial['chave'], m['chave'])
+        
         # Cálculo da certeza média
         scores = [m['score_fuzzy'] for m in membros]
         certeza = sum(scores) / len(scores)
@@ -1,16 +1,31 @@
 import pandas as pd
+import numpy as np
 from rapidfuzz import process, fuzz, utils
 from unidecode import unidecode
 import time
 import sys
 
 class IndexadorArtesanal:
-    def __init__(self, caminho_arquivo, threshold=70):
+    # Candidatos guardados por termo (era o limit=20 do process.extract)
+    LIMITE_CANDIDATOS = 20
+    # Linhas por bloco do cdist: blocos curtos aproveitam os termos que já foram agrupados
+    # (não viram principal); memoria_mb pode reduzir ainda mais
+    LINHAS_POR_BLOCO = 256
+    # Baldes do histograma de caracteres do pré-filtro: a-z, espaço, dígitos (4) e o resto
+    BALDES = 32
+
+    def __init__(self, caminho_arquivo, threshold=70, memoria_mb=256):
         self.caminho_arquivo = caminho_arquivo
         self.threshold = threshold
+        self.memoria_mb = memoria_mb  # Teto das matrizes de um bloco (o resultado final é esparso)
         self.df_bruto = None
         self.df_reduzido = None
         self.relatorio = []
+        # Pré-filtro de candidatos (montar_prefiltro)
+        self.tokens = None
+        self.postagens = None
+        self.comprimentos = None
+        self.histogramas = None
 
     def normalizar(self, texto):
         """Cria a 'impressão digital' do termo para comparação rápida."""
@@ -57,76 +72,143 @@ class IndexadorArtesanal:
             print(f"✗ Erro fatal no carregamento: {e}")
             sys.exit(1)
 
+    def montar_prefiltro(self, termos):
+        """
+        Estruturas do pré-filtro (ver candidatos), uma vez por análise:
+        índice invertido token -> termos e, por termo, o tamanho e o histograma
+        de caracteres dos seus tokens distintos, ordenados e unidos por espaço.
+        """
+        tabela = np.full(128, self.BALDES - 1, dtype=np.intp)
+        tabela[ord('a'):ord('z') + 1] = np.arange(26)
+        tabela[ord(' ')] = 26
+        tabela[ord('0'):ord('9') + 1] = 27 + np.arange(10) % 4
+
+        self.tokens = [sorted(set(t.split())) for t in termos]
+        self.comprimentos = np.zeros(len(termos), dtype=np.int32)
+        histogramas = np.zeros((len(termos), self.BALDES), dtype=np.int16)
+        postagens = {}
+        for i, tokens in enumerate(self.tokens):
+            unido = " ".join(tokens)
+            self.comprimentos[i] = len(unido)
+            for ch in unido:
+                histogramas[i, tabela[ord(ch)] if ord(ch) < 128 else self.BALDES - 1] += 1
+            for token in tokens:
+                postagens.setdefault(token, []).append(i)
+        self.postagens = {token: np.array(lista, dtype=np.int32) for token, lista in postagens.items()}
+        # Por balde (linha contígua): o cálculo do bloco varre um balde de cada vez
+        self.histogramas = np.ascontiguousarray(histogramas.T)
+
+    def candidatos(self, linhas):
+        """
+        Máscara (linhas x termos) dos pares que PODEM ter token_set_ratio >= threshold.
+        Nenhum par acima do limiar fica de fora:
+        - com token em comum: entra sempre (índice invertido);
+        - sem token em comum, o token_set_ratio é o ratio entre os tokens ordenados
+          de cada lado: 200*LCS/(la+lb), e a LCS não passa dos caracteres em comum
+          (soma dos mínimos dos histogramas; juntar caracteres num balde só aumenta a soma).
+        """
+        comuns = np.zeros((len(linhas), len(self.comprimentos)), dtype=np.int16)
+        for balde in self.histogramas:
+            comuns += np.minimum(balde[linhas][:, None], balde)
+        # Inteiros: sem arredondamento na fronteira do limiar
+        mascara = 200 * comuns.astype(np.int32) >= self.threshold * (self.comprimentos[linhas][:, None] + self.comprimentos)
+        for k, i in enumerate(linhas):
+            for token in self.tokens[i]:
+                mascara[k, self.postagens[token]] = True
+        return mascara
+
+    def matriz_esparsa(self, termos, linhas):
+        """
+        Triplas (i, j, score) das linhas pedidas (índices em ordem) contra todos os termos:
+        score >= threshold, no máximo LIMITE_CANDIDATOS por termo i, na ordem do
+        process.extract (score decrescente, depois índice). Só os pares do pré-filtro
+        (candidatos; exige montar_prefiltro) passam pelo scorer.
+        """
+        if not linhas:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0)
+        linhas = np.asarray(linhas)
+        i, j = np.nonzero(self.candidatos(linhas))
+        # float64: mesmos scores (e arredondamentos no relatório) do process.extract
+        score = process.cpdist(
+            [termos[k] for k in linhas[i].tolist()], [termos[k] for k in j.tolist()],
+            scorer=fuzz.token_set_ratio, # O melhor para "Termo" vs "Termo qualificado"
+            score_cutoff=self.threshold, dtype=np.float64, workers=-1
+        )
+        acima = np.flatnonzero(score)
+        i, j, score = i[acima], j[acima], score[acima]
+        # Por termo: maiores scores primeiro, empate pelo índice; corta em LIMITE_CANDIDATOS
+        ordem = np.lexsort((j, -score, i))
+        i, j, score = i[ordem], j[ordem], score[ordem]
+        posicao = np.arange(len(i)) - np.searchsorted(i, i)
+        manter = posicao < self.LIMITE_CANDIDATOS
+        return linhas[i[manter]], j[manter], score[manter]
+
     def analisar_profundidade(self):
         print("--- Fase 2: Análise Profunda (Fuzzy Logic) ---")
         print("Buscando variações, erros de grafia e qualificadores...")
-        print("Nota: Com 50k linhas, esta etapa pode demorar alguns minutos. Tenha paciência.\n")
+        print("Nota: O tempo cresce com o quadrado dos termos únicos (~46k termos: cerca de 3 minutos). Tenha paciência.\n")
+        inicio_fase = time.time()
 
         termos_unicos = self.df_reduzido['Termo_Normalizado'].tolist()
-        mapa_termo_original = pd.Series(
-            self.df_reduzido.Termo_Original.values, 
-            index=self.df_reduzido.Termo_Normalizado
-        ).to_dict()
-        
-        # Dicionário para marcar o que já foi agrupado para não repetir
-        ja_processados = set()
+        # Consultas por posição (sem varrer o DataFrame a cada match)
+        originais = self.df_reduzido['Termo_Original'].tolist()
+        frequencias = self.df_reduzido['Frequencia'].tolist()
         total = len(termos_unicos)
-        
-        # Otimização: rapidfuzz processa muito mais rápido se passarmos a lista toda de uma vez
-        # mas precisamos iterar para formatar o relatório.
-        
-        for i, termo_foco in enumerate(termos_unicos):
-            # Barra de progresso visual
-            if i % 100 == 0:
-                progresso = (i / total) * 100
-                print(f"Analisando: {progresso:.1f}% concluído...", end='\r')
-
-            if termo_foco in ja_processados:
-                continue
-
-            # Extrai os top 10 candidatos similares (limitamos para performance)
-            # score_cutoff=self.threshold garante que só pegamos o que importa
-            matches = process.extract(
-                termo_foco, 
-                termos_unicos, 
-                scorer=fuzz.token_set_ratio, # O melhor para "Termo" vs "Termo qualificado"
-                score_cutoff=self.threshold,
-                limit=20 
-            )
+        self.montar_prefiltro(termos_unicos)
 
-            # Se encontrou mais de 1 match (o primeiro é sempre ele mesmo)
-            if len(matches) > 1:
-                grupo_duplicatas = []
-                freq_total_grupo = 0
-                
-                # matches retorna tuplas: (termo, score, index)
-                for match in matches:
-                    termo_encontrado = match[0]
-                    score = match[1]
-                    
-                    # Recupera o termo original (com maiusculas etc) e a frequencia
-                    original = mapa_termo_original.get(termo_encontrado, "Erro")
-                    freq = self.df_reduzido.loc[self.df_reduzido['Termo_Normalizado'] == termo_encontrado, 'Frequencia'].values[0]
-                    
-                    grupo_duplicatas.append(f"{original} [Score:{score:.0f} | Freq:{int(freq)}]")
-                    freq_total_grupo += freq
+        # Linhas por bloco dentro de memoria_mb (~16 bytes por par: contagens, máscara e temporários)
+        linhas_por_bloco = max(1, min(self.LINHAS_POR_BLOCO, int(self.memoria_mb * 1024 * 1024 // (16 * max(total, 1)))))
+
+        # Dicionário para marcar o que já foi agrupado para não repetir
+        ja_processados = set()
+        proximo = 0
+        while proximo < total:
+            print(f"Analisando: {(proximo / total) * 100:.1f}% concluído...", end='\r')
+
+            # Próximo bloco: só os termos ainda livres (os já agrupados não viram principal)
+            pendentes = []
+            while proximo < total and len(pendentes) < linhas_por_bloco:
+                if proximo not in ja_processados:
+                    pendentes.append(proximo)
+                proximo += 1
+            linhas, colunas, scores = self.matriz_esparsa(termos_unicos, pendentes)
+            inicios = np.searchsorted(linhas, pendentes, side='left').tolist()
+            fins = np.searchsorted(linhas, pendentes, side='right').tolist()
+            colunas, scores = colunas.tolist(), scores.tolist()
+
+            # Agrupamento a partir das triplas, na mesma varredura de antes:
+            # cada termo ainda livre leva os seus candidatos (inclusive os já agrupados)
+            for i, inicio, fim in zip(pendentes, inicios, fins):
+                if i in ja_processados:
+                    continue  # agrupado por um termo anterior do mesmo bloco
+
+                # Se encontrou mais de 1 match (o primeiro é sempre ele mesmo)
+                if fim - inicio > 1:
+                    grupo_duplicatas = []
+                    freq_total_grupo = 0
                     
-                    # Marca como processado para não criar grupos duplicados (A=B e B=A)
-                    # Nota: Isso é agressivo. Em 'false positive mode', talvez quiséssemos ver tudo,
-                    # mas para 50k linhas, se não marcarmos, o relatório fica ilegível.
-                    ja_processados.add(termo_encontrado)
-
-                self.relatorio.append({
-                    'Termo Principal (Representante)': mapa_termo_original[termo_foco],
-                    'Variações Encontradas': " || ".join(grupo_duplicatas),
-                    'Total de Variações': len(grupo_duplicatas),
-                    'Frequência Somada do Grupo': int(freq_total_grupo)
-                })
-            else:
-                # Se não tem duplicata, marcamos ele como processado
-                ja_processados.add(termo_foco)
-
-        print(f"\n\n✓ Análise finalizada. {len(self.relatorio)} grupos suspeitos identificados.")
+                    for k in range(inicio, fim):
+                        j, score = colunas[k], scores[k]
+                        freq = frequencias[j]
+                        grupo_duplicatas.append(f"{originais[j]} [Score:{score:.0f} | Freq:{int(freq)}]")
+                        freq_total_grupo += freq
+                        
+                        # Marca como processado para não criar grupos duplicados (A=B e B=A)
+                        # Nota: Isso é agressivo. Em 'false positive mode', talvez quiséssemos ver tudo,
+                        # mas para 50k linhas, se não marcarmos, o relatório fica ilegível.
+                        ja_processados.add(j)
+
+                    self.relatorio.append({
+                        'Termo Principal (Representante)': originais[i],
+                        'Variações Encontradas': " || ".join(grupo_duplicatas),
+                        'Total de Variações': len(grupo_duplicatas),
+                        'Frequência Somada do Grupo': int(freq_total_grupo)
+                    })
+                else:
+                    # Se não tem duplicata, marcamos ele como processado
+                    ja_processados.add(i)
+
+        print(f"\n\n✓ Análise finalizada em {time.time() - inicio_fase:.1f}s. {len(self.relatorio)} grupos suspeitos identificados.")
 
     def salvar(self):
         if not self.relatorio:
@@ -145,9 +227,10 @@ if __name__ == "__main__":
     # --- CONFIGURAÇÃO ---
     ARQUIVO = 'dados.csv' # Mude para o nome do seu arquivo
     SENSIBILIDADE = 70    # 0 a 100. Quanto menor, mais "falsos positivos"
+    MEMORIA_MB = 256      # Memória do bloco de comparação (mais memória = menos blocos)
     # --------------------
 
-    app = IndexadorArtesanal(ARQUIVO, threshold=SENSIBILIDADE)
+    app = IndexadorArtesanal(ARQUIVO, threshold=SENSIBILIDADE, memoria_mb=MEMORIA_MB)
     app.carregar_e_agrupar()
     app.analisar_profundidade()
     app.salvar()
\ No newline at end of file
@@ -1,175 +1,242 @@
-import csv
-import difflib
-import re
-import os
-
-# --- CONFIGURAÇÃO ---
-ARQUIVO_ENTRADA = 'autores.csv'
-ARQUIVO_SAIDA = 'relatorio_duplicatas.txt'
-LIMITE_SIMILARIDADE = 0.88  # Aumentei ligeiramente a precisão para evitar "falsos positivos"
-
-class ArtesaoDeDados:
-    """
-    Ferramentas de precisão para análise textual e higienização de dados.
-    """
-    
-    @staticmethod
-    def normalizar(texto: str) -> str:
-        """
-        Padroniza o texto para comparação justa.
-        Remove pontuação excessiva, converte para maiúsculas e limpa espaços.
-        """
-        if not texto: return ""
-        # Remove caracteres que não sejam letras, números, vírgulas ou espaços
-        # Isso ajuda a evitar que um ponto final acidental atrapalhe a comparação
-        limpo = re.sub(r'[^\w\s,]', '', texto) 
-        # Remove espaços duplos
-        limpo = re.sub(r'\s+', ' ', limpo.strip())
-        return limpo.upper()
-
-    @staticmethod
-    def calcular_similaridade(a: str, b: str) -> float:
-        """Calcula a distância visual entre duas strings (0.0 a 1.0)."""
-        return difflib.SequenceMatcher(None, a, b).ratio()
-
-    @staticmethod
-    def verificar_inclusao(nome_curto: str, nome_longo: str) -> bool:
-        """
-        Verifica se 'SILVA, J.' está contido em 'SILVA, JOAO'.
-        """
-        # Remove pontos para facilitar a comparação de abreviações
-        nc = nome_curto.replace('.', '').strip()
-        nl = nome_longo.replace('.', '').strip()
-        
-        if len(nc) >= len(nl): return False
-        
-        # Verifica se o início coincide perfeitamente
-        return nl.startswith(nc)
-
-def reconstruir_linha_fragmentada(linha: list) -> tuple:
-    """
-    Resolve o problema da 'Vírgula ABNT' colidindo com a 'Vírgula CSV'.
-    Se a linha foi quebrada em 3 partes, une as duas primeiras.
-    """
-    if len(linha) == 2:
-        # Cenário Ideal: ["SILVA, JOAO", "10"]
-        return linha[0], linha[1]
-    
-    elif len(linha) >= 3:
-        # Cenário Fragmentado: ["SILVA", " JOAO", " 10"]
-        # Juntamos tudo exceto o último elemento (que deve ser a frequência)
-        nome_reconstruido = ",".join(linha[:-1]) 
-        frequencia = linha[-1]
-        return nome_reconstruido, frequencia
-        
-    return linha[0], "0" # Fallback para linhas malformadas
-
-def auditar_csv():
-    print(f"--- Iniciando Auditoria: {ARQUIVO_ENTRADA} ---")
-    
-    if not os.path.exists(ARQUIVO_ENTRADA):
-        print(f"ERRO CRÍTICO: O arquivo '{ARQUIVO_ENTRADA}' não foi encontrado.")
-        return
-
-    dados_processados = []
-
-    # 1. Leitura com Inteligência de Estrutura
-    try:
-        # 'utf-8-sig' é usado para garantir que arquivos salvos pelo Excel sejam lidos corretamente
-        with open(ARQUIVO_ENTRADA, mode='r', encoding='utf-8-sig') as f:
-            leitor = csv.reader(f, delimiter=',') 
-            
-            # Tentativa de pular cabeçalho se existir
-            primeira_linha = next(leitor, None)
-            
-            # Verificação simples se a primeira linha parece cabeçalho (não numérico na freq)
-            if primeira_linha:
-                _, freq_teste = reconstruir_linha_fragmentada(primeira_linha)
-                if not freq_teste.strip().isdigit():
-                    print("Nota: Cabeçalho detectado e ignorado.")
-                else:
-                    # Se não for cabeçalho, processamos essa linha também
-                    nome, freq = reconstruir_linha_fragmentada(primeira_linha)
-                    dados_processados.append({
-                        "original": nome,
-                        "norm": ArtesaoDeDados.normalizar(nome),
-                        "freq": freq
-                    })
-
-            for linha in leitor:
-                if not linha: continue
-                
-                nome, freq = reconstruir_linha_fragmentada(linha)
-                
-                dados_processados.append({
-                    "original": nome,
-                    "norm": ArtesaoDeDados.normalizar(nome),
-                    "freq": freq
-                })
-                
-    except Exception as e:
-        print(f"Erro ao ler o arquivo: {e}")
-        return
-
-    print(f"Dados carregados: {len(dados_processados)} autores. Analisando padrões...")
-
-    # 2. Motor de Comparação (O2)
-    relatorio = []
-    indices_ignorados = set()
-
-    for i in range(len(dados_processados)):
-        if i in indices_ignorados: continue
-        
-        pivo = dados_processados[i]
-        grupo = [pivo]
-        encontrou_similar = False
-
-        for j in range(i + 1, len(dados_processados)):
-            if j in indices_ignorados: continue
-            
-            candidato = dados_processados[j]
-            
-            # Comparações
-            similiaridade = ArtesaoDeDados.calcular_similaridade(pivo['norm'], candidato['norm'])
-            abreviacao = (ArtesaoDeDados.verificar_inclusao(pivo['norm'], candidato['norm']) or 
-                          ArtesaoDeDados.verificar_inclusao(candidato['norm'], pivo['norm']))
-            
-            motivo = ""
-            if similiaridade > LIMITE_SIMILARIDADE:
-                motivo = f"Grafia similar ({similiaridade:.0%})"
-            elif abreviacao:
-                motivo = "Possível abreviação/incompleto"
-            
-            if motivo:
-                candidato['motivo'] = motivo
-                grupo.append(candidato)
-                indices_ignorados.add(j)
-                encontrou_similar = True
-
-        if encontrou_similar:
-            relatorio.append(grupo)
-
-    # 3. Escrita do Relatório (Design de Informação)
-    with open(ARQUIVO_SAIDA, 'w', encoding='utf-8') as f:
-        f.write("======================================================\n")
-        f.write("RELATÓRIO DE AUDITORIA DE AUTORES (DUPLICIDADES)\n")
-        f.write("======================================================\n")
-        f.write(f"Total de registros analisados: {len(dados_processados)}\n")
-        f.write(f"Grupos de conflito encontrados: {len(relatorio)}\n")
-        f.write("\n")
-        
-        for i, grupo in enumerate(relatorio, 1):
-            f.write(f"GRUPO #{i}\n")
-            for item in grupo:
-                marcador = "   |->" if 'motivo' in item else " [ORIGEM]"
-                info_extra = f"  -- {item['motivo']}" if 'motivo' in item else ""
-                
-                # Formatação visual para alinhar
-                f.write(f"{marcador} Nome: {item['original']:<40} | Freq: {item['freq']}{info_extra}\n")
-            f.write("-" * 60 + "\n")
-
-    print(f"\nSucesso. O relatório foi gerado em: {ARQUIVO_SAIDA}")
-    print("Abra este arquivo para validar as inconsistências.")
-
-if __name__ == "__main__":
+import csv
+import difflib
+import re
+import os
+import time
+from bisect import bisect_left, bisect_right
+import numpy as np
+from rapidfuzz import fuzz, process
+
+# --- CONFIGURAÇÃO ---
+ARQUIVO_ENTRADA = 'autores.csv'
+ARQUIVO_SAIDA = 'relatorio_duplicatas.txt'
+LIMITE_SIMILARIDADE = 0.88  # Aumentei ligeiramente a precisão para evitar "falsos positivos"
+LINHAS_POR_BLOCO = 500      # Linhas por bloco do cdist (500 x 53k em float32 ~ 100 MB no pior caso)
+
+class ArtesaoDeDados:
+    """
+    Ferramentas de precisão para análise textual e higienização de dados.
+    """
+    
+    @staticmethod
+    def normalizar(texto: str) -> str:
+        """
+        Padroniza o texto para comparação justa.
+        Remove pontuação excessiva, converte para maiúsculas e limpa espaços.
+        """
+        if not texto: return ""
+        # Remove caracteres que não sejam letras, números, vírgulas ou espaços
+        # Isso ajuda a evitar que um ponto final acidental atrapalhe a comparação
+        limpo = re.sub(r'[^\w\s,]', '', texto) 
+        # Remove espaços duplos
+        limpo = re.sub(r'\s+', ' ', limpo.strip())
+        return limpo.upper()
+
+    @staticmethod
+    def calcular_similaridade(a: str, b: str) -> float:
+        """Calcula a distância visual entre duas strings (0.0 a 1.0)."""
+        return difflib.SequenceMatcher(None, a, b).ratio()
+
+    @staticmethod
+    def verificar_inclusao(nome_curto: str, nome_longo: str) -> bool:
+        """
+        Verifica se 'SILVA, J.' está contido em 'SILVA, JOAO'.
+        """
+        # Remove pontos para facilitar a comparação de abreviações
+        nc = nome_curto.replace('.', '').strip()
+        nl = nome_longo.replace('.', '').strip()
+        
+        if len(nc) >= len(nl): return False
+        
+        # Verifica se o início coincide perfeitamente
+        return nl.startswith(nc)
+
+# --- MOTOR INDEXADO (mesmos achados da comparação par a par, sem os n² pares) ---
+
+def pares_abreviacao(normas: list) -> dict:
+    """
+    Índice -> índices com verificar_inclusao verdadeiro em algum sentido.
+    Com os nomes em ordem alfabética, os que começam por 'SILVA, J' formam um
+    intervalo contíguo, achado por bisect: O(n log n + pares).
+    """
+    # Mesma limpeza de verificar_inclusao
+    limpos = [n.replace('.', '').strip() for n in normas]
+    ordem = sorted(range(len(limpos)), key=limpos.__getitem__)
+    ordenados = [limpos[k] for k in ordem]
+    abreviacoes = {}
+    for curto in set(limpos):
+        iguais = bisect_left(ordenados, curto)
+        inicio = bisect_right(ordenados, curto, iguais)  # inclusão exige nome maior
+        fim = bisect_left(ordenados, curto + '\U0010FFFF', inicio)
+        for i in ordem[iguais:inicio]:
+            for j in ordem[inicio:fim]:
+                abreviacoes.setdefault(i, set()).add(j)
+                abreviacoes.setdefault(j, set()).add(i)
+    return abreviacoes
+
+def pares_grafia(normas: list) -> dict:
+    """
+    (i, j) com i < j -> calcular_similaridade(normas[i], normas[j]) acima de LIMITE_SIMILARIDADE.
+    O SequenceMatcher só roda nos pares que podem passar: a razão Indel do rapidfuzz
+    (LCS) nunca é menor que a dele. Essa razão é calculada em blocos (cdist em todos
+    os núcleos), em ordem de tamanho e só entre tamanhos compatíveis: acima do
+    limite, o maior nome tem menos de (2 / limite - 1) vezes o tamanho do menor.
+    """
+    n = len(normas)
+    ordem = sorted(range(n), key=lambda k: len(normas[k]))
+    ordenados = [normas[k] for k in ordem]
+    tamanhos = [len(t) for t in ordenados]
+    fator = 2 / LIMITE_SIMILARIDADE - 1
+    similares = {}
+    for inicio in range(0, n, LINHAS_POR_BLOCO):
+        fim = min(inicio + LINHAS_POR_BLOCO, n)
+        limite_colunas = bisect_right(tamanhos, int(tamanhos[fim - 1] * fator) + 1)
+        # Margem de 0.01 contra arredondamento do float32
+        cota = process.cdist(ordenados[inicio:fim], ordenados[inicio:limite_colunas], scorer=fuzz.ratio,
+                             score_cutoff=LIMITE_SIMILARIDADE * 100 - 0.01, workers=-1)
+        linhas, colunas = np.nonzero(cota)
+        for a, b in zip((linhas + inicio).tolist(), (colunas + inicio).tolist()):
+            if b <= a:
+                continue
+            i, j = sorted((ordem[a], ordem[b]))
+            similaridade = ArtesaoDeDados.calcular_similaridade(normas[i], normas[j])
+            if similaridade > LIMITE_SIMILARIDADE:
+                similares[(i, j)] = similaridade
+        print(f"\r   Grafia: {fim}/{n} nomes...", end="", flush=True)
+    print()
+    return similares
+
+def agrupar(total: int, similares: dict, abreviacoes: dict) -> list:
+    """
+    Refaz a varredura original (cada pivô leva os seguintes ainda livres, na ordem
+    do arquivo) só sobre os pares já achados. Retorna [(pivô, [(candidato, motivo)])].
+    """
+    vizinhos = {}
+    for i, j in similares:
+        vizinhos.setdefault(i, set()).add(j)
+    for i, ligados in abreviacoes.items():
+        vizinhos.setdefault(i, set()).update(j for j in ligados if j > i)
+
+    grupos = []
+    indices_ignorados = set()
+    for i in range(total):
+        if i in indices_ignorados: continue
+        membros = []
+        for j in sorted(vizinhos.get(i, ())):
+            if j in indices_ignorados: continue
+            if (i, j) in similares:
+                motivo = f"Grafia similar ({similares[(i, j)]:.0%})"
+            else:
+                motivo = "Possível abreviação/incompleto"
+            membros.append((j, motivo))
+            indices_ignorados.add(j)
+        if membros:
+            grupos.append((i, membros))
+    return grupos
+
+def reconstruir_linha_fragmentada(linha: list) -> tuple:
+    """
+    Resolve o problema da 'Vírgula ABNT' colidindo com a 'Vírgula CSV'.
+    Se a linha foi quebrada em 3 partes, une as duas primeiras.
+    """
+    if len(linha) == 2:
+        # Cenário Ideal: ["SILVA, JOAO", "10"]
+        return linha[0], linha[1]
+    
+    elif len(linha) >= 3:
+        # Cenário Fragmentado: ["SILVA", " JOAO", " 10"]
+        # Juntamos tudo exceto o último elemento (que deve ser a frequência)
+        nome_reconstruido = ",".join(linha[:-1]) 
+        frequencia = linha[-1]
+        return nome_reconstruido, frequencia
+        
+    return linha[0], "0" # Fallback para linhas malformadas
+
+def auditar_csv():
+    print(f"--- Iniciando Auditoria: {ARQUIVO_ENTRADA} ---")
+    
+    if not os.path.exists(ARQUIVO_ENTRADA):
+        print(f"ERRO CRÍTICO: O arquivo '{ARQUIVO_ENTRADA}' não foi encontrado.")
+        return
+
+    dados_processados = []
+
+    # 1. Leitura com Inteligência de Estrutura
+    try:
+        # 'utf-8-sig' é usado para garantir que arquivos salvos pelo Excel sejam lidos corretamente
+        with open(ARQUIVO_ENTRADA, mode='r', encoding='utf-8-sig') as f:
+            leitor = csv.reader(f, delimiter=',') 
+            
+            # Tentativa de pular cabeçalho se existir
+            primeira_linha = next(leitor, None)
+            
+            # Verificação simples se a primeira linha parece cabeçalho (não numérico na freq)
+            if primeira_linha:
+                _, freq_teste = reconstruir_linha_fragmentada(primeira_linha)
+                if not freq_teste.strip().isdigit():
+                    print("Nota: Cabeçalho detectado e ignorado.")
+                else:
+                    # Se não for cabeçalho, processamos essa linha também
+                    nome, freq = reconstruir_linha_fragmentada(primeira_linha)
+                    dados_processados.append({
+                        "original": nome,
+                        "norm": ArtesaoDeDados.normalizar(nome),
+                        "freq": freq
+                    })
+
+            for linha in leitor:
+                if not linha: continue
+                
+                nome, freq = reconstruir_linha_fragmentada(linha)
+                
+                dados_processados.append({
+                    "original": nome,
+                    "norm": ArtesaoDeDados.normalizar(nome),
+                    "freq": freq
+                })
+                
+    except Exception as e:
+        print(f"Erro ao ler o arquivo: {e}")
+        return
+
+    print(f"Dados carregados: {len(dados_processados)} autores. Analisando padrões...")
+
+    # 2. Motor de Comparação (indexado: mesmos grupos da comparação par a par)
+    inicio = time.time()
+    normas = [d['norm'] for d in dados_processados]
+    abreviacoes = pares_abreviacao(normas)
+    similares = pares_grafia(normas)
+    relatorio = []
+    for i, membros in agrupar(len(dados_processados), similares, abreviacoes):
+        grupo = [dados_processados[i]]
+        for j, motivo in membros:
+            candidato = dados_processados[j]
+            candidato['motivo'] = motivo
+            grupo.append(candidato)
+        relatorio.append(grupo)
+    print(f"Comparação concluída em {time.time() - inicio:.1f}s.")
+
+    # 3. Escrita do Relatório (Design de Informação)
+    with open(ARQUIVO_SAIDA, 'w', encoding='utf-8') as f:
+        f.write("======================================================\n")
+        f.write("RELATÓRIO DE AUDITORIA DE AUTORES (DUPLICIDADES)\n")
+        f.write("======================================================\n")
+        f.write(f"Total de registros analisados: {len(dados_processados)}\n")
+        f.write(f"Grupos de conflito encontrados: {len(relatorio)}\n")
+        f.write("\n")
+        
+        for i, grupo in enumerate(relatorio, 1):
+            f.write(f"GRUPO #{i}\n")
+            for item in grupo:
+                marcador = "   |->" if 'motivo' in item else " [ORIGEM]"
+                info_extra = f"  -- {item['motivo']}" if 'motivo' in item else ""
+                
+                # Formatação visual para alinhar
+                f.write(f"{marcador} Nome: {item['original']:<40} | Freq: {item['freq']}{info_extra}\n")
+            f.write("-" * 60 + "\n")
+
+    print(f"\nSucesso. O relatório foi gerado em: {ARQUIVO_SAIDA}")
+    print("Abra este arquivo para validar as inconsistências.")
+
+if __name__ == "__main__":
     auditar_csv()
\ No newline at end of file
@@ -0,0 +1,65 @@
+"""
+Índice de assinaturas de iniciais para achar abreviações por junção de hash.
+
+Cada nome entra com a assinatura (sobrenome, iniciais dos prenomes) e com todos
+os prefixos dela: 'Carvalho, Leonardo Rodrigues' fica em ('carvalho', 'lr') e
+('carvalho', 'l'). 'Carvalho, L. R.' e 'Carvalho, L.' caem nas mesmas chaves,
+então a forma abreviada encontra a completa com uma consulta ao dicionário,
+em vez de comparar todos os pares: O(n · k), k = número de prenomes.
+
+A normalização do sobrenome e a extração das iniciais ficam com quem usa o
+índice (cada script tem a sua); aqui só entram o sobrenome e a sequência de
+iniciais (string ou lista de letras).
+
+Uso:
+    indice = IndiceIniciais()
+    indice.adicionar(item, 'carvalho', 'lr')
+    indice.buscar('carvalho', 'l')       # itens cujas iniciais começam por 'l'
+    indice.pares()                        # (curto, longo): iniciais de um são prefixo das do outro
+"""
+
+
+def iniciais_de(prenomes):
+    """Primeira letra de cada prenome não vazio: ['Leonardo', 'R.'] -> 'LR'."""
+    return "".join(p[0] for p in prenomes if p)
+
+
+class IndiceIniciais:
+    """
+    (sobrenome, prefixo das iniciais) -> itens.
+    Nome sem iniciais não entra em nenhuma chave (nem gera pares).
+    """
+
+    def __init__(self):
+        self._itens = []   # [(item, sobrenome, iniciais)]
+        self._mapa = {}    # (sobrenome, prefixo) -> [posições em _itens]
+
+    def adicionar(self, item, sobrenome, iniciais):
+        iniciais = "".join(iniciais)
+        posicao = len(self._itens)
+        self._itens.append((item, sobrenome, iniciais))
+        for k in range(1, len(iniciais) + 1):
+            self._mapa.setdefault((sobrenome, iniciais[:k]), []).append(posicao)
+
+    def buscar(self, sobrenome, iniciais):
+        """Itens com esse sobrenome cujas iniciais começam por 'iniciais' (inclusive iguais)."""
+        posicoes = self._mapa.get((sobrenome, "".join(iniciais)), ())
+        return [self._itens[p][0] for p in posicoes]
+
+    def sobrenomes(self):
+        return {sobrenome for _, sobrenome, _ in self._itens}
+
+    def pares(self):
+        """
+        Gera (item_a, item_b), um por par, em que as iniciais de item_a são prefixo
+        das de item_b (iniciais iguais: um par só, com o item adicionado antes em item_a).
+        """
+        for a, (item_a, sobrenome, iniciais) in enumerate(self._itens):
+            if not iniciais:
+                continue
+            for b in self._mapa.get((sobrenome, iniciais), ()):
+                if b == a:
+                    continue
+                if len(self._itens[b][2]) == len(iniciais) and b < a:
+                    continue  # iniciais iguais: já saiu quando 'b' foi a vez
+                yield item_a, self._itens[b][0]
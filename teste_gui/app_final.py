@@ -5,101 +5,42 @@ import shutil
 import sys
 import threading
 import queue
-import time
-from datetime import datetime
+from collections import deque
+import multiprocessing
 import motor_unb as core
-
-# --- FUNÇÕES UTILITÁRIAS ---
-
-def log_central(mensagem, q=None, tipo="INFO"):
-    """Gera log em arquivo e envia para a fila da interface gráfica."""
-    base_path = getattr(sys, '_MEIPASS', os.path.dirname(os.path.abspath(__file__)))
-    path_log = os.path.join(base_path, "LOG_PRO_UNB.txt")
-    
-    timestamp = datetime.now().strftime('%H:%M:%S')
-    
-    # Ícones para facilitar leitura
-    mapa_icones = {
-        "ERRO": "🔴", 
-        "SUCESSO": "✅", 
-        "DETALHE": "   ↳", # Indentação para detalhes dos scripts
-        "INFO": "ℹ️"
-    }
-    icone = mapa_icones.get(tipo, "ℹ️")
-    
-    texto_log = f"[{timestamp}] {icone} {mensagem}"
-    
-    try:
-        with open(path_log, "a", encoding="utf-8") as f:
-            f.write(texto_log + "\n")
-    except:
-        pass 
-
-    if q:
-        q.put(("LOG", texto_log))
-
-def contar_total_xml(pastas):
-    """Conta quantos XMLs existem para definir a barra de progresso."""
-    total = 0
-    for p in pastas:
-        for raiz, _, arquivos in os.walk(p):
-            if "Arquivos_Processados_XML" in raiz: continue
-            for f in arquivos:
-                if f.lower() == "dublin_core.xml":
-                    total += 1
-    return total
-
-def executor_pro(pastas, q, bases):
-    """Função worker que roda em segundo plano."""
-    q.put(("STATUS", "🔍 Analisando volume de dados..."))
-    total_arquivos = contar_total_xml(pastas)
-    
-    if total_arquivos == 0:
-        q.put(("ERRO_FATAL", "Nenhum arquivo 'dublin_core.xml' encontrado nas pastas!"))
-        return
-
-    q.put(("CONFIG_BARRA", total_arquivos))
-    log_central(f"Iniciando processamento (SOBRESCREVENDO) de {total_arquivos} arquivos...", q)
-    
-    processados = 0
-    
-    for p_origem in pastas:
-        if not os.path.exists(p_origem): continue
-            
-        for raiz, _, arquivos in os.walk(p_origem):
-            if "Arquivos_Processados_XML" in raiz: continue
-                
-            for arq in arquivos:
-                if arq.lower() == "dublin_core.xml":
-                    caminho_xml = os.path.join(raiz, arq)
-                    nome_pasta_pai = os.path.basename(raiz)
-                    
-                    try:
-                        # O motor retorna (Sucesso, Lista_de_Logs)
-                        ok, logs_detalhados = core.processar_arquivo_direto(caminho_xml, bases)
-                        
-                        if ok:
-                            log_central(f"{nome_pasta_pai}: Processado.", q, "SUCESSO")
-                            # Itera sobre as mensagens dos scripts (Assuntos/Orientadores)
-                            if logs_detalhados:
-                                for detalhe in logs_detalhados:
-                                    log_central(detalhe, q, "DETALHE")
-                            else:
-                                log_central("Nenhuma alteração de termos necessária.", q, "DETALHE")
-                        else:
-                            # Se falhou, logs_detalhados é uma lista com o erro
-                            log_central(f"{nome_pasta_pai}: {logs_detalhados[0]}", q, "ERRO")
-                        
-                    except Exception as e:
-                        log_central(f"Erro crítico em {arq}: {str(e)}", q, "ERRO")
-                    
-                    processados += 1
-                    q.put(("PROGRESSO", processados))
-    
-    q.put(("FINALIZADO", processados))
+import paralelo_unb as paralelo
+from lote_unb import executor_pro
 
 # --- INTERFACE GRÁFICA ---
 
+# Linhas visíveis no painel de log (o histórico completo fica no LOG_PRO_UNB.txt)
+LINHAS_NA_TELA = 2000
+# Limite de mensagens lidas da fila por ciclo da interface (mantém a janela responsiva)
+MENSAGENS_POR_CICLO = 20000
+
+class TelaLog:
+    """Buffer circular das últimas linhas do log; o widget é redesenhado no máximo uma vez por ciclo."""
+
+    def __init__(self, limite=LINHAS_NA_TELA):
+        self.linhas = deque(maxlen=limite)
+        self.descartadas = 0
+        self.mudou = False
+
+    def adicionar(self, linha):
+        if len(self.linhas) == self.linhas.maxlen:
+            self.descartadas += 1
+        self.linhas.append(linha)
+        self.mudou = True
+
+    def renderizar(self, elemento):
+        if not self.mudou:
+            return
+        texto = "\n".join(self.linhas)
+        if self.descartadas:
+            texto = f"… {self.descartadas} linhas anteriores no arquivo LOG_PRO_UNB.txt\n" + texto
+        elemento.update(texto)
+        self.mudou = False
+
 def main():
     sg.theme('LightBlue2')
     sg.set_options(font=('Segoe UI', 10))
@@ -129,8 +70,17 @@ def main():
         
         [sg.Multiline(size=(60, 15), key='-LOG-', autoscroll=True, font=('Consolas', 9), background_color='#FAFAFA', disabled=True)],
         
+        [sg.Checkbox('Modo lote (resolve termos únicos de uma vez)', key='-LOTE-', default=True),
+         sg.Checkbox('Pular itens já normalizados', key='-PULAR-', default=True),
+         sg.Checkbox('Perfil cProfile', key='-PERFIL-', default=False, tooltip='Inclui um cProfile no relatório de perfil (mais lento)'),
+         sg.Push(),
+         sg.Text('Processos:'),
+         sg.Spin(list(range(1, paralelo.numero_workers_padrao() + 1)), initial_value=paralelo.numero_workers_padrao(), key='-WORKERS-', size=(3, 1))],
+        
         [sg.Column([[
-            sg.Button('🚀 PROCESSAR E SUBSTITUIR', key='INICIAR', font=('Segoe UI', 12, 'bold'), button_color=('white', '#D9534F'), size=(30, 2), pad=(0, 15))
+            sg.Button('🚀 PROCESSAR E SUBSTITUIR', key='INICIAR', font=('Segoe UI', 12, 'bold'), button_color=('white', '#D9534F'), size=(30, 2), pad=(0, 15)),
+            sg.Button('↩️ Retomar', key='RETOMAR', size=(12, 2), button_color=('white', '#0078D7')),
+            sg.Button('⏹️ Cancelar', key='CANCELAR', size=(12, 2), disabled=True)
         ]], justification='center')]
     ]
 
@@ -147,11 +97,15 @@ def main():
     lista_pastas = []
     q = queue.Queue()
     total_arquivos_cache = 0
+    progresso_atual = 0
+    tela_log = TelaLog()
+    parar = threading.Event()
 
     # Carregamento Inicial
     window.perform_long_operation(lambda: core.carregar_bases_globais(getattr(sys, '_MEIPASS', os.path.dirname(os.path.abspath(__file__)))), '-BASES_LOADED-')
     window['-STATUS-'].update("⏳ Carregando bases de dados (Orientadores/Assuntos)...")
     window['INICIAR'].update(disabled=True)
+    window['RETOMAR'].update(disabled=True)
 
     bases_carregadas = {}
 
@@ -165,7 +119,8 @@ def main():
             bases_carregadas = values[event]
             window['-STATUS-'].update("✔️ Sistema pronto. Adicione pastas para começar.")
             window['INICIAR'].update(disabled=False)
-            window['-LOG-'].print(f"Bases carregadas: {len(bases_carregadas.get('advisors', []))} orientadores, {len(bases_carregadas.get('keywords', []))} assuntos.")
+            window['RETOMAR'].update(disabled=False)
+            tela_log.adicionar(f"Bases carregadas: {len(bases_carregadas.get('advisors', []))} orientadores, {len(bases_carregadas.get('keywords', []))} assuntos.")
 
         if event == 'ADD':
             pasta = values['-IN-']
@@ -191,7 +146,7 @@ def main():
         if event == '-LISTA-' and values['-LISTA-']:
             window['REM'].update(disabled=False)
 
-        if event == 'INICIAR':
+        if event in ('INICIAR', 'RETOMAR'):
             if not lista_pastas:
                 sg.popup_error("A lista de pastas está vazia!")
                 continue
@@ -200,44 +155,80 @@ def main():
                 continue
 
             window['INICIAR'].update(disabled=True)
+            window['RETOMAR'].update(disabled=True)
             window['ADD'].update(disabled=True)
             window['CLR'].update(disabled=True)
             window['REM'].update(disabled=True)
+            window['CANCELAR'].update(disabled=False)
             window['-BARRA-'].update(0, max=100)
             
-            threading.Thread(target=executor_pro, args=(lista_pastas, q, bases_carregadas), daemon=True).start()
-
-        # Leitura da Fila de Logs
-        try:
-            while True:
+            parar = threading.Event()
+            threading.Thread(target=executor_pro, args=(lista_pastas, q, bases_carregadas, values['-LOTE-'], int(values['-WORKERS-']), values['-PULAR-'], event == 'RETOMAR', parar), kwargs={'perfil_cprofile': values['-PERFIL-']}, daemon=True).start()
+
+        if event == 'CANCELAR':
+            # Cancelamento cooperativo: os itens em andamento terminam, nada novo começa
+            parar.set()
+            window['CANCELAR'].update(disabled=True)
+            window['-STATUS-'].update("⏳ Cancelando após os arquivos em andamento...")
+
+        # Leitura da Fila (coalescida): as mensagens do ciclo viram uma única atualização de cada widget
+        status_novo = None
+        barra_mudou = False
+        evento_final = None
+        for _ in range(MENSAGENS_POR_CICLO):
+            try:
                 tipo, dados = q.get_nowait()
-                
-                if tipo == "LOG":
-                    window['-LOG-'].print(dados)
-                elif tipo == "STATUS":
-                    window['-STATUS-'].update(dados)
-                elif tipo == "CONFIG_BARRA":
-                    total_arquivos_cache = dados
-                    window['-BARRA-'].update(0, max=dados)
-                elif tipo == "PROGRESSO":
-                    window['-BARRA-'].update(dados)
-                    window['-STATUS-'].update(f"Processando: {dados}/{total_arquivos_cache} arquivos...")
-                elif tipo == "ERRO_FATAL":
-                    sg.popup_error(dados)
-                    window['INICIAR'].update(disabled=False)
-                elif tipo == "FINALIZADO":
-                    window['-STATUS-'].update(f"Concluído! {dados} arquivos processados.")
-                    if total_arquivos_cache > 0: window['-BARRA-'].update(total_arquivos_cache) 
-                    sg.popup(f"Sucesso! \n{dados} arquivos foram atualizados.", title="Fim")
-                    window['INICIAR'].update(disabled=False)
-                    window['ADD'].update(disabled=False)
-                    window['CLR'].update(disabled=False)
-                
-                q.task_done()
-        except queue.Empty:
-            pass
+            except queue.Empty:
+                break
+            q.task_done()
+            
+            if tipo == "LOG":
+                tela_log.adicionar(dados)
+            elif tipo == "STATUS":
+                status_novo = dados
+            elif tipo == "CONFIG_BARRA":
+                total_arquivos_cache = dados
+                progresso_atual = 0
+                barra_mudou = True
+            elif tipo == "TOTAL_BARRA":
+                # Total cresce enquanto a varredura encontra arquivos (sem zerar a barra)
+                total_arquivos_cache = dados
+                barra_mudou = True
+            elif tipo == "PROGRESSO":
+                progresso_atual = dados
+                barra_mudou = True
+                status_novo = f"Processando: {dados}/{total_arquivos_cache} arquivos..."
+            elif tipo in ("ERRO_FATAL", "FINALIZADO", "CANCELADO"):
+                # Popups só depois de desenhar o que chegou antes deles
+                evento_final = (tipo, dados)
+                break
+
+        tela_log.renderizar(window['-LOG-'])
+        if barra_mudou:
+            window['-BARRA-'].update(progresso_atual, max=max(total_arquivos_cache, 1))
+        if status_novo:
+            window['-STATUS-'].update(status_novo)
+
+        if evento_final:
+            tipo, dados = evento_final
+            if tipo == "ERRO_FATAL":
+                sg.popup_error(dados)
+            elif tipo == "CANCELADO":
+                window['-STATUS-'].update(f"Cancelado após {dados} arquivos.")
+                sg.popup(f"Lote cancelado após {dados} arquivos.\nUse 'Retomar' para continuar de onde parou.", title="Cancelado")
+            else:
+                window['-STATUS-'].update(f"Concluído! {dados} arquivos processados.")
+                if total_arquivos_cache > 0: window['-BARRA-'].update(total_arquivos_cache, max=total_arquivos_cache)
+                sg.popup(f"Sucesso! \n{dados} arquivos foram atualizados.", title="Fim")
+            window['INICIAR'].update(disabled=False)
+            window['RETOMAR'].update(disabled=False)
+            window['CANCELAR'].update(disabled=True)
+            window['ADD'].update(disabled=False)
+            window['CLR'].update(disabled=False)
 
     window.close()
 
 if __name__ == "__main__":
+    # Necessário para o pool de processos no executável (PyInstaller/Windows)
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
@@ -0,0 +1,390 @@
+#!/usr/bin/env python3
+"""
+Benchmarks do motor_unb (rodam offline, com semente fixa para serem repetíveis).
+
+Uso:
+    python benchmark_unb.py prefiltro [--consultas 2000] [--semente 42]
+    python benchmark_unb.py gerar DESTINO [--itens 10k] [--semente 42]
+    python benchmark_unb.py motores [--itens 1k] [--motor motor organizador ...]
+                                    [--saida resultado.json] [--referencia anterior.json]
+"""
+import os
+import sys
+import csv
+import json
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import subprocess
+import contextlib
+import importlib.util
+from xml.sax.saxutils import escape
+
+from rapidfuzz import process, fuzz
+
+import motor_unb as core
+from indice_unb import chave_exata
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+# --- 1. CONSULTAS RUIDOSAS (simulam o que chega nos XMLs) ---
+def ruido(termo, rng):
+    """Aplica uma variação típica de digitação/formatação a um termo da base."""
+    sorteio = rng.random()
+    if sorteio < 0.25:
+        return termo.lower()
+    if sorteio < 0.45:
+        return termo.upper()
+    if sorteio < 0.65 and len(termo) > 4:
+        i = rng.randrange(len(termo))
+        return termo[:i] + termo[i + 1:]           # letra faltando
+    if sorteio < 0.80 and len(termo) > 4:
+        i = rng.randrange(len(termo) - 1)
+        return termo[:i] + termo[i + 1] + termo[i] + termo[i + 2:]  # letras trocadas
+    if sorteio < 0.90:
+        return termo + "s"                          # plural
+    return termo
+
+
+def gerar_consultas(indice, quantidade, rng):
+    return [ruido(rng.choice(indice.termos), rng) for _ in range(quantidade)]
+
+
+# --- 2. BENCHMARK DO PRÉ-FILTRO ---
+def benchmark_prefiltro(consultas_n, semente):
+    rng = random.Random(semente)
+    bases = core.carregar_bases_globais(BASE_DIR, usar_cache=False)
+    indice = bases['keywords']
+    consultas = [chave_exata(c) for c in gerar_consultas(indice, consultas_n, rng)]
+    consultas = [c for c in consultas if c]
+
+    print(f"Base: {len(indice)} assuntos | Consultas: {len(consultas)} | Limiar: {indice.limiar}")
+
+    # Varredura completa (referência)
+    inicio = time.perf_counter()
+    referencia = [
+        process.extract(c, indice.chaves, limit=3, scorer=fuzz.ratio, processor=None, score_cutoff=indice.limiar)
+        for c in consultas
+    ]
+    t_completo = time.perf_counter() - inicio
+
+    # Com pré-filtro
+    total_candidatos = 0
+    varreduras_completas = 0
+    inicio = time.perf_counter()
+    filtrados = []
+    for c in consultas:
+        posicoes = indice.candidatos(c)
+        if posicoes is None:
+            varreduras_completas += 1
+            total_candidatos += len(indice)
+            filtrados.append(process.extract(c, indice.chaves, limit=3, scorer=fuzz.ratio, processor=None, score_cutoff=indice.limiar))
+            continue
+        total_candidatos += posicoes.size
+        escolhas = [indice.chaves[i] for i in posicoes]
+        achados = process.extract(c, escolhas, limit=3, scorer=fuzz.ratio, processor=None, score_cutoff=indice.limiar)
+        filtrados.append([(m[0], m[1], int(posicoes[m[2]])) for m in achados])
+    t_filtrado = time.perf_counter() - inicio
+
+    # Garantia: nenhum match >= limiar pode se perder
+    divergencias = sum(1 for a, b in zip(referencia, filtrados) if [m[2] for m in a] != [m[2] for m in b])
+
+    media = total_candidatos / len(consultas)
+    print(f"Candidatos por consulta: {media:.0f} de {len(indice)} (redução de {len(indice) / max(media, 1):.0f}x, "
+          f"{varreduras_completas} varreduras completas)")
+    print(f"Tempo varredura completa: {t_completo:.2f}s | com pré-filtro: {t_filtrado:.2f}s "
+          f"({t_completo / max(t_filtrado, 1e-9):.1f}x)")
+    print(f"Divergências de resultado: {divergencias}")
+    return divergencias == 0
+
+
+# --- 3. CORPUS SAF SINTÉTICO ---
+ITENS_POR_COLECAO = 1000
+
+NOMES = ["joão", "maria", "ana", "pedro", "lucas", "juliana", "carlos", "fernanda", "rafael", "beatriz",
+         "gabriel", "larissa", "marcos", "patrícia", "thiago", "camila", "bruno", "aline", "diego", "renata"]
+SOBRENOMES = ["silva", "souza", "oliveira", "santos", "pereira", "lima", "costa", "ferreira", "rodrigues",
+              "almeida", "nascimento", "carvalho", "gomes", "martins", "araújo", "ribeiro", "barbosa", "rocha"]
+CURSOS = ["Educação", "Direito", "Administração", "Ciência da Computação", "Saúde Coletiva", "Linguística",
+          "Ecologia", "Engenharia Civil", "Psicologia", "História", "Geografia", "Economia"]
+
+def quantidade(texto):
+    """'1k' -> 1000, '100k' -> 100000, '250' -> 250."""
+    texto = texto.strip().lower()
+    if texto.endswith("k"):
+        return int(float(texto[:-1]) * 1000)
+    return int(texto)
+
+def ler_termos(nome_csv):
+    with open(os.path.join(BASE_DIR, nome_csv), encoding='utf-8-sig') as f:
+        return [linha[0].strip() for linha in csv.reader(f) if linha and linha[0].strip()]
+
+def nome_pessoa(rng):
+    return f"{rng.choice(SOBRENOMES)}, {rng.choice(NOMES)} {rng.choice(SOBRENOMES)}"
+
+def dcvalue(element, qualifier, texto, language="pt_BR"):
+    lang = f' language="{language}"' if language else ""
+    return f'  <dcvalue element="{element}" qualifier="{qualifier}"{lang}>{escape(texto)}</dcvalue>\n'
+
+def gerar_item(rng, assuntos, orientadores):
+    """Um dublin_core.xml como os que chegam do depósito: caixa irregular, assuntos num campo só, digitação ruidosa."""
+    mestrado = rng.random() < 0.6
+    palavras = rng.sample(assuntos, rng.randint(3, 6))
+    chaves = [ruido(t, rng) for t in palavras]
+    if rng.random() < 0.1:
+        chaves.append("termo sem correspondência " + str(rng.randrange(10 ** 6)))
+    separador = rng.choice(["; ", ", ", ". "])
+    curso = rng.choice(CURSOS)
+    grau = "Mestrado" if mestrado else "Doutorado"
+    titulo = f"{palavras[0]}:{rng.choice(['um estudo', 'análise', 'perspectivas'])} sobre {palavras[1].lower()} no df"
+    autor = nome_pessoa(rng)
+    ano = rng.randint(2005, 2025)
+
+    campos = [
+        dcvalue("contributor", "author", rng.choice([autor, autor.lower(), autor.upper()])),
+        dcvalue("contributor", "advisor", ruido(rng.choice(orientadores), rng)),
+    ]
+    if rng.random() < 0.3:
+        campos.append(dcvalue("contributor", "advisor-co", nome_pessoa(rng)))
+    for i in range(rng.randint(0, 3)):
+        campos.append(dcvalue("contributor", f"referee{i + 1}", nome_pessoa(rng)))
+    if rng.random() < 0.5:
+        campos.append(dcvalue("contributor", "advisorID", f"{rng.randrange(10 ** 15):015d}"))
+    campos += [
+        dcvalue("title", "none", rng.choice([titulo, titulo.lower()])),
+        dcvalue("type", "none", "masterThesis" if mestrado else "doctoralThesis"),
+        dcvalue("subject", "keyword", separador.join(chaves)),
+        dcvalue("description", "resumo", " ".join(rng.choice(palavras) for _ in range(60))),
+        dcvalue("date", "issued", f"{ano}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}", language=None),
+        dcvalue("identifier", "citation",
+                f"{autor.upper()}. {titulo}. {ano}. {rng.randint(60, 400)} f. "
+                f"{'Dissertação' if mestrado else 'Tese'} ({grau} em {curso.lower()}) — Universidade de Brasília, Brasília, {ano}."),
+        dcvalue("publisher", "country", "Brasil"),
+        dcvalue("publisher", "initials", "UnB"),
+        dcvalue("rights", "license", "x"),
+    ]
+    if rng.random() < 0.5:
+        campos.append(dcvalue("publisher", "program", f"Programa de Pós-Graduação em {curso}"))
+    return '<?xml version="1.0" encoding="utf-8" standalone="no"?>\n<dublin_core schema="dc">\n' + "".join(campos) + "</dublin_core>\n"
+
+def gerar_corpus(destino, itens, semente, plano=False):
+    """
+    Gera 'itens' itens SAF em destino/colecao_NNN/item_NNNNNN/ (dublin_core.xml + contents).
+    Com plano=True, gera destino/NNNNNN.xml numa pasta só (formato que as auditorias leem).
+    A mesma semente gera exatamente o mesmo corpus.
+    """
+    rng = random.Random(semente)
+    assuntos = ler_termos("base_assuntos_unb.csv")
+    orientadores = ler_termos("base_orientadores_unb.csv")
+    os.makedirs(destino, exist_ok=True)
+    for n in range(itens):
+        xml = gerar_item(rng, assuntos, orientadores)
+        if plano:
+            caminho = os.path.join(destino, f"{n:06d}.xml")
+        else:
+            pasta = os.path.join(destino, f"colecao_{n // ITENS_POR_COLECAO:03d}", f"item_{n:06d}")
+            os.makedirs(pasta, exist_ok=True)
+            with open(os.path.join(pasta, "contents"), "w", encoding="utf-8") as f:
+                f.write("documento.pdf\tbundle:ORIGINAL\n")
+            caminho = os.path.join(pasta, "dublin_core.xml")
+        with open(caminho, "w", encoding="utf-8") as f:
+            f.write(xml)
+    return destino
+
+# --- 4. MOTORES (cada um roda num subprocesso: RSS de pico isolado) ---
+def pico_rss_mb():
+    """Pico de memória residente do processo atual (None se indisponível, ex.: Windows)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa em KB; macOS em bytes
+    return pico / (1024 * 1024) if sys.platform == "darwin" else pico / 1024
+
+class Cronometro:
+    """Tempo por fase, na ordem em que as fases rodaram."""
+
+    def __init__(self):
+        self.fases = {}
+
+    @contextlib.contextmanager
+    def fase(self, nome):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.fases[nome] = self.fases.get(nome, 0.0) + time.perf_counter() - inicio
+
+def listar_dublin_core(pasta):
+    return sorted(os.path.join(raiz, f) for raiz, _, arquivos in os.walk(pasta)
+                  for f in arquivos if f == "dublin_core.xml")
+
+def rodar_motor(pasta, crono):
+    with crono.fase("carga"):
+        bases = core.carregar_bases_globais(BASE_DIR, usar_cache=False)
+    with crono.fase("descoberta"):
+        caminhos = listar_dublin_core(pasta)
+    with crono.fase("lote"):
+        core.preparar_lote(caminhos, bases)
+    erros = 0
+    with crono.fase("processamento"):
+        for caminho in caminhos:
+            ok, _ = core.processar_arquivo_direto(caminho, bases)
+            erros += not ok
+    return len(caminhos), erros
+
+def rodar_organizador(pasta, crono):
+    with crono.fase("carga"):
+        caminho_mod = os.path.join(BASE_DIR, "..", "testefinal", "organizador_metadados_unb_v0.2.py")
+        spec = importlib.util.spec_from_file_location("organizador_unb", caminho_mod)
+        org = importlib.util.module_from_spec(spec)
+        with contextlib.redirect_stdout(open(os.devnull, "w")):
+            spec.loader.exec_module(org)
+        # Os caminhos das bases no script são da máquina do autor: usa as do app
+        org.BASE_ADVISORS = org.carregar_csv_dict(os.path.join(BASE_DIR, "base_orientadores_unb.csv"))
+        org.BASE_KEYWORDS = org.carregar_csv_dict(os.path.join(BASE_DIR, "base_assuntos_unb.csv"), com_frequencia=True)
+    with crono.fase("descoberta"):
+        caminhos = listar_dublin_core(pasta)
+    with crono.fase("processamento"):
+        with contextlib.redirect_stdout(open(os.devnull, "w")):
+            for caminho in caminhos:
+                org.processar_xml(caminho)
+    return len(caminhos), 0
+
+def _rodar_auditoria(gerador, crono):
+    itens = erros = 0
+    with crono.fase("processamento"):
+        for msg in gerador:
+            if msg.startswith("PROGRESSO:"):
+                itens += 1
+            elif msg.startswith("❌"):
+                erros += 1
+    return itens, erros
+
+def rodar_auditoria_assuntos(pasta, crono):
+    with crono.fase("carga"):
+        import checagem_assuntos
+    return _rodar_auditoria(checagem_assuntos.executar_auditoria_assuntos(pasta), crono)
+
+def rodar_auditoria_orientadores(pasta, crono):
+    with crono.fase("carga"):
+        import checagem_de_base
+    return _rodar_auditoria(checagem_de_base.executar_auditoria_orientadores(pasta), crono)
+
+# nome -> (função, corpus plano?)
+MOTORES = {
+    "motor": (rodar_motor, False),
+    "organizador": (rodar_organizador, False),
+    "auditoria_assuntos": (rodar_auditoria_assuntos, True),
+    "auditoria_orientadores": (rodar_auditoria_orientadores, True),
+}
+
+def executar_motor(nome, pasta):
+    """Roda um motor neste processo e imprime o resultado (JSON) na última linha."""
+    crono = Cronometro()
+    inicio = time.perf_counter()
+    itens, erros = MOTORES[nome][0](pasta, crono)
+    total = time.perf_counter() - inicio
+    print(json.dumps({
+        "motor": nome, "itens": itens, "erros": erros, "tempo": total,
+        "itens_por_s": itens / max(total, 1e-9),
+        "fases": crono.fases, "pico_rss_mb": pico_rss_mb()
+    }))
+
+def benchmark_motores(nomes, itens, semente, saida=None, referencia=None, tolerancia=0.2):
+    resultados = []
+    with tempfile.TemporaryDirectory(prefix="bench_unb_") as tmp:
+        modelos = {}
+        for nome in nomes:
+            plano = MOTORES[nome][1]
+            if plano not in modelos:
+                print(f"Gerando corpus {'plano' if plano else 'SAF'} com {itens} itens (semente {semente})...")
+                modelos[plano] = gerar_corpus(os.path.join(tmp, f"modelo_{int(plano)}"), itens, semente, plano)
+            # Cada motor altera os XMLs: trabalha numa cópia do corpus
+            pasta = os.path.join(tmp, nome)
+            shutil.copytree(modelos[plano], pasta)
+
+            proc = subprocess.run([sys.executable, os.path.abspath(__file__), "rodar", nome, pasta],
+                                  capture_output=True, text=True, cwd=BASE_DIR)
+            linhas = proc.stdout.strip().splitlines()
+            if proc.returncode != 0 or not linhas:
+                erro = (proc.stderr.strip().splitlines() or ["sem saída"])[-1]
+                print(f"{nome:<24} FALHOU: {erro}")
+                continue
+            resultados.append(json.loads(linhas[-1]))
+            shutil.rmtree(pasta, ignore_errors=True)
+
+    print(f"\n{'Motor':<24}{'Itens/s':>10}{'Total (s)':>11}{'RSS (MB)':>10}  Fases (s)")
+    for r in resultados:
+        rss = f"{r['pico_rss_mb']:.0f}" if r['pico_rss_mb'] is not None else "-"
+        fases = ", ".join(f"{f} {t:.2f}" for f, t in r['fases'].items())
+        print(f"{r['motor']:<24}{r['itens_por_s']:>10.1f}{r['tempo']:>11.2f}{rss:>10}  {fases}")
+
+    if saida:
+        with open(saida, "w", encoding="utf-8") as f:
+            json.dump({"itens": itens, "semente": semente, "resultados": resultados}, f, indent=2)
+
+    if not referencia:
+        return True
+    # Regressão: vazão abaixo de (1 - tolerancia) da referência
+    with open(referencia, encoding="utf-8") as f:
+        anteriores = {r['motor']: r for r in json.load(f)['resultados']}
+    ok = True
+    print(f"\nComparação com {referencia}:")
+    for r in resultados:
+        antes = anteriores.get(r['motor'])
+        if not antes or not antes['itens_por_s']:
+            continue
+        razao = r['itens_por_s'] / antes['itens_por_s']
+        regressao = razao < 1 - tolerancia
+        ok &= not regressao
+        print(f"{r['motor']:<24}{razao:>8.2f}x {'REGRESSÃO' if regressao else 'ok'}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks do motor_unb")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p_pre = sub.add_parser("prefiltro", help="Redução de candidatos do blocking de assuntos")
+    p_pre.add_argument("--consultas", type=int, default=2000)
+    p_pre.add_argument("--semente", type=int, default=42)
+
+    p_ger = sub.add_parser("gerar", help="Gera um corpus SAF sintético (1k/10k/100k itens)")
+    p_ger.add_argument("destino")
+    p_ger.add_argument("--itens", type=quantidade, default=quantidade("10k"))
+    p_ger.add_argument("--semente", type=int, default=42)
+    p_ger.add_argument("--plano", action="store_true", help="XMLs numa pasta só (formato das auditorias)")
+
+    p_mot = sub.add_parser("motores", help="Itens/s, tempo por fase e RSS de pico de cada motor")
+    p_mot.add_argument("--itens", type=quantidade, default=quantidade("1k"))
+    p_mot.add_argument("--semente", type=int, default=42)
+    p_mot.add_argument("--motor", nargs="+", choices=list(MOTORES), default=list(MOTORES))
+    p_mot.add_argument("--saida", help="Grava os resultados em JSON")
+    p_mot.add_argument("--referencia", help="JSON de uma execução anterior: falha se a vazão cair")
+    p_mot.add_argument("--tolerancia", type=float, default=0.2)
+
+    p_rod = sub.add_parser("rodar", help="(interno) roda um motor neste processo")
+    p_rod.add_argument("motor", choices=list(MOTORES))
+    p_rod.add_argument("pasta")
+
+    args = parser.parse_args()
+    if args.comando == "prefiltro":
+        ok = benchmark_prefiltro(args.consultas, args.semente)
+        sys.exit(0 if ok else 1)
+    elif args.comando == "gerar":
+        gerar_corpus(args.destino, args.itens, args.semente, args.plano)
+        print(f"{args.itens} itens gerados em {args.destino}")
+    elif args.comando == "motores":
+        ok = benchmark_motores(args.motor, args.itens, args.semente, args.saida, args.referencia, args.tolerancia)
+        sys.exit(0 if ok else 1)
+    elif args.comando == "rodar":
+        executar_motor(args.motor, args.pasta)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+import os
+import sqlite3
+import hashlib
+import threading
+
+# Nome padrão do arquivo de cache (fica na pasta de dados do app, ver motor_unb.pasta_dados)
+NOME_CACHE = "cache_decisoes_unb.sqlite"
+
+# Quantas decisões novas acumular antes de gravar no disco
+LIMITE_PENDENTES = 500
+
+
+def impressao_arquivo(caminho):
+    """Impressão digital (SHA-1 do conteúdo) de uma base CSV. '' se não existir."""
+    if not caminho or not os.path.exists(caminho):
+        return ""
+    h = hashlib.sha1()
+    with open(caminho, 'rb') as f:
+        for bloco in iter(lambda: f.read(1 << 20), b''):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+class CacheDecisoes:
+    """
+    Cache persistente (SQLite) das decisões de normalização:
+    (termo bruto, campo, limiar, impressão da base) -> (termo escolhido, origem).
+    Também guarda quanto tempo cada decisão custou, para estimar o tempo economizado.
+
+    As decisões válidas são carregadas em memória na abertura; entradas de
+    versões antigas das bases são apagadas automaticamente. Novas decisões
+    são gravadas em lote (gravar()).
+    """
+
+    def __init__(self, caminho, impressoes):
+        # impressoes: {'keywords': sha1, 'advisors': sha1}
+        self.caminho = caminho
+        self.impressoes = impressoes
+        self.memoria = {}
+        self.pendentes = []
+        self._trava = threading.Lock()
+        self.zerar_contadores()
+        self._abrir()
+
+    # --- PERSISTÊNCIA ---
+    def _conectar(self):
+        conexao = sqlite3.connect(self.caminho, timeout=30)
+        conexao.execute("PRAGMA journal_mode=WAL")
+        return conexao
+
+    def _abrir(self):
+        try:
+            conexao = self._conectar()
+            with conexao:
+                conexao.execute(
+                    "CREATE TABLE IF NOT EXISTS decisoes ("
+                    " termo TEXT, campo TEXT, limiar INTEGER, impressao TEXT,"
+                    " escolhido TEXT, origem TEXT, custo REAL,"
+                    " PRIMARY KEY (termo, campo, limiar, impressao))"
+                )
+                # Invalidação: descarta decisões feitas com outra versão da base
+                for campo, impressao in self.impressoes.items():
+                    conexao.execute("DELETE FROM decisoes WHERE campo = ? AND impressao <> ?", (campo, impressao))
+
+                for termo, campo, limiar, escolhido, custo in conexao.execute(
+                    "SELECT termo, campo, limiar, escolhido, custo FROM decisoes"
+                ):
+                    self.memoria[(termo, campo, limiar)] = (escolhido, custo or 0.0, False)
+            conexao.close()
+        except sqlite3.Error as e:
+            # Sem cache o motor continua funcionando (apenas mais lento)
+            print(f"Cache de decisões indisponível ({self.caminho}): {e}")
+            self.caminho = None
+
+    def gravar(self):
+        """Grava no disco as decisões novas acumuladas."""
+        with self._trava:
+            lote, self.pendentes = self.pendentes, []
+        if not lote or not self.caminho:
+            return
+        try:
+            conexao = self._conectar()
+            with conexao:
+                conexao.executemany("INSERT OR REPLACE INTO decisoes VALUES (?, ?, ?, ?, ?, ?, ?)", lote)
+            conexao.close()
+        except sqlite3.Error as e:
+            print(f"Falha ao gravar cache de decisões: {e}")
+
+    # --- CONSULTA ---
+    def consultar(self, campo, termo, limiar):
+        """
+        Retorna (achou, escolhido). 'escolhido' é None quando a base não tinha o termo.
+        As estatísticas contam termos distintos: cada decisão herdada de uma
+        execução anterior conta um acerto na primeira consulta; repetições
+        dentro da mesma execução não entram na conta.
+        """
+        chave = (termo, campo, limiar)
+        decisao = self.memoria.get(chave)
+        if decisao is None:
+            self.falhas += 1
+            return False, None
+        if not decisao[2]:
+            self._contar_acerto(chave)
+        return True, decisao[0]
+
+    def _contar_acerto(self, chave):
+        escolhido, custo, contado = self.memoria[chave]
+        if contado:
+            return
+        self.acertos += 1
+        self.economia += custo
+        self.memoria[chave] = (escolhido, custo, True)
+        self.herdados_usados.append(chave)
+
+    def registrar(self, campo, termo, limiar, escolhido, custo=0.0):
+        """Guarda uma decisão nova; 'custo' é o tempo (s) gasto para resolvê-la."""
+        origem = "BASE" if escolhido else "GRAMÁTICA"
+        self.memoria[(termo, campo, limiar)] = (escolhido, custo, True)
+        with self._trava:
+            self.pendentes.append((termo, campo, limiar, self.impressoes.get(campo, ""), escolhido, origem, custo))
+            cheio = len(self.pendentes) >= LIMITE_PENDENTES
+        if cheio:
+            self.gravar()
+
+    # --- TROCA ENTRE PROCESSOS ---
+    def extrair_novidades(self):
+        """
+        Usado nos processos de trabalho: entrega (e esquece) as decisões novas
+        e as decisões herdadas que foram usadas, para o processo principal
+        contabilizar e gravar (cada termo distinto conta uma vez no lote todo).
+        """
+        with self._trava:
+            lote, self.pendentes = self.pendentes, []
+        usados, self.herdados_usados = self.herdados_usados, []
+        return lote, usados
+
+    def incorporar(self, novidades):
+        """Recebe no processo principal o que extrair_novidades() entregou."""
+        lote, usados = novidades
+        for chave in usados:
+            if chave in self.memoria:
+                self._contar_acerto(chave)
+
+        novos = []
+        for decisao in lote:
+            termo, campo, limiar, _, escolhido, _, custo = decisao
+            chave = (termo, campo, limiar)
+            if chave in self.memoria:
+                continue  # outro worker já resolveu o mesmo termo
+            self.falhas += 1
+            self.memoria[chave] = (escolhido, custo, True)
+            novos.append(decisao)
+        with self._trava:
+            self.pendentes.extend(novos)
+
+    # --- ESTATÍSTICAS ---
+    def zerar_contadores(self):
+        """Início de uma nova execução: tudo que está em memória passa a ser 'herdado'."""
+        self.memoria = {k: (v[0], v[1], False) for k, v in self.memoria.items()}
+        self.herdados_usados = []
+        self.acertos = 0
+        self.falhas = 0
+        self.economia = 0.0
+
+    def resumo(self):
+        """Texto para o resumo da execução: taxa de acerto e tempo economizado."""
+        total = self.acertos + self.falhas
+        taxa = (self.acertos / total * 100) if total else 0.0
+        return f"Cache de decisões: {taxa:.1f}% de acertos ({self.acertos}/{total}), ~{self.economia:.1f}s economizados."
@@ -0,0 +1,97 @@
+import re
+from functools import lru_cache
+
+# Quantos textos distintos cada motor memoriza (nomes e assuntos se repetem muito)
+TAMANHO_MEMO = 65536
+
+_DOIS_PONTOS = re.compile(r'\s*:\s*')
+
+
+class MotorCaixa:
+    """
+    Motor único de capitalização (Title Case / Sentence Case) preservando siglas.
+
+    - preservar: termos com grafia exata (ex.: 'UnB'), indexados em dict pela
+      forma minúscula (uma consulta por palavra, sem varrer a lista);
+    - padrao_limpeza: o que é removido da palavra antes de comparar
+      (motor_unb usa r'[^\\w\\-]', os scripts antigos r'[^\\w]');
+    - curtas_no_inicio: se True, palavras <= 3 letras ficam minúsculas mesmo
+      na primeira posição (comportamento dos scripts antigos).
+
+    Cada texto completo passa por um LRU: repetições custam uma consulta de dict.
+    """
+
+    def __init__(self, preservar, padrao_limpeza=r'[^\w\-]', curtas_no_inicio=False, tamanho_memo=TAMANHO_MEMO):
+        self.preservar = {}
+        for fixo in preservar:
+            self.preservar.setdefault(fixo.lower(), fixo)
+        self._limpeza = re.compile(padrao_limpeza)
+        self.curtas_no_inicio = curtas_no_inicio
+
+        self.aplicar = lru_cache(maxsize=tamanho_memo)(self._aplicar)
+        self.titulo = lru_cache(maxsize=tamanho_memo)(self._titulo)
+        self.titulo_frase = lru_cache(maxsize=tamanho_memo)(self._titulo_frase)
+
+    # --- REGRAS ---
+    def _aplicar(self, texto):
+        """Capitalização inteligente (Title Case) preservando siglas."""
+        if not texto: return ""
+        resultado = []
+
+        for i, p in enumerate(texto.strip().split()):
+            # Versão limpa para comparação (sem pontuação)
+            p_limpa = self._limpeza.sub('', p)
+            correta = self.preservar.get(p_limpa.lower())
+
+            if correta:
+                # Substitui o texto mas mantém a pontuação original (ex: "(unb)" vira "(UnB)")
+                resultado.append(p.replace(p_limpa, correta))
+            elif len(p_limpa) <= 3 and (i > 0 or self.curtas_no_inicio):
+                # Preposições curtas no meio da frase ficam em minúsculo
+                resultado.append(p.lower())
+            else:
+                resultado.append(p.capitalize())
+
+        return " ".join(resultado)
+
+    def _titulo(self, texto):
+        """Title Case + espaçamento padrão dos dois pontos: "Titulo:Subtitulo" -> "Titulo : Subtitulo"."""
+        if not texto: return ""
+        # Espaça antes de capitalizar: em "Titulo:subtitulo" o subtítulo é palavra própria
+        return self.aplicar(_DOIS_PONTOS.sub(' : ', texto))
+
+    def _titulo_frase(self, texto):
+        """Sentence Case (só a primeira palavra maiúscula, siglas preservadas) + dois pontos."""
+        if not texto: return ""
+        res = []
+        for i, p in enumerate(texto.strip().split()):
+            p_l = self._limpeza.sub('', p)
+            correta = self.preservar.get(p_l.lower())
+            if correta:
+                res.append(p.replace(p_l, correta))
+            else:
+                res.append(p.capitalize() if i == 0 else p.lower())
+        return _DOIS_PONTOS.sub(' : ', " ".join(res))
+
+    # --- ENTRADA VETORIZADA ---
+    def aplicar_lote(self, textos, regra=None):
+        """
+        Aplica uma regra (padrão: aplicar) a uma lista ou coluna (pandas Series).
+        Cada valor distinto é calculado uma única vez; valores que não são
+        texto (None, NaN) voltam inalterados.
+        """
+        regra = regra or self.aplicar
+        tabela = {}
+        for t in set(textos):
+            tabela[t] = regra(t) if isinstance(t, str) else t
+        if hasattr(textos, 'map'):
+            return textos.map(tabela.__getitem__)
+        return [tabela[t] for t in textos]
+
+    def estatisticas(self):
+        """Acertos/erros de memória de cada regra (functools.lru_cache)."""
+        return {
+            'aplicar': self.aplicar.cache_info(),
+            'titulo': self.titulo.cache_info(),
+            'titulo_frase': self.titulo_frase.cache_info()
+        }
@@ -1,9 +1,9 @@
 import os
 import csv
 import sys
-import re
 import xml.etree.ElementTree as ET
-from rapidfuzz import process, fuzz, utils
+from indice_unb import IndiceAutoridade
+from caixa_unb import MotorCaixa
 
 # --- CONFIGURAÇÕES ---
 THRESHOLD_KEYWORD = 90  # Similaridade mínima para aceitar do CSV
@@ -39,46 +39,28 @@ def carregar_base_assuntos():
             pass
     return dados
 
+CAIXA = MotorCaixa(PRESERVAR)
+
 def aplicar_regra_gramatical(texto):
     """
-    Aplica Capitalização:
+    Aplica Capitalização (motor compartilhado caixa_unb, com memória):
     - Palavras <= 3 letras: minúsculas (ex: 'de', 'para')
     - Siglas em PRESERVAR: mantêm a forma (ex: 'UnB')
     - Resto: Capitalize (ex: 'Engenharia')
     """
-    if not texto: return ""
-    palavras = texto.strip().split()
-    resultado = []
-    
-    for i, p in enumerate(palavras):
-        p_limpa = re.sub(r'[^\w\-]', '', p) # Remove pontuação para checar
-        
-        # 1. Verifica lista de preservação (Case Insensitive)
-        correta = next((f for f in PRESERVAR if f.lower() == p_limpa.lower()), None)
-        
-        if correta:
-            # Reconstrói a pontuação ao redor da palavra preservada
-            novo_p = p.replace(p_limpa, correta)
-            resultado.append(novo_p)
-        elif len(p_limpa) <= 3 and i > 0: 
-            # Preposições no meio da frase ficam minúsculas
-            resultado.append(p.lower())
-        else:
-            # Capitaliza normal
-            resultado.append(p.capitalize())
-            
-    return " ".join(resultado)
+    return CAIXA.aplicar(texto)
 
 def executar_auditoria_assuntos(pasta):
     yield "📚 Carregando Base de Assuntos e Iniciando Auditoria..."
     
     base_freq = carregar_base_assuntos()
-    lista_termos_base = list(base_freq.keys())
+    # Índice pré-processado com pré-filtro (comprimento + trigramas): só pontua candidatos plausíveis
+    indice = IndiceAutoridade(base_freq, limiar=THRESHOLD_KEYWORD)
     
     arquivos = [f for f in os.listdir(pasta) if f.lower().endswith('.xml')]
     total = len(arquivos)
     
-    if not lista_termos_base:
+    if not indice:
         yield "⚠️ AVISO: 'base_assuntos_unb.csv' não encontrada ou vazia. Usando apenas correção gramatical."
 
     for i, arq in enumerate(arquivos):
@@ -99,27 +81,11 @@ def executar_auditoria_assuntos(pasta):
                     origem = ""
 
                     # 1. TENTATIVA VIA BASE DE DADOS (Fuzzy)
-                    if lista_termos_base:
-                        # Busca os 3 melhores candidatos
-                        matches = process.extract(
-                            original, 
-                            lista_termos_base, 
-                            limit=3, 
-                            scorer=fuzz.token_sort_ratio, 
-                            processor=utils.default_process
-                        )
-                        
-                        # Filtra pelo Threshold
-                        validos = [m for m in matches if m[1] >= THRESHOLD_KEYWORD]
-                        
-                        if validos:
-                            # CRITÉRIO DE DESEMPATE: Maior Frequência na base
-                            # validos é lista de tuplas (termo, score, index)
-                            # Ordenamos por Frequencia Descendente
-                            escolhido = sorted(validos, key=lambda x: base_freq.get(x[0], 0), reverse=True)[0][0]
-                            
-                            novo_termo = escolhido
-                            origem = "BASE"
+                    # 3 melhores candidatos >= Threshold; desempate pela maior frequência na base
+                    escolhido = indice.resolver(original)
+                    if escolhido:
+                        novo_termo = escolhido
+                        origem = "BASE"
                     
                     # 2. SE NÃO ACHOU NA BASE -> REGRA GRAMATICAL
                     if origem != "BASE":
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Linha de comando do motor_unb (sem interface gráfica).
+
+Uso:
+    python cli_unb.py processar PASTA [PASTA ...] [--workers N] [--dry-run]
+                                 [--relatorio relatorio.csv] [--sem-lote] [--reprocessar] [--retomar]
+    python cli_unb.py vigiar PASTA [--intervalo 5] [--workers N]
+
+'vigiar' fica em execução: bases e índices carregados uma única vez e cada
+item novo que chega na pasta é processado assim que termina de ser copiado
+(varredura periódica, sem APIs específicas de sistema operacional).
+"""
+import os
+import sys
+import csv
+import time
+import argparse
+import threading
+import multiprocessing
+
+import motor_unb as core
+import paralelo_unb as paralelo
+import descoberta_unb as descoberta
+from manifesto_unb import Manifestos
+from lote_unb import executor_pro, registrar_resultado, log_central, registro_log
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+# --- 1. SAÍDA NO TERMINAL (mesmas mensagens que o app recebe na fila) ---
+class SaidaTerminal:
+    """Recebe as mensagens (tipo, dados) do executor e imprime o que interessa no terminal."""
+
+    def __init__(self, detalhes=True):
+        self.detalhes = detalhes
+        self.erro_fatal = None
+        self.final = None
+
+    def put(self, mensagem):
+        tipo, dados = mensagem
+        if tipo == "LOG":
+            if self.detalhes or "↳" not in dados:
+                print(dados, flush=True)
+        elif tipo == "STATUS":
+            print(dados, flush=True)
+        elif tipo == "ERRO_FATAL":
+            self.erro_fatal = dados
+            print(f"ERRO: {dados}", file=sys.stderr, flush=True)
+        elif tipo in ("FINALIZADO", "CANCELADO"):
+            self.final = (tipo, dados)
+
+
+# --- 2. PROCESSAR (uma execução) ---
+def comando_processar(args):
+    bases = core.carregar_bases_globais(args.bases)
+    saida = SaidaTerminal(detalhes=not args.silencioso)
+    linhas = []
+    falhas = 0
+
+    def ao_item(caminho, ok, logs, gravado):
+        nonlocal falhas
+        falhas += not ok
+        if args.relatorio:
+            linhas.append([caminho, "OK" if ok else "ERRO", "SIM" if gravado else "NÃO", " | ".join(logs)])
+
+    parar = threading.Event()
+    try:
+        executor_pro(args.pastas, saida, bases, modo_lote=not args.sem_lote, n_workers=args.workers,
+                     pular_inalterados=not args.reprocessar, retomar=args.retomar, parar=parar,
+                     gravar=not args.dry_run, ao_item=ao_item)
+    except KeyboardInterrupt:
+        # Ctrl+C no meio do lote: o diário fica para '--retomar'
+        parar.set()
+        print("Interrompido. Use --retomar para continuar de onde parou.", file=sys.stderr)
+        return 130
+
+    if args.relatorio:
+        with open(args.relatorio, "w", newline="", encoding="utf-8-sig") as f:
+            escritor = csv.writer(f, delimiter=";")
+            escritor.writerow(["arquivo", "status", "alterado", "mensagens"])
+            escritor.writerows(linhas)
+        print(f"Relatório: {args.relatorio} ({len(linhas)} arquivos)")
+
+    if saida.erro_fatal:
+        return 1
+    # Algum arquivo com erro: código 2 (com ou sem --relatorio)
+    return 2 if falhas else 0
+
+
+# --- 3. VIGIAR (processo contínuo) ---
+def _estado(caminho):
+    try:
+        st = os.stat(caminho)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+def comando_vigiar(args):
+    bases = core.carregar_bases_globais(args.bases)
+    saida = SaidaTerminal(detalhes=not args.silencioso)
+    manifestos = Manifestos([args.pasta], core.VERSAO_REGRAS, bases.get('impressoes', {}))
+    cache = bases.get('cache')
+
+    prontos_antes = {}   # caminho -> (mtime, tamanho) já tratado (processado, com erro ou normalizado)
+    aguardando = {}      # caminho -> (mtime, tamanho) visto na última varredura (ainda copiando?)
+    primeira = True
+    # Um pool para todo o vigia: os workers carregam as bases uma vez, não a cada varredura
+    pool = paralelo.PoolTrabalho(bases, args.workers) if args.workers > 1 else None
+    log_central(f"Vigiando {args.pasta} a cada {args.intervalo}s (Ctrl+C para sair)...", saida)
+
+    try:
+        while True:
+            novos = []
+            for caminho in descoberta.varrer_xml([args.pasta]):
+                estado = _estado(caminho)
+                if estado is None or prontos_antes.get(caminho) == estado:
+                    continue
+                if primeira and manifestos.inalterado(caminho):
+                    # Já normalizado antes de o vigia começar
+                    prontos_antes[caminho] = estado
+                    continue
+                # Só processa depois de uma varredura inteira sem mudanças (cópia terminada)
+                if aguardando.get(caminho) != estado:
+                    aguardando[caminho] = estado
+                    continue
+                novos.append(caminho)
+            primeira = False
+
+            if novos:
+                if pool and len(novos) > 1:
+                    resultados = paralelo.processar_em_paralelo(novos, bases, args.workers, pool=pool)
+                else:
+                    resultados = paralelo.processar_em_serie(novos, bases)
+                for caminho, ok, logs, _ in resultados:
+                    registrar_resultado(caminho, ok, logs, saida)
+                    if ok:
+                        manifestos.registrar(caminho)
+                    aguardando.pop(caminho, None)
+                    prontos_antes[caminho] = _estado(caminho)
+                manifestos.gravar()
+                if cache:
+                    cache.gravar()
+                log_central(f"{len(novos)} itens novos processados.", saida)
+                registro_log().descarregar()
+
+            time.sleep(args.intervalo)
+    except KeyboardInterrupt:
+        manifestos.gravar()
+        if cache:
+            cache.gravar()
+        print("Vigia encerrado.")
+        return 0
+    finally:
+        if pool:
+            pool.encerrar()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Normalização de metadados SAF (motor_unb) pela linha de comando")
+    parser.add_argument("--bases", default=BASE_DIR, help="Pasta com os CSVs de referência")
+    parser.add_argument("--silencioso", action="store_true", help="Não mostra as linhas de detalhe")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p_proc = sub.add_parser("processar", help="Processa uma ou mais pastas SAF e sai")
+    p_proc.add_argument("pastas", nargs="+")
+    p_proc.add_argument("--workers", type=int, default=1, help="Processos em paralelo (padrão: 1)")
+    p_proc.add_argument("--dry-run", action="store_true",
+                        help="Simula: mostra o que mudaria sem gravar XMLs, manifestos, diário nem o cache de decisões")
+    p_proc.add_argument("--relatorio", help="CSV com o resultado de cada arquivo")
+    p_proc.add_argument("--sem-lote", action="store_true", help="Desliga o modo lote (pré-resolução dos termos)")
+    p_proc.add_argument("--reprocessar", action="store_true", help="Não pula itens já normalizados (manifesto)")
+    p_proc.add_argument("--retomar", action="store_true", help="Continua o lote interrompido destas pastas")
+
+    p_vig = sub.add_parser("vigiar", help="Processa continuamente os itens que chegam numa pasta")
+    p_vig.add_argument("pasta")
+    p_vig.add_argument("--intervalo", type=float, default=5.0, help="Segundos entre varreduras")
+    p_vig.add_argument("--workers", type=int, default=1)
+
+    args = parser.parse_args()
+    if args.comando == "processar":
+        sys.exit(comando_processar(args))
+    elif args.comando == "vigiar":
+        if not os.path.isdir(args.pasta):
+            parser.error(f"pasta não encontrada: {args.pasta}")
+        sys.exit(comando_vigiar(args))
+
+
+if __name__ == "__main__":
+    # Necessário para o pool de processos no executável (PyInstaller/Windows)
+    multiprocessing.freeze_support()
+    main()
@@ -0,0 +1,66 @@
+import os
+import queue
+import threading
+
+# Pastas de saída do próprio app (nunca são reprocessadas)
+IGNORAR = "Arquivos_Processados_XML"
+NOME_ALVO = "dublin_core.xml"
+
+_FIM = object()
+
+
+def _varrer_raiz(raiz, saida, interromper):
+    """Percorre uma raiz com os.scandir (profundidade, ordem alfabética) e entrega cada dublin_core.xml."""
+    pilha = [raiz]
+    while pilha and not interromper():
+        atual = pilha.pop()
+        try:
+            entradas = os.scandir(atual)
+        except OSError:
+            continue  # pasta sumiu ou sem permissão: segue com o resto
+        subpastas = []
+        with entradas:
+            for entrada in entradas:
+                try:
+                    if entrada.is_dir(follow_symlinks=False):
+                        if IGNORAR not in entrada.name:
+                            subpastas.append(entrada.path)
+                    elif entrada.name.lower() == NOME_ALVO and entrada.is_file():
+                        saida.put(entrada.path)
+                except OSError:
+                    continue
+        pilha.extend(sorted(subpastas, reverse=True))
+    saida.put(_FIM)
+
+
+def varrer_xml(pastas, parar=None):
+    """
+    Gerador: entrega os 'dublin_core.xml' das pastas à medida que são encontrados.
+    Cada raiz é varrida numa thread própria (as listagens de pastas sincronizadas
+    com a nuvem são lentas e independentes), então o processamento pode começar
+    com o primeiro arquivo. Um mesmo arquivo alcançável por duas raizes sai uma vez.
+    'parar' (threading.Event opcional) interrompe as varreduras.
+    """
+    encerrar = threading.Event()
+    interromper = lambda: encerrar.is_set() or (parar is not None and parar.is_set())
+    raizes = [p for p in dict.fromkeys(pastas) if os.path.isdir(p)]
+    saida = queue.Queue()
+    for raiz in raizes:
+        threading.Thread(target=_varrer_raiz, args=(raiz, saida, interromper), daemon=True).start()
+
+    vistos = set()
+    restantes = len(raizes)
+    try:
+        while restantes:
+            caminho = saida.get()
+            if caminho is _FIM:
+                restantes -= 1
+                continue
+            chave = os.path.normcase(os.path.abspath(caminho))
+            if chave in vistos:
+                continue
+            vistos.add(chave)
+            yield caminho
+    finally:
+        # Consumidor terminou ou desistiu (erro/cancelamento): encerra as threads de varredura
+        encerrar.set()
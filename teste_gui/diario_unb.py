@@ -0,0 +1,146 @@
+import os
+import json
+import time
+import hashlib
+from datetime import datetime
+from manifesto_unb import hash_arquivo
+
+# Pasta (ao lado do app) onde ficam os diários dos lotes em andamento
+PASTA_DIARIOS = "diarios_unb"
+
+# fsync em blocos: a cada ITENS_POR_FSYNC itens ou SEGUNDOS_POR_FSYNC segundos
+ITENS_POR_FSYNC = 50
+SEGUNDOS_POR_FSYNC = 2.0
+
+
+def id_trabalho(pastas):
+    """Identificador estável de um lote: o mesmo conjunto de pastas gera o mesmo id."""
+    chave = "\n".join(sorted(os.path.normcase(os.path.abspath(p)) for p in pastas))
+    return hashlib.sha1(chave.encode("utf-8")).hexdigest()[:16]
+
+
+class Diario:
+    """
+    Diário de um lote (JSONL, só acrescenta linhas): cabeçalho com as pastas,
+    uma linha de intenção por item antes de ele ir para o motor (SHA-1 do XML
+    de entrada, já em disco antes de qualquer gravação) e uma linha por item
+    concluído, com o registro do manifesto (tamanho, SHA-1) do XML gravado.
+    Sobrevive a fechamento/queda do app: 'Retomar' pula os concluídos e os
+    anunciados cujo XML já não é o de entrada (regravados antes da queda).
+    O arquivo é apagado quando o lote termina sem interrupção.
+    """
+
+    def __init__(self, pasta_diarios, pastas):
+        self.pastas = list(pastas)
+        self.caminho = os.path.join(pasta_diarios, f"{id_trabalho(pastas)}.jsonl")
+        self.arquivo = None
+        self._sem_fsync = 0
+        self._ultimo_fsync = time.monotonic()
+
+    def existe(self):
+        return os.path.exists(self.caminho)
+
+    def _linhas(self):
+        """Linhas do diário em disco (linhas truncadas numa queda são ignoradas)."""
+        try:
+            with open(self.caminho, encoding="utf-8") as f:
+                for linha in f:
+                    try:
+                        yield json.loads(linha)
+                    except ValueError:
+                        continue
+        except OSError:
+            return
+
+    def concluidos(self):
+        """caminho -> registro do manifesto dos itens já concluídos."""
+        return {dado['caminho']: dado.get('registro') for dado in self._linhas() if 'caminho' in dado}
+
+    def pendentes(self):
+        """caminho -> SHA-1 de entrada dos itens anunciados ao motor e sem conclusão registrada."""
+        itens = {}
+        for dado in self._linhas():
+            if 'anunciado' in dado:
+                itens[dado['anunciado']] = dado.get('entrada')
+            elif 'caminho' in dado:
+                itens.pop(dado['caminho'], None)
+        return itens
+
+    @staticmethod
+    def regravado(caminho_xml, entrada):
+        """True se o XML já não é o anunciado (o motor o gravou antes da queda)."""
+        if not entrada:
+            return False
+        try:
+            return hash_arquivo(caminho_xml) != entrada
+        except OSError:
+            return False
+
+    def iniciar(self, retomar=False):
+        """Abre o diário: retomar=True continua o existente; senão começa um novo."""
+        os.makedirs(os.path.dirname(self.caminho), exist_ok=True)
+        novo = not (retomar and self.existe())
+        self.arquivo = open(self.caminho, "w" if novo else "a", encoding="utf-8")
+        if novo:
+            self._escrever({'pastas': self.pastas, 'inicio': datetime.now().isoformat(timespec='seconds')})
+            self.sincronizar()
+
+    def anunciar(self, caminhos):
+        """
+        Gerador: repassa os caminhos ao motor em blocos, e só depois de gravar
+        (com fsync) a intenção de cada item do bloco: caminho + SHA-1 do XML de
+        entrada. Assim nenhum arquivo é regravado sem rastro no diário.
+        """
+        bloco = []
+        inicio = time.monotonic()
+        for caminho in caminhos:
+            bloco.append(caminho)
+            if len(bloco) >= ITENS_POR_FSYNC or time.monotonic() - inicio >= SEGUNDOS_POR_FSYNC:
+                yield from self._anunciar_bloco(bloco)
+                bloco = []
+                inicio = time.monotonic()
+        yield from self._anunciar_bloco(bloco)
+
+    def _anunciar_bloco(self, bloco):
+        for caminho in bloco:
+            try:
+                entrada = hash_arquivo(caminho)
+            except OSError:
+                entrada = None  # o erro aparece (e é logado) no processamento do arquivo
+            self._escrever({'anunciado': caminho, 'entrada': entrada})
+        if bloco:
+            self.sincronizar()
+        return bloco
+
+    def registrar(self, caminho_xml, registro=None):
+        """Marca um item como concluído (durável no próximo fsync em bloco)."""
+        self._escrever({'caminho': caminho_xml, 'registro': registro})
+        self._sem_fsync += 1
+        if self._sem_fsync >= ITENS_POR_FSYNC or time.monotonic() - self._ultimo_fsync >= SEGUNDOS_POR_FSYNC:
+            self.sincronizar()
+
+    def sincronizar(self):
+        if self.arquivo is None:
+            return
+        self.arquivo.flush()
+        os.fsync(self.arquivo.fileno())
+        self._sem_fsync = 0
+        self._ultimo_fsync = time.monotonic()
+
+    def interromper(self):
+        """Lote parou antes do fim: grava o que falta e mantém o diário para retomar."""
+        if self.arquivo is not None:
+            self.sincronizar()
+            self.arquivo.close()
+            self.arquivo = None
+
+    def concluir(self):
+        """Lote terminou: o diário não é mais necessário."""
+        self.interromper()
+        try:
+            os.remove(self.caminho)
+        except OSError:
+            pass
+
+    def _escrever(self, dado):
+        self.arquivo.write(json.dumps(dado, ensure_ascii=False) + "\n")
@@ -0,0 +1,207 @@
+import numpy as np
+from rapidfuzz import process, fuzz, utils
+
+# Linhas por bloco do cdist em lote (bloco x base em float32 ~ 47 MB com 46k termos)
+LINHAS_POR_BLOCO = 256
+
+# Tamanho dos n-gramas de caracteres do pré-filtro
+Q_GRAMA = 3
+
+# Acima desta fração da base o pré-filtro não compensa: varre tudo
+FRACAO_MAXIMA_CANDIDATOS = 0.5
+
+
+# --- 1. NORMALIZAÇÃO DAS CHAVES ---
+def chave_exata(texto):
+    """
+    Chave de comparação: texto processado (minúsculas, sem pontuação) com os
+    tokens ordenados. Dois termos com a mesma chave têm token_sort_ratio = 100.
+    """
+    return " ".join(sorted(utils.default_process(texto).split()))
+
+
+def _gramas_com_ocorrencia(texto):
+    """
+    Trigramas do texto com o número da ocorrência: ('abc', 0), ('abc', 1)...
+    Contar chaves iguais entre dois textos dá a interseção de multiconjuntos.
+    """
+    vistos = {}
+    gramas = []
+    for i in range(len(texto) - Q_GRAMA + 1):
+        g = texto[i:i + Q_GRAMA]
+        n = vistos.get(g, 0)
+        vistos[g] = n + 1
+        gramas.append((g, n))
+    return gramas
+
+
+# --- 2. ÍNDICE DE AUTORIDADE ---
+class IndiceAutoridade:
+    """
+    Base de autoridade (termo -> frequência) pré-processada uma única vez.
+
+    - chaves: escolhas já normalizadas, prontas para o scorer (sem processor);
+    - frequencias: desempate alinhado à posição da escolha (sem busca por nome);
+    - resolvidos: hash chave normalizada -> termo escolhido, para acerto O(1)
+      de qualquer grafia que já tenha sido resolvida;
+    - pré-filtro (blocking): comprimentos das chaves + índice invertido de
+      trigramas, para só pontuar candidatos que podem atingir o limiar.
+
+    O resultado é o mesmo do process.extract(token_sort_ratio) original:
+    3 melhores com score >= limiar, vence o mais frequente na base.
+    """
+
+    def __init__(self, dados, limiar=90):
+        self.limiar = limiar
+        self.termos = list(dados.keys())
+        self.frequencias = [dados[t] for t in self.termos]
+        self.chaves = [chave_exata(t) for t in self.termos]
+        self.resolvidos = {}
+        self._exatos = frozenset(self.termos)
+        self._montar_prefiltro()
+
+    # --- SNAPSHOT (pickle) ---
+    def __getstate__(self):
+        # As resoluções são da sessão (o cache persistente guarda as decisões)
+        estado = self.__dict__.copy()
+        estado['resolvidos'] = {}
+        estado.pop('_exatos', None)  # refeito na carga a partir de 'termos'
+        return estado
+
+    def __setstate__(self, estado):
+        self.__dict__.update(estado)
+        self._exatos = frozenset(self.termos)
+
+    # --- PRÉ-FILTRO (BLOCKING) ---
+    def _montar_prefiltro(self):
+        """Faixas de comprimento + índice invertido de trigramas (com ocorrência)."""
+        self.comprimentos = np.array([len(c) for c in self.chaves], dtype=np.int32)
+
+        postagens = {}
+        for i, chave in enumerate(self.chaves):
+            for grama in _gramas_com_ocorrencia(chave):
+                postagens.setdefault(grama, []).append(i)
+        self.trigramas = {g: np.array(lista, dtype=np.int32) for g, lista in postagens.items()}
+
+    def candidatos(self, chave):
+        """
+        Posições (crescentes) das chaves da base que PODEM ter ratio >= limiar.
+        Garantia (nenhum match >= limiar é perdido):
+        - comprimento: ratio = 2*LCS/(la+lb) <= 2*min(la,lb)/(la+lb);
+        - trigramas: com distância de edição k <= (1 - r)*(la+lb), os textos
+          compartilham ao menos max(la,lb) - 2 - 3k trigramas (lema dos q-gramas).
+        Retorna None quando o filtro não reduz o suficiente (varrer tudo).
+        """
+        r = self.limiar / 100.0
+        la = len(chave)
+        if r <= 0:
+            return None
+
+        # 1) Faixa de comprimento possível
+        lb = self.comprimentos
+        no_intervalo = (lb >= la * r / (2 - r) - 1e-6) & (lb <= la * (2 - r) / r + 1e-6)
+
+        # 2) Trigramas em comum (interseção de multiconjuntos)
+        listas = [self.trigramas[g] for g in _gramas_com_ocorrencia(chave) if g in self.trigramas]
+        if listas:
+            comuns = np.bincount(np.concatenate(listas), minlength=len(self.chaves))
+        else:
+            comuns = np.zeros(len(self.chaves), dtype=np.int64)
+
+        max_edicoes = np.floor((1 - r) * (la + lb) + 1e-6)
+        minimo_comum = np.maximum(la, lb) - (Q_GRAMA - 1) - Q_GRAMA * max_edicoes
+
+        posicoes = np.flatnonzero(no_intervalo & (comuns >= minimo_comum))
+        if posicoes.size > FRACAO_MAXIMA_CANDIDATOS * len(self.chaves):
+            return None
+        return posicoes
+
+    def __len__(self):
+        return len(self.termos)
+
+    def __bool__(self):
+        return bool(self.termos)
+
+    def contem(self, termo):
+        """Se 'termo' é, letra por letra, um termo da base."""
+        return termo in self._exatos
+
+    def resolver(self, termo):
+        """Retorna o termo da base equivalente a 'termo' ou None."""
+        if not self.termos:
+            return None
+
+        chave = chave_exata(termo)
+        if not chave:
+            return None
+
+        # Acerto exato: mesma chave já resolvida antes (O(1))
+        if chave in self.resolvidos:
+            return self.resolvidos[chave]
+
+        escolhido = self._melhor_fuzzy(chave)
+        self.resolvidos[chave] = escolhido
+        return escolhido
+
+    def resolver_lote(self, termos):
+        """
+        Resolve de uma vez todos os termos ainda não vistos: uma varredura
+        cdist multi-core (workers=-1) das chaves únicas contra a base.
+        Os resultados ficam em 'resolvidos', consultados depois por resolver().
+        Retorna quantas chaves novas foram resolvidas.
+        """
+        if not self.termos:
+            return 0
+
+        pendentes = []
+        vistos = set()
+        for termo in termos:
+            chave = chave_exata(termo)
+            if chave and chave not in self.resolvidos and chave not in vistos:
+                vistos.add(chave)
+                pendentes.append(chave)
+
+        for inicio in range(0, len(pendentes), LINHAS_POR_BLOCO):
+            bloco = pendentes[inicio:inicio + LINHAS_POR_BLOCO]
+            matriz = process.cdist(
+                bloco, self.chaves, scorer=fuzz.ratio, processor=None,
+                score_cutoff=self.limiar, dtype=np.float32, workers=-1
+            )
+            for chave, linha in zip(bloco, matriz):
+                self.resolvidos[chave] = self._melhor_da_linha(linha)
+
+        return len(pendentes)
+
+    def _melhor_da_linha(self, linha):
+        """Mesma regra do extract(limit=3): score desc, posição asc; depois frequência."""
+        posicoes = np.flatnonzero(linha >= self.limiar)
+        if posicoes.size == 0:
+            return None
+
+        ordem = np.lexsort((posicoes, -linha[posicoes]))[:3]
+        top3 = posicoes[ordem]
+        melhor = max(top3, key=lambda i: self.frequencias[i])
+        return self.termos[melhor]
+
+    def _melhor_fuzzy(self, chave):
+        posicoes = self.candidatos(chave)
+        if posicoes is None:
+            escolhas = self.chaves
+        elif posicoes.size == 0:
+            return None
+        else:
+            # Mantém a ordem original: empates de score seguem a posição na base
+            escolhas = [self.chaves[i] for i in posicoes]
+
+        matches = process.extract(
+            chave, escolhas, limit=3,
+            scorer=fuzz.ratio, processor=None, score_cutoff=self.limiar
+        )
+        if not matches:
+            return None
+
+        topo = [m[2] if posicoes is None else posicoes[m[2]] for m in matches]
+
+        # Desempate por frequência (quem aparece mais na base ganha)
+        melhor = max(topo, key=lambda i: self.frequencias[i])
+        return self.termos[melhor]
@@ -0,0 +1,138 @@
+import os
+import json
+import time
+import queue
+import atexit
+import threading
+from datetime import datetime
+
+# Descarrega no disco a cada INTERVALO_FLUSH segundos ou LINHAS_POR_FLUSH linhas (o que vier antes)
+INTERVALO_FLUSH = 0.5
+LINHAS_POR_FLUSH = 500
+
+# Rotação: ao passar de TAMANHO_MAXIMO, o arquivo vira .1 (o .1 vira .2, ...)
+TAMANHO_MAXIMO = 10 * 1024 * 1024
+COPIAS_ROTACAO = 3
+
+_FIM = object()
+
+
+class ArquivoRotativo:
+    """Um arquivo de log aberto uma única vez, com rotação por tamanho."""
+
+    def __init__(self, caminho, tamanho_max=TAMANHO_MAXIMO, copias=COPIAS_ROTACAO):
+        self.caminho = caminho
+        self.tamanho_max = tamanho_max
+        self.copias = copias
+        self.arquivo = None
+
+    def escrever(self, texto):
+        if self.arquivo is None:
+            self.arquivo = open(self.caminho, "a", encoding="utf-8")
+        self.arquivo.write(texto)
+        self.arquivo.flush()
+        if self.tamanho_max and self.arquivo.tell() >= self.tamanho_max:
+            self.rotacionar()
+
+    def rotacionar(self):
+        self.fechar()
+        for i in range(self.copias - 1, 0, -1):
+            anterior = f"{self.caminho}.{i}"
+            if os.path.exists(anterior):
+                os.replace(anterior, f"{self.caminho}.{i + 1}")
+        if self.copias:
+            os.replace(self.caminho, f"{self.caminho}.1")
+        else:
+            os.remove(self.caminho)
+        self.arquivo = open(self.caminho, "a", encoding="utf-8")
+
+    def fechar(self):
+        if self.arquivo is not None:
+            self.arquivo.close()
+            self.arquivo = None
+
+
+class RegistroLog:
+    """
+    Log em segundo plano: quem registra só coloca o registro numa fila (nunca
+    espera o disco); uma thread dedicada mantém os arquivos abertos e grava
+    em blocos. Além do texto, pode gravar uma versão estruturada em JSONL
+    (uma linha JSON por mensagem: hora, tipo, mensagem).
+    """
+
+    def __init__(self, caminho, caminho_jsonl=None, intervalo=INTERVALO_FLUSH, limite=LINHAS_POR_FLUSH,
+                 tamanho_max=TAMANHO_MAXIMO, copias=COPIAS_ROTACAO):
+        self.intervalo = intervalo
+        self.limite = limite
+        self.texto = ArquivoRotativo(caminho, tamanho_max, copias)
+        self.jsonl = ArquivoRotativo(caminho_jsonl, tamanho_max, copias) if caminho_jsonl else None
+        self.fila = queue.SimpleQueue()
+        self._falhou = False
+        self._thread = threading.Thread(target=self._executar, name="log_unb", daemon=True)
+        self._thread.start()
+        atexit.register(self.fechar)
+
+    # --- LADO DE QUEM REGISTRA ---
+    def registrar(self, linha, tipo="INFO", mensagem=None, hora=None):
+        """'linha' vai para o log de texto; (hora, tipo, mensagem) para o JSONL."""
+        self.fila.put((hora or datetime.now(), tipo, linha if mensagem is None else mensagem, linha))
+
+    def descarregar(self, timeout=5):
+        """Espera tudo o que já foi registrado chegar ao disco (ex.: no fim de um lote)."""
+        if not self._thread.is_alive():
+            return
+        pronto = threading.Event()
+        self.fila.put(pronto)
+        pronto.wait(timeout)
+
+    def fechar(self):
+        if self._thread.is_alive():
+            self.fila.put(_FIM)
+            self._thread.join(timeout=5)
+
+    # --- THREAD DE ESCRITA ---
+    def _executar(self):
+        pendentes = []
+        prazo = None
+        while True:
+            espera = None if not pendentes else max(0.0, prazo - time.monotonic())
+            try:
+                item = self.fila.get(timeout=espera)
+            except queue.Empty:
+                item = None
+
+            if item is _FIM:
+                self._gravar(pendentes)
+                self.texto.fechar()
+                if self.jsonl: self.jsonl.fechar()
+                return
+            if isinstance(item, threading.Event):
+                self._gravar(pendentes)
+                pendentes, prazo = [], None
+                item.set()
+                continue
+            if item is not None:
+                pendentes.append(item)
+                if prazo is None:
+                    prazo = time.monotonic() + self.intervalo
+
+            if pendentes and (len(pendentes) >= self.limite or time.monotonic() >= prazo):
+                self._gravar(pendentes)
+                pendentes, prazo = [], None
+
+    def _gravar(self, registros):
+        if not registros:
+            return
+        try:
+            self.texto.escrever("".join(linha + "\n" for _, _, _, linha in registros))
+            if self.jsonl:
+                self.jsonl.escrever("".join(
+                    json.dumps({'hora': hora.isoformat(timespec='seconds'), 'tipo': tipo, 'mensagem': mensagem},
+                               ensure_ascii=False) + "\n"
+                    for hora, tipo, mensagem, _ in registros
+                ))
+        except OSError as e:
+            # Log não pode derrubar o processamento: avisa uma vez e segue
+            if not self._falhou:
+                print(f"Falha ao gravar log ({self.texto.caminho}): {e}")
+                self._falhou = True
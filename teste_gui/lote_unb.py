@@ -0,0 +1,229 @@
+"""
+Execução de um lote de pastas SAF (sem interface): descoberta, modo lote,
+motor serial/paralelo, manifestos, diário e log. Usado pelo app (app_final)
+e pela linha de comando (cli_unb); o andamento sai como mensagens
+(tipo, dados) numa fila — qualquer objeto com put().
+"""
+import os
+import sys
+import time
+import threading
+from datetime import datetime
+import motor_unb as core
+from motor_unb import pasta_dados
+import paralelo_unb as paralelo
+import descoberta_unb as descoberta
+from manifesto_unb import Manifestos
+from log_unb import RegistroLog
+from diario_unb import Diario, PASTA_DIARIOS
+from perfil_unb import PerfilLote
+
+# --- FUNÇÕES UTILITÁRIAS ---
+
+# Ícones para facilitar leitura
+MAPA_ICONES = {
+    "ERRO": "🔴", 
+    "SUCESSO": "✅", 
+    "DETALHE": "   ↳", # Indentação para detalhes dos scripts
+    "INFO": "ℹ️"
+}
+
+_REGISTRO_LOG = None
+
+def registro_log():
+    """Log em arquivo (texto + JSONL), aberto uma vez e gravado por uma thread própria."""
+    global _REGISTRO_LOG
+    if _REGISTRO_LOG is None:
+        base_path = getattr(sys, '_MEIPASS', os.path.dirname(os.path.abspath(__file__)))
+        _REGISTRO_LOG = RegistroLog(os.path.join(base_path, "LOG_PRO_UNB.txt"),
+                                    os.path.join(base_path, "LOG_PRO_UNB.jsonl"))
+    return _REGISTRO_LOG
+
+def log_central(mensagem, q=None, tipo="INFO"):
+    """Gera log em arquivo e envia para a fila da interface gráfica."""
+    agora = datetime.now()
+    icone = MAPA_ICONES.get(tipo, "ℹ️")
+    texto_log = f"[{agora.strftime('%H:%M:%S')}] {icone} {mensagem}"
+    
+    # Só enfileira: a gravação no disco acontece em segundo plano
+    registro_log().registrar(texto_log, tipo, mensagem, agora)
+
+    if q:
+        q.put(("LOG", texto_log))
+
+def registrar_resultado(caminho_xml, ok, logs_detalhados, q):
+    """Transforma o resultado de um arquivo em linhas de log."""
+    nome_pasta_pai = os.path.basename(os.path.dirname(caminho_xml))
+    
+    if ok:
+        log_central(f"{nome_pasta_pai}: Processado.", q, "SUCESSO")
+        # Itera sobre as mensagens dos scripts (Assuntos/Orientadores)
+        if logs_detalhados:
+            for detalhe in logs_detalhados:
+                log_central(detalhe, q, "DETALHE")
+        else:
+            log_central("Nenhuma alteração de termos necessária.", q, "DETALHE")
+    else:
+        # Se falhou, logs_detalhados é uma lista com o erro
+        log_central(f"{nome_pasta_pai}: {logs_detalhados[0]}", q, "ERRO")
+
+def acompanhar_descoberta(caminhos, q, intervalo=0.25):
+    """Repassa os caminhos descobertos e atualiza o total da barra de progresso aos poucos."""
+    total = 0
+    ultimo_aviso = 0.0
+    for caminho in caminhos:
+        total += 1
+        agora = time.time()
+        if agora - ultimo_aviso >= intervalo:
+            q.put(("TOTAL_BARRA", total))
+            ultimo_aviso = agora
+        yield caminho
+    q.put(("TOTAL_BARRA", total))
+
+def registrar_perfil(perfil, q):
+    """Resumo por fase no log e relatório completo (com cProfile, se ativo) na pasta de dados."""
+    if perfil.itens:
+        for linha in perfil.linhas_texto():
+            log_central(linha, q)
+        try:
+            log_central(f"Relatório de perfil: {perfil.gravar_relatorio(pasta_dados())}", q)
+        except OSError as e:
+            log_central(f"Relatório de perfil não gravado: {e}", q, "ERRO")
+    perfil.descartar()
+
+def executor_pro(pastas, q, bases, modo_lote=True, n_workers=1, pular_inalterados=True, retomar=False, parar=None,
+                 gravar=True, ao_item=None, perfil_cprofile=False):
+    """
+    Função worker que roda em segundo plano.
+    retomar=True continua o lote interrompido destas pastas (pula o que o diário
+    já registra); 'parar' (threading.Event) cancela entre um item e outro.
+    gravar=False simula (nada é escrito: nem XMLs, nem manifestos, nem diário, nem o cache de decisões).
+    ao_item(caminho, sucesso, logs, gravado) é chamado a cada arquivo (ex.: relatório).
+    O tempo de cada fase por item é sempre medido; o resumo (percentis) vai para
+    o log e para o relatório de perfil. perfil_cprofile=True inclui um cProfile.
+    """
+    parar = parar or threading.Event()
+    perfil = PerfilLote(cprofile=perfil_cprofile)
+    q.put(("STATUS", "🔍 Procurando arquivos 'dublin_core.xml'..."))
+    q.put(("CONFIG_BARRA", 0))
+
+    # Manifestos: itens cujo XML ainda é exatamente o que gravamos (mesmas regras e bases) são pulados
+    manifestos = Manifestos(pastas, core.VERSAO_REGRAS, bases.get('impressoes', {}))
+
+    # Diário do lote: cada item concluído fica registrado em disco (sobrevive a queda/fechamento)
+    diario = Diario(os.path.join(pasta_dados(), PASTA_DIARIOS), pastas)
+    concluidos = diario.concluidos() if retomar else {}
+    pendentes = diario.pendentes() if retomar else {}
+    if retomar:
+        if concluidos or pendentes:
+            log_central(f"Retomando lote interrompido: {len(concluidos)} arquivos já concluídos serão pulados "
+                        f"({len(pendentes)} em andamento na queda: pulados os que já foram regravados).", q)
+        else:
+            log_central("Nenhum lote interrompido para estas pastas: iniciando do começo.", q)
+    for caminho, registro in concluidos.items():
+        manifestos.incorporar(caminho, registro)
+    if gravar:
+        diario.iniciar(retomar=retomar)
+
+    # Descoberta em fluxo: os arquivos entram na fila de trabalho assim que são encontrados
+    contagem = {'encontrados': 0, 'pulados': 0, 'retomados': 0}
+    def filtrar(caminhos):
+        for caminho in caminhos:
+            contagem['encontrados'] += 1
+            if caminho in concluidos:
+                contagem['retomados'] += 1
+            elif caminho in pendentes and Diario.regravado(caminho, pendentes[caminho]):
+                # Gravado antes da queda, sem a conclusão no diário: não passa pelo motor de novo
+                contagem['retomados'] += 1
+                registro = manifestos.registrar(caminho)
+                if gravar:
+                    diario.registrar(caminho, registro)
+            elif pular_inalterados and manifestos.inalterado(caminho):
+                contagem['pulados'] += 1
+            else:
+                yield caminho
+
+    caminhos = acompanhar_descoberta(filtrar(descoberta.varrer_xml(pastas, parar)), q)
+
+    cache = bases.get('cache')
+    if cache: cache.zerar_contadores()
+
+    modo = "SOBRESCREVENDO" if gravar else "SIMULAÇÃO, nada será gravado"
+
+    if modo_lote:
+        # PASSO 1: coleta (junto com a varredura) + resolução paralela de todos os termos únicos do lote
+        q.put(("STATUS", "🧮 Modo lote: coletando e resolvendo assuntos e orientadores únicos..."))
+        inicio = time.time()
+        lista = []
+        def guardar(fluxo):
+            for c in fluxo:
+                lista.append(c)
+                yield c
+        n_assuntos, n_orientadores, _ = core.preparar_lote(guardar(caminhos), bases)
+        caminhos = lista
+        perfil.fase_lote("Varredura + modo lote", time.time() - inicio)
+        log_central(f"Modo lote: {n_assuntos} assuntos e {n_orientadores} orientadores únicos resolvidos em {time.time() - inicio:.1f}s.", q)
+        log_central(f"Iniciando processamento ({modo}) de {len(lista)} arquivos...", q)
+    else:
+        log_central(f"Iniciando processamento ({modo}) à medida que os arquivos são encontrados...", q)
+    
+    processados = 0
+    gravados = 0
+    
+    # PASSO 2: reescrita dos XMLs (termos já resolvidos no modo lote)
+    if gravar:
+        # Intenção de cada item durável no diário antes de o motor poder regravá-lo
+        caminhos = diario.anunciar(caminhos)
+    if n_workers > 1:
+        log_central(f"Motor paralelo: {n_workers} processos.", q)
+        resultados = paralelo.processar_em_paralelo(caminhos, bases, n_workers, parar, gravar, perfil)
+    else:
+        resultados = paralelo.processar_em_serie(caminhos, bases, parar, gravar, perfil)
+    
+    completo = False
+    try:
+        for caminho_xml, ok, logs_detalhados, gravado in resultados:
+            registrar_resultado(caminho_xml, ok, logs_detalhados, q)
+            if ao_item:
+                ao_item(caminho_xml, ok, logs_detalhados, gravado)
+            if ok:
+                if gravar:
+                    diario.registrar(caminho_xml, manifestos.registrar(caminho_xml))
+                gravados += gravado
+            processados += 1
+            q.put(("PROGRESSO", processados))
+        completo = not parar.is_set()
+    finally:
+        if gravar:
+            manifestos.gravar()
+            # Interrompido (cancelamento ou erro): o diário fica para o 'Retomar'
+            if completo:
+                diario.concluir()
+            else:
+                diario.interromper()
+    
+    if contagem['encontrados'] == 0 and not parar.is_set():
+        perfil.descartar()
+        q.put(("ERRO_FATAL", "Nenhum arquivo 'dublin_core.xml' encontrado nas pastas!"))
+        return
+
+    perfil.encerrar()
+    registrar_perfil(perfil, q)
+
+    if contagem['pulados']:
+        log_central(f"{contagem['pulados']} arquivos inalterados desde a última execução foram pulados.", q)
+    if gravar:
+        log_central(f"Arquivos regravados: {gravados} | já normalizados (não regravados): {processados - gravados}.", q)
+    else:
+        log_central(f"Simulação: {gravados} arquivos seriam regravados | {processados - gravados} já normalizados. Nada foi gravado.", q)
+    
+    if cache:
+        if gravar:
+            cache.gravar()
+        log_central(cache.resumo(), q)
+    
+    if parar.is_set():
+        log_central(f"Lote cancelado após {processados} arquivos. Use 'Retomar' para continuar de onde parou.", q)
+    # O arquivo de log fica completo antes do aviso de fim
+    registro_log().descarregar()
+    q.put(("CANCELADO" if parar.is_set() else "FINALIZADO", processados))
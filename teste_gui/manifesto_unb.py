@@ -0,0 +1,121 @@
+import os
+import json
+import hashlib
+
+# Nome do manifesto gravado na raiz de cada pasta processada
+NOME_MANIFESTO = ".manifesto_unb.json"
+
+
+def hash_arquivo(caminho):
+    """SHA-1 do conteúdo de um arquivo."""
+    h = hashlib.sha1()
+    with open(caminho, 'rb') as f:
+        for bloco in iter(lambda: f.read(1 << 20), b''):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+class Manifesto:
+    """
+    Manifesto de uma pasta raiz: caminho relativo do item -> (tamanho, SHA-1)
+    do XML que o motor gravou, junto com a versão das regras e as impressões
+    das bases usadas. Se as regras ou as bases mudarem, o manifesto inteiro
+    deixa de valer e todos os itens voltam a ser processados.
+    """
+
+    def __init__(self, raiz, versao_regras, impressoes):
+        self.raiz = raiz
+        self.caminho = os.path.join(raiz, NOME_MANIFESTO)
+        self.versao_regras = versao_regras
+        self.impressoes = dict(impressoes)
+        self.itens = {}
+        self.alterado = False
+        self._abrir()
+
+    def _abrir(self):
+        try:
+            with open(self.caminho, encoding="utf-8") as f:
+                dados = json.load(f)
+        except (OSError, ValueError):
+            return
+        if dados.get('versao_regras') != self.versao_regras or dados.get('impressoes') != self.impressoes:
+            # Regras ou bases mudaram: nada do que foi gravado antes está garantido
+            self.alterado = True
+            return
+        self.itens = dados.get('itens', {})
+
+    def _chave(self, caminho_xml):
+        return os.path.relpath(caminho_xml, self.raiz).replace(os.sep, '/')
+
+    def inalterado(self, caminho_xml):
+        """True se o XML ainda é exatamente o que o motor gravou (stat + hash)."""
+        registro = self.itens.get(self._chave(caminho_xml))
+        if not registro:
+            return False
+        try:
+            # O tamanho descarta a maioria das alterações sem ler o arquivo
+            if os.path.getsize(caminho_xml) != registro[0]:
+                return False
+            return hash_arquivo(caminho_xml) == registro[1]
+        except OSError:
+            return False
+
+    def registrar(self, caminho_xml):
+        """Guarda (e retorna) o estado [tamanho, sha1] do XML recém-gravado pelo motor."""
+        try:
+            registro = [os.path.getsize(caminho_xml), hash_arquivo(caminho_xml)]
+        except OSError:
+            return None
+        self.incorporar(caminho_xml, registro)
+        return registro
+
+    def incorporar(self, caminho_xml, registro):
+        """Guarda um registro já calculado (ex.: vindo do diário de um lote interrompido)."""
+        self.itens[self._chave(caminho_xml)] = list(registro)
+        self.alterado = True
+
+    def gravar(self):
+        """Grava o manifesto (arquivo temporário + os.replace: nunca fica pela metade)."""
+        if not self.alterado:
+            return
+        dados = {'versao_regras': self.versao_regras, 'impressoes': self.impressoes, 'itens': self.itens}
+        temporario = self.caminho + ".tmp"
+        try:
+            with open(temporario, "w", encoding="utf-8") as f:
+                json.dump(dados, f, ensure_ascii=False)
+            os.replace(temporario, self.caminho)
+            self.alterado = False
+        except OSError as e:
+            print(f"Falha ao gravar manifesto ({self.caminho}): {e}")
+
+
+class Manifestos:
+    """Conjunto de manifestos das pastas da fila; cada XML usa o da sua raiz."""
+
+    def __init__(self, pastas, versao_regras, impressoes):
+        self.por_raiz = [(os.path.join(os.path.abspath(p), ''), Manifesto(p, versao_regras, impressoes))
+                         for p in pastas if os.path.isdir(p)]
+
+    def para(self, caminho_xml):
+        caminho = os.path.abspath(caminho_xml)
+        for prefixo, manifesto in self.por_raiz:
+            if caminho.startswith(prefixo):
+                return manifesto
+        return None
+
+    def inalterado(self, caminho_xml):
+        manifesto = self.para(caminho_xml)
+        return bool(manifesto) and manifesto.inalterado(caminho_xml)
+
+    def registrar(self, caminho_xml):
+        manifesto = self.para(caminho_xml)
+        return manifesto.registrar(caminho_xml) if manifesto else None
+
+    def incorporar(self, caminho_xml, registro):
+        manifesto = self.para(caminho_xml)
+        if manifesto and registro:
+            manifesto.incorporar(caminho_xml, registro)
+
+    def gravar(self):
+        for _, manifesto in self.por_raiz:
+            manifesto.gravar()
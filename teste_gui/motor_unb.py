@@ -1,14 +1,24 @@
+import io
 import os
 import re
+import sys
 import csv
+import time
 import xml.etree.ElementTree as ET
 from datetime import datetime
-from rapidfuzz import process, fuzz, utils
+from indice_unb import IndiceAutoridade, chave_exata
+from cache_unb import CacheDecisoes, NOME_CACHE
+from caixa_unb import MotorCaixa
+from snapshot_unb import carregar_snapshot, montar_snapshot, gravar_snapshot
 
 # --- 1. CONFIGURAÇÕES E CONSTANTES ---
 THRESHOLD_ADVISOR = 90
 THRESHOLD_KEYWORD = 90
 
+# Versão das regras de normalização: mude sempre que uma regra/constante mudar,
+# para que os manifestos (ver manifesto_unb) deixem de pular itens já gravados
+VERSAO_REGRAS = "2.4.2"
+
 # Termos que devem manter a grafia exata (Case Sensitive)
 PRESERVAR = [
     'UnB', 'IBICT', 'Brasília', 'Distrito Federal', 'Brasil', 'PMDF', 'DF', 
@@ -24,12 +34,58 @@ TEXTO_LICENCA = (
     "a título de divulgação da produção científica brasileira, a partir desta data."
 )
 
+# Início do description.provenance que o motor grava em cada item: só ele escreve este texto,
+# e é por ele (não pelo conteúdo dos campos) que uma nova passagem sabe que o item já foi normalizado
+MARCA_MOTOR = "Metadados normalizados pelo motor_unb"
+
+# CSVs de referência, na ordem de preferência (o segundo de cada par é o nome antigo)
+ARQUIVOS_BASES = ["base_orientadores_unb.csv", "advisor-ppg.csv", "base_assuntos_unb.csv", "keywords.csv"]
+
+def pasta_dados():
+    """Pasta persistente do app (no executável, ao lado do .exe: a pasta _MEIPASS é temporária)."""
+    if getattr(sys, 'frozen', False):
+        return os.path.dirname(sys.executable)
+    return os.path.dirname(os.path.abspath(__file__))
+
 # --- 2. FUNÇÃO DE CARREGAMENTO DE BASES (CSVs) ---
-def carregar_bases_globais(base_dir):
+def carregar_bases_globais(base_dir, usar_cache=True, usar_snapshot=True):
     """
     Carrega CSVs tratando separação de termo e frequência.
     Usa 'utf-8-sig' para remover o BOM do Excel que quebrava os matches.
+    Retorna os índices de autoridade já pré-processados (ver indice_unb), o
+    cache persistente de decisões (ver cache_unb), invalidado quando os CSVs mudam,
+    e as impressões (SHA-1) dos CSVs usados.
+    Com usar_snapshot, os índices vêm do snapshot binário (ver snapshot_unb)
+    enquanto os CSVs não mudarem; senão são montados e o snapshot é regravado.
     """
+    parametros = {'advisors': THRESHOLD_ADVISOR, 'keywords': THRESHOLD_KEYWORD}
+    # Ao lado dos CSVs; no executável os CSVs estão na _MEIPASS (temporária): pasta de dados
+    pasta_snapshot = pasta_dados() if getattr(sys, 'frozen', False) else base_dir
+    snapshot = carregar_snapshot(base_dir, ARQUIVOS_BASES, parametros, pasta_snapshot) if usar_snapshot else None
+
+    if snapshot is None:
+        snapshot = montar_snapshot(base_dir, ARQUIVOS_BASES, parametros, _montar_indices(base_dir))
+        if usar_snapshot:
+            gravar_snapshot(pasta_snapshot, snapshot)
+
+    # Impressões das bases: invalidam o cache de decisões e os manifestos
+    impressoes = {}
+    for campo in ('advisors', 'keywords'):
+        fonte = snapshot['fontes'].get(snapshot['arquivos'][campo])
+        impressoes[campo] = fonte['sha1'] if fonte else ""
+    # O cache é gravado a cada lote: fica na pasta de dados, nunca na _MEIPASS do executável
+    cache = CacheDecisoes(os.path.join(pasta_dados(), NOME_CACHE), impressoes) if usar_cache else None
+
+    return {
+        'advisors': snapshot['indices']['advisors'],
+        'keywords': snapshot['indices']['keywords'],
+        'cache': cache,
+        'impressoes': impressoes,
+        'base_dir': base_dir
+    }
+
+def _montar_indices(base_dir):
+    """Lê os CSVs e monta os índices: {'arquivos': {campo: csv usado}, 'indices': {campo: IndiceAutoridade}}."""
     def carregar_csv(nome, com_freq=False):
         caminho = os.path.join(base_dir, nome)
         dados = {}
@@ -92,279 +148,513 @@ def carregar_bases_globais(base_dir):
             
         return dados
 
-    # Tenta carregar com os nomes padrão
-    advisors = carregar_csv("base_orientadores_unb.csv", com_freq=True)
-    if not advisors: advisors = carregar_csv("advisor-ppg.csv", com_freq=True)
+    # Tenta carregar com os nomes padrão (guardando qual arquivo foi usado)
+    arq_advisors = "base_orientadores_unb.csv"
+    advisors = carregar_csv(arq_advisors, com_freq=True)
+    if not advisors:
+        arq_advisors = "advisor-ppg.csv"
+        advisors = carregar_csv(arq_advisors, com_freq=True)
 
-    keywords = carregar_csv("base_assuntos_unb.csv", com_freq=True)
-    if not keywords: keywords = carregar_csv("keywords.csv", com_freq=True)
+    arq_keywords = "base_assuntos_unb.csv"
+    keywords = carregar_csv(arq_keywords, com_freq=True)
+    if not keywords:
+        arq_keywords = "keywords.csv"
+        keywords = carregar_csv(arq_keywords, com_freq=True)
 
-    return {'advisors': advisors, 'keywords': keywords}
+    return {
+        'arquivos': {'advisors': arq_advisors, 'keywords': arq_keywords},
+        'indices': {
+            'advisors': IndiceAutoridade(advisors, limiar=THRESHOLD_ADVISOR),
+            'keywords': IndiceAutoridade(keywords, limiar=THRESHOLD_KEYWORD)
+        }
+    }
 
 # --- 3. FUNÇÕES AUXILIARES DE TEXTO ---
+# Motor de capitalização compartilhado (dict de siglas + regex pré-compilada + memória LRU)
+CAIXA = MotorCaixa(PRESERVAR)
+
 def aplicar_regra_caracteres(texto):
     """Capitalização inteligente (Title Case) preservando siglas."""
-    if not texto: return ""
-    
-    # Divide preservando pontuação para não perder contexto
-    palavras = texto.strip().split()
-    resultado = []
-    
-    for i, p in enumerate(palavras):
-        # Versão limpa para comparação (sem pontuação)
-        p_limpa = re.sub(r'[^\w\-]', '', p)
-        
-        # Verifica se a palavra está na lista de preservar (ex: 'UnB' mantém 'UnB')
-        correta = next((fixo for fixo in PRESERVAR if fixo.lower() == p_limpa.lower()), None)
-        
-        if correta:
-            # Substitui o texto mas mantém a pontuação original (ex: "(unb)" vira "(UnB)")
-            resultado.append(p.replace(p_limpa, correta))
-        elif len(p_limpa) <= 3 and i > 0: 
-            # Preposições curtas no meio da frase ficam em minúsculo
-            resultado.append(p.lower())
-        else:
-            # Capitaliza a primeira letra
-            resultado.append(p.capitalize())
-            
-    return " ".join(resultado)
+    return CAIXA.aplicar(texto)
 
 def tratar_titulo(texto):
-    """Formata títulos e corrige espaçamento de dois pontos."""
-    if not texto: return ""
+    """Formata títulos e corrige espaçamento de dois pontos ("Titulo:Subtitulo" -> "Titulo : Subtitulo")."""
+    return CAIXA.titulo(texto)
+
+def dividir_assuntos(texto):
+    """Divide termos compostos (separados por ; , ou .) em pares (original, limpo)."""
+    pares = []
+    for t in re.split(r'[;,\.]', texto):
+        t = t.strip()
+        if not t: continue
+        pares.append((t, re.sub(r'[\{\}\[\]\<\>\\\/]', '', t)))
+    return pares
+
+def ler_xml(caminho_xml):
+    """Leitura segura do XML (com fallback para binário). Retorna a ElementTree."""
+    with open(caminho_xml, 'rb') as f:
+        return arvore_de_bytes(f.read())
+
+def arvore_de_bytes(data):
+    """Monta a ElementTree a partir dos bytes do XML (limpa caracteres de controle se preciso)."""
+    try:
+        parser = ET.XMLParser(encoding="utf-8")
+        return ET.ElementTree(ET.fromstring(data, parser=parser))
+    except ET.ParseError:
+        # Limpa caracteres de controle inválidos
+        clean_data = re.sub(rb'[^\x09\x0A\x0D\x20-\x7E\x80-\xFF]', b'', data)
+        return ET.ElementTree(ET.fromstring(clean_data))
+
+def serializar_xml(tree):
+    """Serializa em memória, byte a byte igual ao que tree.write gravaria."""
+    saida = io.BytesIO()
+    tree.write(saida, encoding="utf-8", xml_declaration=True)
+    return saida.getvalue()
+
+def gravar_atomico(caminho, data):
+    """Grava num temporário ao lado e troca com os.replace (o arquivo nunca fica pela metade)."""
+    temporario = caminho + ".tmp"
+    try:
+        with open(temporario, 'wb') as f:
+            f.write(data)
+        os.replace(temporario, caminho)
+    except BaseException:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
+
+def resolver_termo(bases, campo, termo):
+    """
+    Resolve um termo ('keywords' ou 'advisors') contra a base.
+    Consulta primeiro o cache persistente; só chama o índice (fuzzy) se faltar.
+    Retorna o termo da base ou None.
+    """
+    indice = bases[campo]
+    if not indice:
+        return None
+
+    cache = bases.get('cache')
+    if cache:
+        achou, escolhido = cache.consultar(campo, termo, indice.limiar)
+        if achou:
+            return escolhido
+
+    inicio = time.perf_counter()
+    escolhido = indice.resolver(termo)
+    if cache:
+        cache.registrar(campo, termo, indice.limiar, escolhido, time.perf_counter() - inicio)
+    return escolhido
+
+# --- 4. MODO LOTE (PRÉ-RESOLUÇÃO) ---
+def coletar_termos(caminho_xml):
+    """Lê um XML sem alterá-lo e retorna (assuntos, orientadores) brutos."""
+    return termos_da_arvore(ler_xml(caminho_xml))
+
+def termos_da_arvore(tree):
+    """(assuntos, orientadores) brutos de uma ElementTree já lida."""
+    assuntos, orientadores = [], []
+    for elem in tree.getroot().findall("dcvalue"):
+        el = elem.get("element")
+        qu = elem.get("qualifier")
+        txt = elem.text or ""
+        if el == "subject" and qu in ["none", "keyword"]:
+            assuntos.extend(t_limpo for _, t_limpo in dividir_assuntos(txt))
+        elif el == "contributor" and qu == "advisor":
+            orientadores.append(txt)
+    return assuntos, orientadores
+
+def preparar_lote(caminhos_xml, bases):
+    """
+    Passo 1 do modo lote: junta os assuntos/orientadores de todos os XMLs,
+    remove repetições e resolve tudo numa varredura cdist paralela.
+    O passo 2 (processar_arquivo_direto) passa a encontrar tudo já resolvido.
+    Retorna (assuntos_novos, orientadores_novos, falhas_de_leitura).
+    """
+    assuntos, orientadores = set(), set()
+    falhas = 0
+    for caminho in caminhos_xml:
+        try:
+            a, o = coletar_termos(caminho)
+        except Exception:
+            # O erro reaparece (e é logado) no processamento do arquivo
+            falhas += 1
+            continue
+        assuntos.update(a)
+        orientadores.update(o)
+
+    novos_assuntos = _resolver_lote_com_cache(bases, 'keywords', assuntos)
+    novos_orientadores = _resolver_lote_com_cache(bases, 'advisors', orientadores)
+    return novos_assuntos, novos_orientadores, falhas
+
+def resolver_lista(bases, campo, termos):
+    """
+    Resolve uma lista de termos numa única varredura cdist (só o que o cache
+    não conhece) e retorna, na mesma ordem, o termo da base de cada um ou None.
+    """
+    _resolver_lote_com_cache(bases, campo, set(termos))
+    return [resolver_termo(bases, campo, t) for t in termos]
+
+def _resolver_lote_com_cache(bases, campo, termos):
+    """Resolve em lote só o que o cache persistente ainda não conhece."""
+    indice = bases[campo]
+    cache = bases.get('cache')
+    if cache:
+        termos = [t for t in termos if not cache.consultar(campo, t, indice.limiar)[0]]
+
+    inicio = time.perf_counter()
+    novos = indice.resolver_lote(termos)
+    if cache and termos:
+        # Custo por termo = tempo da varredura dividido entre os termos do lote
+        custo = (time.perf_counter() - inicio) / len(termos)
+        for t in termos:
+            cache.registrar(campo, t, indice.limiar, indice.resolvidos.get(chave_exata(t)), custo)
+    return novos
+
+# --- 5. TABELA DE REGRAS DE CAMPOS ---
+# Cada regra: (nome, element, qualifier, ação).
+# element/qualifier aceitam: texto exato, tupla de opções, QUALQUER ou um predicado.
+# A primeira regra que casar vence (mesma precedência do antigo if/elif).
+QUALQUER = None
+
+class ContextoItem:
+    """Estado de um item durante o processamento (bases, logs, dados de sincronização e perfil opcional)."""
+
+    def __init__(self, bases, perfil=None):
+        self.bases = bases
+        self.logs = []
+        self.perfil = perfil
+        self.sinc = {'autor': '', 'titulo': '', 'curso_ppg': '', 'tipo_doc': ''}
+        self.ja_normalizado = False  # item traz a MARCA_MOTOR (passou pelo motor antes)
+
+def _casa(padrao, valor):
+    if padrao is QUALQUER:
+        return True
+    if callable(padrao):
+        return bool(padrao(valor))
+    if isinstance(padrao, tuple):
+        return valor in padrao
+    return valor == padrao
+
+class TabelaRegras:
+    """
+    Compila uma tabela de regras num mapa de despacho (element, qualifier) -> regra.
+    Cada par distinto é resolvido contra a tabela uma única vez; depois disso
+    o despacho de um campo é uma consulta de dict, por mais regras que existam.
+    Também conta acertos e tempo gasto por regra; com um perfil no contexto,
+    o tempo de cada regra entra na fase indicada em 'fases' (ou 'fase_padrao').
+    """
+
+    def __init__(self, regras, fase_padrao=None, fases=None):
+        self.regras = regras
+        self.despacho = {}
+        self.fases = {r[0]: (fases or {}).get(r[0], fase_padrao) for r in regras}
+        self.zerar_estatisticas()
+
+    def regra_para(self, el, qu):
+        chave = (el, qu)
+        try:
+            return self.despacho[chave]
+        except KeyError:
+            regra = next((r for r in self.regras if _casa(r[1], el) and _casa(r[2], qu)), None)
+            self.despacho[chave] = regra
+            return regra
+
+    def aplicar(self, elem, ctx, sem_regra=None):
+        """Executa a ação da regra do campo; sem regra, retorna 'sem_regra'."""
+        regra = self.regra_para(elem.get("element"), elem.get("qualifier"))
+        if regra is None:
+            return sem_regra
+        inicio = time.perf_counter()
+        resultado = regra[3](elem, ctx)
+        decorrido = time.perf_counter() - inicio
+        contador = self.contadores[regra[0]]
+        contador[0] += 1
+        contador[1] += decorrido
+        if ctx.perfil is not None:
+            ctx.perfil.somar(self.fases[regra[0]], decorrido)
+        return resultado
+
+    def zerar_estatisticas(self):
+        self.contadores = {r[0]: [0, 0.0] for r in self.regras}
+
+    def estatisticas(self):
+        return {nome: {'acertos': n, 'tempo': t} for nome, (n, t) in self.contadores.items()}
+
+# --- 5.1 Descoberta (lê os dados de sincronização antes de alterar) ---
+def _descobrir_autor(elem, ctx):
+    ctx.sinc['autor'] = aplicar_regra_caracteres(elem.text or "")
+
+def _descobrir_titulo(elem, ctx):
+    ctx.sinc['titulo'] = tratar_titulo(elem.text or "")
+
+def _descobrir_tipo(elem, ctx):
+    ctx.sinc['tipo_doc'] = elem.text or ""
+
+def _descobrir_curso(elem, ctx):
+    # Tenta extrair o curso da citação antiga se possível
+    m = re.search(r'\((.*?)\)', elem.text or "")
+    if m:
+        # Remove prefixos comuns para limpar o nome do curso
+        curso_limpo = re.sub(r'(Mestrado|Doutorado)\s+em\s+', '', m.group(1), flags=re.IGNORECASE).strip()
+        ctx.sinc['curso_ppg'] = aplicar_regra_caracteres(curso_limpo)
+
+def _descobrir_marca(elem, ctx):
+    if (elem.text or "").startswith(MARCA_MOTOR):
+        ctx.ja_normalizado = True
+
+REGRAS_DESCOBERTA = [
+    # nome              element         qualifier                  ação
+    ("autor",           "contributor",  "author",                  _descobrir_autor),
+    ("titulo",          "title",        QUALQUER,                  _descobrir_titulo),
+    ("tipo",            "type",         QUALQUER,                  _descobrir_tipo),
+    ("curso_citacao",   QUALQUER,       "citation",                _descobrir_curso),
+    ("marca",           "description",  "provenance",              _descobrir_marca),
+]
+
+# --- 5.2 Transformação (cada ação retorna a lista de elementos que ficam no XML) ---
+def _excluir(elem, ctx):
+    # Campos de controle interno não são duplicados/alterados
+    return []
+
+def _dividir_e_resolver_assuntos(elem, ctx):
+    lang = elem.get("language")
+    novos = []
+    texto = (elem.text or "").strip()
+    # Termo da base com separadores (ex.: 'Brasil. Presidente (...)') fica inteiro
+    if ctx.bases['keywords'] and ctx.bases['keywords'].contem(texto):
+        pares = [(texto, texto)]
+    else:
+        pares = dividir_assuntos(texto)
+    for t, t_limpo in pares:
+        # Tenta acerto exato / Fuzzy Match se houver base carregada
+        da_base = resolver_termo(ctx.bases, 'keywords', t_limpo)
+        if da_base:
+            escolhido, origem = da_base, "BASE"
+        else:
+            escolhido, origem = aplicar_regra_caracteres(t_limpo), "GRAMÁTICA"
+
+        # Log se houve alteração
+        if escolhido != t:
+            ctx.logs.append(f"🔑 Assunto [{origem}]: '{t}' -> '{escolhido}'")
+
+        # Cada termo vira um elemento próprio
+        novo_item = ET.Element("dcvalue", element="subject", qualifier="keyword")
+        if lang: novo_item.set("language", lang)
+        novo_item.text = escolhido
+        novos.append(novo_item)
+    return novos
+
+def _resolver_orientador(elem, ctx):
+    txt = elem.text or ""
+    escolhido = resolver_termo(ctx.bases, 'advisors', txt)
+    if escolhido:
+        if escolhido != txt:
+            ctx.logs.append(f"👤 Orientador [BASE]: '{txt}' -> '{escolhido}'")
+        elem.text = escolhido
+    else:
+        elem.text = aplicar_regra_caracteres(txt)
+    return [elem]
+
+def _padronizar_coorientador(elem, ctx):
+    elem.set("qualifier", "advisorco")
+    elem.text = aplicar_regra_caracteres(elem.text or "")
+    return [elem]
+
+def _sincronizar(chave):
+    def acao(elem, ctx):
+        elem.text = ctx.sinc[chave]
+        return [elem]
+    return acao
+
+def _renomear_qualifier(novo_qu):
+    def acao(elem, ctx):
+        elem.set("qualifier", novo_qu)
+        return [elem]
+    return acao
+
+def _datar_submissao(elem, ctx):
+    # O issued original vira submitted (o PASSO D acrescenta o novo issued); item já normalizado fica como está
+    if ctx.ja_normalizado:
+        return [elem]
+    return _renomear_qualifier("submitted")(elem, ctx)
+
+def _fixar_licenca(elem, ctx):
+    elem.text = TEXTO_LICENCA
+    return [elem]
+
+# Trecho do grau numa citação já montada pelo motor (o ano é o do processamento, não o de hoje)
+_GRAU_NORMALIZADO = re.compile(r'(?:Dissertação \(Mestrado|Tese \(Doutorado) em .*?\) — Universidade de Brasília, (\d{4})\. ?')
+
+def _reconstruir_citacao(elem, ctx):
+    sinc = ctx.sinc
+    txt_original = elem.text or ""
+
+    # Formata autores: SOBRENOME, Nome
+    autores_fmt = sinc['autor']
+    if ',' in sinc['autor']:
+        parts = sinc['autor'].split(',')
+        if len(parts) >= 2:
+            autores_fmt = f"{parts[0].strip().upper()}, {parts[1].strip()}"
+
+    ja_montada = ctx.ja_normalizado and _GRAU_NORMALIZADO.search(txt_original)
+    if ja_montada:
+        # Citação já normalizada: mantém o ano e o que vem depois do grau (senão o grau se repete)
+        ano = ja_montada.group(1)
+        resto_citacao = txt_original[ja_montada.end():]
+    else:
+        # Tenta manter o final da citação original (páginas, ano, etc.)
+        ano = datetime.now().year
+        resto_citacao = ""
+        if len(txt_original.split('. ')) > 2:
+            resto_citacao = ". ".join(txt_original.split('. ')[2:])
+
+    # Define o prefixo do grau
+    tipo_grau = "Dissertação (Mestrado" if "master" in sinc['tipo_doc'] or "Mestrado" in txt_original else "Tese (Doutorado"
+    curso_nome = sinc['curso_ppg'] if sinc['curso_ppg'] else "PREENCHER CURSO"
+
+    # Monta a nova citação
+    novo_txt = f"{autores_fmt}. {sinc['titulo']}. {tipo_grau} em {curso_nome}) — Universidade de Brasília, {ano}. {resto_citacao}"
+
+    # Limpeza final de duplicatas comuns
+    novo_txt = novo_txt.replace("..", ".")
+    elem.text = re.sub(r'Universidade de Brasília,\s*Universidade de Brasília', '— Universidade de Brasília', novo_txt, flags=re.IGNORECASE)
+    return [elem]
+
+REGRAS_CAMPOS = [
+    # nome                element         qualifier                                                ação
+    ("controle_interno",  QUALQUER,       lambda qu: qu and ("referees" in qu or qu.endswith("ID")), _excluir),
+    ("publisher_interno", "publisher",    ("country", "initials"),                                  _excluir),
+    ("assuntos",          "subject",      ("none", "keyword"),                                      _dividir_e_resolver_assuntos),
+    ("orientador",        "contributor",  "advisor",                                                _resolver_orientador),
+    ("coorientador",      "contributor",  lambda qu: qu and "advisor-co" in qu,                     _padronizar_coorientador),
+    ("autor",             "contributor",  "author",                                                 _sincronizar('autor')),
+    ("titulo",            "title",        QUALQUER,                                                 _sincronizar('titulo')),
+    ("resumo",            "description",  "resumo",                                                 _renomear_qualifier("abstract")),
+    ("data_issued",       "date",         "issued",                                                 _datar_submissao),
+    ("licenca",           "rights",       "license",                                                _fixar_licenca),
+    ("citacao",           QUALQUER,       "citation",                                               _reconstruir_citacao),
+]
+
+DESCOBERTA = TabelaRegras(REGRAS_DESCOBERTA, fase_padrao="descoberta")
+TRANSFORMACAO = TabelaRegras(REGRAS_CAMPOS, fase_padrao="outras_regras",
+                             fases={"assuntos": "assuntos", "orientador": "orientadores", "citacao": "citacao"})
+
+def estatisticas_regras():
+    """Acertos e tempo acumulado (s) de cada regra desde o último zerar_estatisticas_regras()."""
+    return {'descoberta': DESCOBERTA.estatisticas(), 'transformacao': TRANSFORMACAO.estatisticas()}
+
+def zerar_estatisticas_regras():
+    DESCOBERTA.zerar_estatisticas()
+    TRANSFORMACAO.zerar_estatisticas()
+
+# --- 6. FUNÇÃO PRINCIPAL ---
+def _marcar(perfil, fase, inicio):
+    """Soma ao perfil (se houver) o tempo desde 'inicio' e retorna o instante atual."""
+    agora = time.perf_counter()
+    if perfil is not None:
+        perfil.somar(fase, agora - inicio)
+    return agora
+
+def processar_bytes(original, bases, perfil=None):
+    """
+    Aplica todas as regras a um documento Dublin Core em memória.
+    'perfil' (opcional, ex.: perfil_unb.PerfilItem) recebe o tempo de cada fase.
+    Retorna (resultado: bytes, logs: list); erros de XML são propagados.
+    """
+    # PASSO A: Leitura Segura do XML (com fallback para binário)
+    inicio = time.perf_counter()
+    tree = arvore_de_bytes(original)
+    root = tree.getroot()
+    elementos = root.findall("dcvalue")
+    ctx = ContextoItem(bases, perfil)
+    _marcar(perfil, "parse", inicio)
+
+    # PASSO B: Fase de Descoberta (Ler dados antes de alterar)
+    for elem in elementos:
+        DESCOBERTA.aplicar(elem, ctx)
+
+    # PASSO C: Transformação pela tabela de regras
+    # Campos sem regra são reaproveitados como estão; só os assuntos geram elementos novos
+    novos_elementos = []
+    for elem in elementos:
+        novos_elementos.extend(TRANSFORMACAO.aplicar(elem, ctx, sem_regra=(elem,)))
+    inicio = time.perf_counter()
+
+    # PASSO D: Adição de Campos Obrigatórios
+    # 1. Data Issued (Data de hoje) e a marca do motor, só na primeira passagem
+    if not ctx.ja_normalizado:
+        data_hj = ET.Element("dcvalue", element="date", qualifier="issued")
+        data_hj.text = datetime.now().strftime("%Y-%m-%d")
+        novos_elementos.append(data_hj)
+        marca = ET.Element("dcvalue", element="description", qualifier="provenance")
+        marca.set("language", "pt_BR")
+        marca.text = f"{MARCA_MOTOR} (regras {VERSAO_REGRAS}) em {data_hj.text}."
+        novos_elementos.append(marca)
+    
+    # 2. Verifica e adiciona faltantes
+    tem_ppg = any(e.get("qualifier") == "ppg" for e in novos_elementos)
+    if not tem_ppg:
+        ppg = ET.Element("dcvalue", element="description", qualifier="ppg")
+        ppg.set("language", "pt_BR")
+        ppg.text = "PREENCHER"
+        novos_elementos.append(ppg)
+
+    # 3. Campos fixos obrigatórios
+    campos_fixos = [
+        ("rights", "license", TEXTO_LICENCA),
+        ("language", "iso", "por"),
+        ("description", "unidade", "PREENCHER")
+    ]
     
-    # Aplica a regra geral primeiro
-    texto_formatado = aplicar_regra_caracteres(texto)
+    atuais = {(e.get("element"), e.get("qualifier")) for e in novos_elementos}
     
-    # Corrige espaçamento dos dois pontos: "Titulo:Subtitulo" -> "Titulo : Subtitulo"
-    # A UnB geralmente pede espaço antes e depois, ou apenas depois.
-    # O padrão aqui será garantir espaço: " : "
-    texto_formatado = re.sub(r'\s*:\s*', ' : ', texto_formatado)
+    for e, q, v in campos_fixos:
+        if (e, q) not in atuais:
+            fixo = ET.Element("dcvalue", element=e, qualifier=q)
+            fixo.set("language", "pt_BR")
+            fixo.text = v
+            novos_elementos.append(fixo)
+
+    # PASSO E: Montagem do XML final
+    root.clear() # Limpa a árvore antiga
+    root.set("schema", "dc")
     
-    return texto_formatado
+    for item in novos_elementos:
+        item.tail = None  # Mesmo layout (uma linha) dos elementos novos
+        root.append(item)
+
+    resultado = serializar_xml(tree)
+    _marcar(perfil, "montagem", inicio)
+    return resultado, ctx.logs
 
-# --- 4. FUNÇÃO PRINCIPAL ---
-def processar_arquivo_direto(caminho_xml, bases):
+def processar_arquivo_direto(caminho_xml, bases, estatisticas=None, gravar=True, perfil=None):
     """
     Processa um arquivo XML Dublin Core.
+    O resultado é serializado em memória e só é gravado (troca atômica) se
+    diferir do original. 'estatisticas' (dict opcional) acumula 'gravados' e
+    'inalterados'; com gravar=False nada é escrito (simulação).
+    'perfil' (opcional) recebe o tempo de cada fase, inclusive leitura e gravação.
     Retorna: (sucesso: bool, logs: list)
     """
-    logs = []
-    
     try:
-        # PASSO A: Leitura Segura do XML (com fallback para binário)
-        try:
-            parser = ET.XMLParser(encoding="utf-8")
-            tree = ET.parse(caminho_xml, parser=parser)
-            root = tree.getroot()
-        except ET.ParseError:
-            with open(caminho_xml, 'rb') as f: 
-                data = f.read()
-            # Limpa caracteres de controle inválidos
-            clean_data = re.sub(rb'[^\x09\x0A\x0D\x20-\x7E\x80-\xFF]', b'', data)
-            root = ET.fromstring(clean_data)
-            tree = ET.ElementTree(root)
-
-        # Listas para Fuzzy Matching
-        lista_advisors = list(bases['advisors'].keys())
-        lista_keywords = list(bases['keywords'].keys())
-        
-        # Dicionário para sincronização de metadados
-        dados_sinc = {'autor': '', 'titulo': '', 'curso_ppg': '', 'tipo_doc': ''}
-        
-        # PASSO B: Fase de Descoberta (Ler dados antes de alterar)
-        for elem in root.findall("dcvalue"):
-            el = elem.get("element")
-            qu = elem.get("qualifier")
-            txt = elem.text or ""
-
-            if el == "contributor" and qu == "author":
-                dados_sinc['autor'] = aplicar_regra_caracteres(txt)
-            elif el == "title":
-                dados_sinc['titulo'] = tratar_titulo(txt)
-            elif el == "type":
-                dados_sinc['tipo_doc'] = txt
-            elif qu == "citation":
-                # Tenta extrair o curso da citação antiga se possível
-                m = re.search(r'\((.*?)\)', txt)
-                if m:
-                    raw_curso = m.group(1)
-                    # Remove prefixos comuns para limpar o nome do curso
-                    curso_limpo = re.sub(r'(Mestrado|Doutorado)\s+em\s+', '', raw_curso, flags=re.IGNORECASE).strip()
-                    dados_sinc['curso_ppg'] = aplicar_regra_caracteres(curso_limpo)
-
-        # PASSO C: Construção da Nova Estrutura (Evita erros de referência)
-        # Vamos criar uma lista de novos elementos, em vez de modificar os antigos
-        novos_elementos = []
-
-        for elem in root.findall("dcvalue"):
-            el = elem.get("element")
-            qu = elem.get("qualifier")
-            lang = elem.get("language")
-            txt = elem.text or ""
-            txt_original = txt
-
-            # Ignora campos de controle interno que não devem ser duplicados/alterados
-            if (qu and ("referees" in qu or qu.endswith("ID"))) or (el == "publisher" and qu in ["country", "initials"]):
-                # Se quiser manter esses campos sem alteração, descomente abaixo:
-                # novos_elementos.append(elem) 
-                continue
-
-            # --- PROCESSAMENTO DE ASSUNTOS (KEYWORDS) ---
-            if el == "subject" and qu in ["none", "keyword"]:
-                # Divide termos compostos (separados por ; , ou .)
-                termos_split = re.split(r'[;,\.]', txt)
-                
-                for t in termos_split:
-                    t = t.strip()
-                    if not t: continue
-                    
-                    t_limpo = re.sub(r'[\{\}\[\]\<\>\\\/]', '', t)
-                    escolhido = t_limpo
-                    origem = "GRAMÁTICA"
-
-                    # Tenta Fuzzy Match se houver base carregada
-                    if lista_keywords:
-                        matches = process.extract(
-                            t_limpo, lista_keywords, limit=3, 
-                            scorer=fuzz.token_sort_ratio, processor=utils.default_process
-                        )
-                        # Filtra por similaridade >= 90
-                        validos = [m for m in matches if m[1] >= THRESHOLD_KEYWORD]
-                        
-                        if validos:
-                            # Desempate por frequência (quem aparece mais na base ganha)
-                            melhor = sorted(validos, key=lambda x: bases['keywords'].get(x[0], 0), reverse=True)[0]
-                            escolhido = melhor[0]
-                            origem = "BASE"
-                        else:
-                            escolhido = aplicar_regra_caracteres(t_limpo)
-                    else:
-                        escolhido = aplicar_regra_caracteres(t_limpo)
-
-                    # Log se houve alteração
-                    if escolhido != t:
-                        logs.append(f"🔑 Assunto [{origem}]: '{t}' -> '{escolhido}'")
-
-                    # Cria NOVO elemento
-                    novo_item = ET.Element("dcvalue", element="subject", qualifier="keyword")
-                    if lang: novo_item.set("language", lang)
-                    novo_item.text = escolhido
-                    novos_elementos.append(novo_item)
-                
-                # 'continue' para não processar este elemento 'subject' novamente
-                continue
-
-            # --- PROCESSAMENTO DE ORIENTADORES ---
-            novo_txt = txt
-            novo_qu = qu
+        inicio_item = inicio = time.perf_counter()
+        with open(caminho_xml, 'rb') as f:
+            original = f.read()
+        _marcar(perfil, "leitura", inicio)
+        resultado, logs = processar_bytes(original, bases, perfil)
 
-            if el == "contributor" and qu == "advisor":
-                if lista_advisors:
-                    matches = process.extract(txt, lista_advisors, limit=3, scorer=fuzz.token_sort_ratio, processor=utils.default_process)
-                    validos = [m for m in matches if m[1] >= THRESHOLD_ADVISOR]
-                    
-                    if validos:
-                        escolhido = sorted(validos, key=lambda x: bases['advisors'].get(x[0], 0), reverse=True)[0][0]
-                        if escolhido != txt:
-                            logs.append(f"👤 Orientador [BASE]: '{txt}' -> '{escolhido}'")
-                        novo_txt = escolhido
-                    else:
-                        novo_txt = aplicar_regra_caracteres(txt)
-                else:
-                    novo_txt = aplicar_regra_caracteres(txt)
-
-            # --- CO-ORIENTADORES ---
-            elif el == "contributor" and qu and "advisor-co" in qu:
-                novo_qu = "advisorco" # Padronização
-                novo_txt = aplicar_regra_caracteres(txt)
-
-            # --- SINCRONIZAÇÃO DE AUTOR/TÍTULO ---
-            elif el == "contributor" and qu == "author":
-                novo_txt = dados_sinc['autor']
-            elif el == "title":
-                novo_txt = dados_sinc['titulo']
-            
-            # --- PADRONIZAÇÕES DIVERSAS ---
-            elif el == "description" and qu == "resumo":
-                novo_qu = "abstract"
-            elif el == "date" and qu == "issued":
-                novo_qu = "submitted" # Muda issued original para submitted
-            
-            elif el == "rights" and qu == "license":
-                novo_txt = TEXTO_LICENCA
-
-            # --- RECONSTRUÇÃO DA CITAÇÃO ---
-            elif qu == "citation":
-                # Formata autores: SOBRENOME, Nome
-                autores_fmt = dados_sinc['autor']
-                if ',' in dados_sinc['autor']:
-                    parts = dados_sinc['autor'].split(',')
-                    if len(parts) >= 2:
-                        autores_fmt = f"{parts[0].strip().upper()}, {parts[1].strip()}"
-                
-                # Tenta manter o final da citação original (páginas, ano, etc.)
-                resto_citacao = ""
-                if len(txt_original.split('. ')) > 2:
-                     resto_citacao = ". ".join(txt_original.split('. ')[2:])
-                
-                # Define o prefixo do grau
-                tipo_grau = "Dissertação (Mestrado" if "master" in dados_sinc['tipo_doc'] or "Mestrado" in txt_original else "Tese (Doutorado"
-                curso_nome = dados_sinc['curso_ppg'] if dados_sinc['curso_ppg'] else "PREENCHER CURSO"
-                
-                # Monta a nova citação
-                novo_txt = f"{autores_fmt}. {dados_sinc['titulo']}. {tipo_grau} em {curso_nome}) — Universidade de Brasília, {datetime.now().year}. {resto_citacao}"
-                
-                # Limpeza final de duplicatas comuns
-                novo_txt = novo_txt.replace("..", ".")
-                novo_txt = re.sub(r'Universidade de Brasília,\s*Universidade de Brasília', '— Universidade de Brasília', novo_txt, flags=re.IGNORECASE)
-
-            # Cria o elemento processado
-            novo_elem = ET.Element("dcvalue", element=el, qualifier=novo_qu)
-            if lang: novo_elem.set("language", lang)
-            novo_elem.text = novo_txt
-            novos_elementos.append(novo_elem)
-
-        # PASSO D: Adição de Campos Obrigatórios
-        # 1. Data Issued (Data de hoje)
-        data_hj = ET.Element("dcvalue", element="date", qualifier="issued")
-        data_hj.text = datetime.now().strftime("%Y-%m-%d")
-        novos_elementos.append(data_hj)
-        
-        # 2. Verifica e adiciona faltantes
-        tem_ppg = any(e.get("qualifier") == "ppg" for e in novos_elementos)
-        if not tem_ppg:
-            ppg = ET.Element("dcvalue", element="description", qualifier="ppg")
-            ppg.set("language", "pt_BR")
-            ppg.text = "PREENCHER"
-            novos_elementos.append(ppg)
-
-        # 3. Campos fixos obrigatórios
-        campos_fixos = [
-            ("rights", "license", TEXTO_LICENCA),
-            ("language", "iso", "por"),
-            ("description", "unidade", "PREENCHER")
-        ]
-        
-        atuais = {(e.get("element"), e.get("qualifier")) for e in novos_elementos}
-        
-        for e, q, v in campos_fixos:
-            if (e, q) not in atuais:
-                fixo = ET.Element("dcvalue", element=e, qualifier=q)
-                fixo.set("language", "pt_BR")
-                fixo.text = v
-                novos_elementos.append(fixo)
-
-        # PASSO E: Escrita no Arquivo
-        root.clear() # Limpa a árvore antiga
-        root.set("schema", "dc")
-        
-        for item in novos_elementos:
-            root.append(item)
-            
-        tree.write(caminho_xml, encoding="utf-8", xml_declaration=True)
+        # Só grava se mudou (pastas sincronizadas sobem cada escrita para a nuvem)
+        mudou = resultado != original
+        if mudou and gravar:
+            inicio = time.perf_counter()
+            gravar_atomico(caminho_xml, resultado)
+            _marcar(perfil, "gravacao", inicio)
+        _marcar(perfil, "total", inicio_item)
+        if estatisticas is not None:
+            chave = 'gravados' if mudou else 'inalterados'
+            estatisticas[chave] = estatisticas.get(chave, 0) + 1
         
         return True, logs
 
     except Exception as e:
-        return False, [f"Erro Fatal ao processar: {str(e)}"]
\ No newline at end of file
+        return False, [f"Erro Fatal ao processar: {str(e)}"]
@@ -0,0 +1,209 @@
+import os
+import signal
+import cProfile
+from collections import deque
+from multiprocessing.util import Finalize
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import motor_unb as core
+from perfil_unb import PerfilItem
+
+# Arquivos em voo por processo (mantém todos ocupados sem enfileirar o lote inteiro)
+ITENS_POR_WORKER = 4
+
+# Bases do processo de trabalho (carregadas uma única vez no inicializador)
+_BASES = None
+
+# cProfile do processo de trabalho (só com perfil cProfile ativo no lote)
+_PERFILADOR = None
+
+
+def numero_workers_padrao():
+    """Todos os núcleos disponíveis."""
+    return os.cpu_count() or 1
+
+
+# --- 1. LADO DO PROCESSO DE TRABALHO ---
+def _inicializar_worker(base_dir, resolvidos, pasta_cprofile=None):
+    """Carrega bases/índices uma vez por processo e instala o que o modo lote já resolveu."""
+    global _BASES, _PERFILADOR
+    # Ctrl+C é do processo principal: ele encerra o pool (worker ocioso não despeja traceback)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _BASES = core.carregar_bases_globais(base_dir)
+    for campo, mapa in (resolvidos or {}).items():
+        _BASES[campo].resolvidos.update(mapa)
+    if pasta_cprofile:
+        # O perfil do processo é gravado quando o pool encerra o worker
+        _PERFILADOR = cProfile.Profile()
+        caminho = os.path.join(pasta_cprofile, f"worker_{os.getpid()}.prof")
+        Finalize(None, _PERFILADOR.dump_stats, args=(caminho,), exitpriority=10)
+
+
+def _processar_no_worker(caminho_xml, gravar=True, medir=False):
+    """Processa um arquivo; qualquer erro fica restrito a ele."""
+    ok, logs, gravado, fases = _processar(caminho_xml, _BASES, gravar, medir, _PERFILADOR)
+    cache = _BASES.get('cache')
+    novidades = cache.extrair_novidades() if cache else None
+    return caminho_xml, ok, logs, gravado, novidades, fases
+
+def _processar(caminho_xml, bases, gravar=True, medir=False, perfilador=None):
+    """
+    (sucesso, logs, gravado, fases): 'gravado' é False quando o XML já estava normalizado.
+    Com gravar=False (simulação) nada é escrito; 'gravado' diz se seria.
+    Com medir=True, 'fases' traz o tempo de cada fase do item ({fase: [s, chamadas]}).
+    """
+    estatisticas = {}
+    perfil = PerfilItem() if medir else None
+    if perfilador is not None:
+        perfilador.enable()
+    try:
+        # O motor retorna (Sucesso, Lista_de_Logs)
+        ok, logs = core.processar_arquivo_direto(caminho_xml, bases, estatisticas, gravar, perfil)
+    except Exception as e:
+        ok, logs = False, [f"Erro Fatal ao processar: {str(e)}"]
+    finally:
+        if perfilador is not None:
+            perfilador.disable()
+    return ok, logs, bool(estatisticas.get('gravados')), perfil.fases if perfil else None
+
+
+# --- 2. LADO DO PROCESSO PRINCIPAL ---
+def processar_em_serie(caminhos_xml, bases, parar=None, gravar=True, perfil=None):
+    """
+    Equivalente ao motor paralelo num único processo (1 worker): (caminho, sucesso, logs, gravado).
+    'perfil' (perfil_unb.PerfilLote, opcional) recebe o tempo das fases de cada item.
+    """
+    perfilador = perfil.perfilador if perfil is not None else None
+    for caminho_xml in caminhos_xml:
+        if parar is not None and parar.is_set():
+            return
+        ok, logs, gravado, fases = _processar(caminho_xml, bases, gravar, perfil is not None, perfilador)
+        if perfil is not None:
+            perfil.perfilador_usado = perfil.perfilador_usado or perfilador is not None
+            perfil.adicionar(fases)
+        yield caminho_xml, ok, logs, gravado
+
+class PoolTrabalho:
+    """
+    Pool de processos que sobrevive a várias chamadas de processar_em_paralelo
+    (ex.: o vigia do cli_unb): os workers carregam as bases uma única vez.
+    Só é (re)criado quando preciso: na primeira chamada e se um processo morrer.
+    """
+
+    def __init__(self, bases, n_workers, pasta_cprofile=None):
+        self.bases = bases
+        self.n_workers = n_workers
+        self.pasta_cprofile = pasta_cprofile
+        self.executor = None
+
+    def obter(self):
+        if self.executor is None:
+            resolvidos = {campo: self.bases[campo].resolvidos for campo in ('keywords', 'advisors')}
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.n_workers,
+                initializer=_inicializar_worker,
+                initargs=(self.bases['base_dir'], resolvidos, self.pasta_cprofile)
+            )
+        return self.executor
+
+    def recriar(self):
+        """Descarta o pool quebrado (BrokenProcessPool) e sobe um novo."""
+        self.encerrar(esperar=False)
+        return self.obter()
+
+    def encerrar(self, esperar=True):
+        if self.executor is not None:
+            self.executor.shutdown(wait=esperar, cancel_futures=True)
+            self.executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.encerrar()
+
+def processar_em_paralelo(caminhos_xml, bases, n_workers, parar=None, gravar=True, perfil=None, pool=None):
+    """
+    Gerador: processa os XMLs num pool de processos e devolve
+    (caminho, sucesso, logs, gravado) NA ORDEM DE SUBMISSÃO, à medida que ficam prontos.
+
+    As decisões novas de cada worker são incorporadas ao cache de 'bases'
+    (processo principal), que continua responsável por gravá-las.
+    Com gravar=False (simulação) o cache também não é gravado aqui.
+    Se um processo morrer, o arquivo em curso é marcado como erro e o
+    pool é recriado para os demais.
+    Com 'parar' (threading.Event) acionado, nada novo é enviado; os arquivos
+    já em voo terminam e são entregues normalmente (parada entre itens).
+    'perfil' (perfil_unb.PerfilLote, opcional) recebe as fases medidas nos workers;
+    com cProfile ativo, cada worker grava o seu perfil ao ser encerrado.
+    'pool' (PoolTrabalho, opcional) é reaproveitado e continua aberto no fim;
+    sem ele, o pool é criado aqui e encerrado ao terminar.
+    """
+    medir = perfil is not None
+    proprio = pool is None
+    if proprio:
+        pool = PoolTrabalho(bases, n_workers, perfil.pasta_cprofile if medir else None)
+
+    cache = bases.get('cache')
+    if cache and gravar:
+        # Os workers leem o cache do disco: grava antes o que já foi decidido aqui
+        # (na simulação não: eles só refazem as decisões que faltarem no disco)
+        cache.gravar()
+
+    fila = iter(caminhos_xml)
+    janela = max(1, n_workers * ITENS_POR_WORKER)
+    em_voo = deque()  # (caminho, future)
+
+    def reenviar_em_voo():
+        # Recria o pool e reenvia o que estava em voo
+        # (os que já tinham terminado mantêm o resultado)
+        executor = pool.recriar()
+        anteriores = list(em_voo)
+        em_voo.clear()
+        for c, f in anteriores:
+            if not (f.done() and f.exception() is None):
+                f = executor.submit(_processar_no_worker, c, gravar, medir)
+            em_voo.append((c, f))
+
+    def enviar(caminho):
+        try:
+            return pool.obter().submit(_processar_no_worker, caminho, gravar, medir)
+        except BrokenProcessPool:
+            # Processo morto fora de uma espera (ex.: pool reaproveitado, parado entre chamadas)
+            reenviar_em_voo()
+            return pool.obter().submit(_processar_no_worker, caminho, gravar, medir)
+
+    def submeter():
+        if parar is not None and parar.is_set():
+            return
+        for caminho in fila:
+            em_voo.append((caminho, enviar(caminho)))
+            if len(em_voo) >= janela:
+                break
+
+    try:
+        submeter()
+        while em_voo:
+            caminho, futuro = em_voo.popleft()
+            try:
+                _, ok, logs, gravado, novidades, fases = futuro.result()
+                if cache and novidades:
+                    cache.incorporar(novidades)
+                if medir:
+                    perfil.adicionar(fases)
+            except BrokenProcessPool:
+                ok, logs, gravado = False, ["Erro Fatal ao processar: o processo de trabalho foi encerrado."], False
+                reenviar_em_voo()
+            except Exception as e:
+                ok, logs, gravado = False, [f"Erro Fatal ao processar: {str(e)}"], False
+
+            yield caminho, ok, logs, gravado
+            submeter()
+    finally:
+        if proprio:
+            pool.encerrar()
+        else:
+            # Pool de fora continua aberto: só descarta o que nem começou
+            for _, f in em_voo:
+                f.cancel()
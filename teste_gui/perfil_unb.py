@@ -0,0 +1,168 @@
+import os
+import io
+import time
+import glob
+import shutil
+import pstats
+import cProfile
+import tempfile
+
+# Fases de um item, na ordem do pipeline (nomes usados pelo motor_unb)
+FASES = [
+    ("leitura", "Leitura do arquivo"),
+    ("parse", "Parse do XML"),
+    ("descoberta", "Descoberta (sincronização)"),
+    ("assuntos", "Assuntos (fuzzy + caixa)"),
+    ("orientadores", "Orientadores (fuzzy)"),
+    ("citacao", "Citação (regex)"),
+    ("outras_regras", "Demais regras"),
+    ("montagem", "Montagem + serialização"),
+    ("gravacao", "Gravação no disco"),
+    ("total", "Total por item"),
+]
+
+PERCENTIS = (50, 90, 99)
+
+# Nome do relatório (fica na pasta de dados do app, ao lado do log)
+NOME_RELATORIO = "relatorio_perfil_unb.txt"
+NOME_CPROFILE = "perfil_unb.prof"
+
+# Funções listadas do cProfile no relatório
+LINHAS_CPROFILE = 40
+
+
+class PerfilItem:
+    """Tempo (s) e número de chamadas de cada fase de um item."""
+    __slots__ = ('fases',)
+
+    def __init__(self):
+        self.fases = {}
+
+    def somar(self, fase, segundos):
+        registro = self.fases.get(fase)
+        if registro is None:
+            self.fases[fase] = [segundos, 1]
+        else:
+            registro[0] += segundos
+            registro[1] += 1
+
+
+def percentil(ordenados, p):
+    """Percentil pelo posto mais próximo (lista já ordenada)."""
+    if not ordenados:
+        return 0.0
+    posto = max(1, -(-p * len(ordenados) // 100))
+    return ordenados[min(posto, len(ordenados)) - 1]
+
+
+class PerfilLote:
+    """
+    Junta o perfil de cada item de um lote (serial ou vindo dos workers) e
+    gera o resumo por fase: total, chamadas e percentis do tempo por item.
+    Com cprofile=True também guarda um perfil cProfile do processamento:
+    no modo serial aqui mesmo; no paralelo cada worker grava o seu em
+    'pasta_cprofile' e os arquivos são somados no fim.
+    """
+
+    def __init__(self, cprofile=False):
+        self.tempos = {}      # fase -> [segundos de cada item]
+        self.chamadas = {}    # fase -> chamadas somadas
+        self.lote = {}        # fases do lote inteiro (ex.: varredura + modo lote)
+        self.itens = 0
+        self.inicio = time.perf_counter()
+        self.fim = None
+        self.cprofile = cprofile
+        self.perfilador = cProfile.Profile() if cprofile else None
+        self.perfilador_usado = False
+        self.pasta_cprofile = tempfile.mkdtemp(prefix="perfil_unb_") if cprofile else None
+
+    def adicionar(self, fases):
+        """Fases de um item: {fase: [segundos, chamadas]}."""
+        if not fases:
+            return
+        self.itens += 1
+        for fase, (segundos, chamadas) in fases.items():
+            self.tempos.setdefault(fase, []).append(segundos)
+            self.chamadas[fase] = self.chamadas.get(fase, 0) + chamadas
+
+    def fase_lote(self, nome, segundos):
+        self.lote[nome] = self.lote.get(nome, 0.0) + segundos
+
+    def encerrar(self):
+        self.fim = time.perf_counter()
+
+    # --- RESUMO ---
+    def resumo(self):
+        """Uma linha por fase: itens, chamadas, total (s), média e percentis (ms)."""
+        linhas = []
+        for fase, rotulo in FASES:
+            tempos = sorted(self.tempos.get(fase, ()))
+            if not tempos:
+                continue
+            total = sum(tempos)
+            linha = {
+                'fase': fase, 'rotulo': rotulo, 'itens': len(tempos),
+                'chamadas': self.chamadas.get(fase, 0), 'total': total,
+                'media_ms': total / len(tempos) * 1000, 'max_ms': tempos[-1] * 1000,
+            }
+            for p in PERCENTIS:
+                linha[f'p{p}_ms'] = percentil(tempos, p) * 1000
+            linhas.append(linha)
+        return linhas
+
+    def linhas_texto(self):
+        """Tabela do resumo, pronta para o log da interface e o relatório."""
+        duracao = (self.fim or time.perf_counter()) - self.inicio
+        taxa = self.itens / duracao if duracao > 0 else 0.0
+        saida = [f"Perfil do lote: {self.itens} itens em {duracao:.2f}s ({taxa:.1f} itens/s)."]
+        for nome, segundos in self.lote.items():
+            saida.append(f"  {nome}: {segundos:.2f}s")
+
+        resumo = self.resumo()
+        soma_fases = sum(l['total'] for l in resumo if l['fase'] != 'total') or 1.0
+        cabecalho = "  Fase                           Total(s)     %  Chamadas   p50(ms)   p90(ms)   p99(ms)   máx(ms)"
+        saida.append(cabecalho)
+        for l in resumo:
+            fracao = "" if l['fase'] == 'total' else f"{l['total'] / soma_fases * 100:5.1f}"
+            saida.append(
+                f"  {l['rotulo']:<30} {l['total']:8.2f} {fracao:>5} {l['chamadas']:9d} "
+                f"{l['p50_ms']:9.2f} {l['p90_ms']:9.2f} {l['p99_ms']:9.2f} {l['max_ms']:9.2f}"
+            )
+        return saida
+
+    # --- cPROFILE ---
+    def estatisticas_cprofile(self):
+        """pstats.Stats com tudo que foi medido (serial + workers) ou None."""
+        if not self.cprofile:
+            return None
+        stats = None
+        fontes = glob.glob(os.path.join(self.pasta_cprofile, "*.prof"))
+        if self.perfilador_usado:
+            stats = pstats.Stats(self.perfilador, stream=io.StringIO())
+        for arquivo in fontes:
+            if stats is None:
+                stats = pstats.Stats(arquivo, stream=io.StringIO())
+            else:
+                stats.add(arquivo)
+        return stats
+
+    def gravar_relatorio(self, pasta):
+        """Grava o relatório em texto (e o .prof do cProfile, se ativo). Retorna o caminho do relatório."""
+        caminho = os.path.join(pasta, NOME_RELATORIO)
+        texto = "\n".join(self.linhas_texto()) + "\n"
+        stats = self.estatisticas_cprofile()
+        if stats is not None:
+            caminho_prof = os.path.join(pasta, NOME_CPROFILE)
+            stats.dump_stats(caminho_prof)
+            buffer = io.StringIO()
+            stats.stream = buffer
+            stats.sort_stats("cumulative").print_stats(LINHAS_CPROFILE)
+            texto += f"\ncProfile (somado de todos os processos; completo em {caminho_prof}):\n" + buffer.getvalue()
+        with open(caminho, "w", encoding="utf-8") as f:
+            f.write(texto)
+        return caminho
+
+    def descartar(self):
+        """Apaga os perfis temporários dos workers."""
+        if self.pasta_cprofile:
+            shutil.rmtree(self.pasta_cprofile, ignore_errors=True)
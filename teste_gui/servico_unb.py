@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Serviço HTTP local de normalização (bases e índices do motor_unb carregados uma única vez).
+
+Uso:
+    python servico_unb.py [--porta 8765] [--host 127.0.0.1] [--bases PASTA]
+
+Rotas (JSON, em lote: milhares de termos por requisição):
+    GET  /saude          -> situação do serviço e tamanho das bases
+    POST /assuntos       {"termos": [...]}                  -> termo da base ou Title Case
+    POST /orientadores   {"nomes": [...]}                   -> nome da base ou Title Case
+    POST /caixa          {"textos": [...], "titulo": false} -> capitalização do motor
+    POST /documentos     {"documentos": ["<dublin_core ...>", ...]} -> XML normalizado + logs
+
+Exemplo:
+    curl -s localhost:8765/assuntos -d '{"termos": ["COMPOSTOS VOLÁTEIS", "patafisica"]}'
+"""
+import os
+import json
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import motor_unb as core
+
+# Corpo máximo aceito por requisição
+LIMITE_CORPO = 64 * 1024 * 1024
+
+
+# --- 1. OPERAÇÕES (independentes do HTTP) ---
+class ServicoNormalizacao:
+    """
+    Bases carregadas uma vez e compartilhadas por todos os clientes.
+    As consultas às bases passam por uma trava: o cdist já usa todos os
+    núcleos, e o cache de decisões/índice não são feitos para escrita
+    simultânea de vários lotes. A capitalização não precisa da trava.
+    """
+
+    def __init__(self, base_dir):
+        self.bases = core.carregar_bases_globais(base_dir)
+        self._trava = threading.Lock()
+
+    def saude(self):
+        return {
+            'status': 'ok',
+            'versao_regras': core.VERSAO_REGRAS,
+            'assuntos': len(self.bases['keywords']),
+            'orientadores': len(self.bases['advisors']),
+        }
+
+    def _resolver(self, campo, termos):
+        termos = [str(t).strip() for t in termos]
+        with self._trava:
+            escolhidos = core.resolver_lista(self.bases, campo, termos)
+        resultados = []
+        for termo, escolhido in zip(termos, escolhidos):
+            if escolhido:
+                resultados.append({'termo': termo, 'normalizado': escolhido, 'origem': 'BASE'})
+            else:
+                resultados.append({'termo': termo, 'normalizado': core.aplicar_regra_caracteres(termo),
+                                   'origem': 'GRAMÁTICA'})
+        self._gravar_cache()
+        return {'resultados': resultados}
+
+    def assuntos(self, dados):
+        return self._resolver('keywords', _lista(dados, 'termos'))
+
+    def orientadores(self, dados):
+        return self._resolver('advisors', _lista(dados, 'nomes'))
+
+    def caixa(self, dados):
+        regra = core.tratar_titulo if dados.get('titulo') else core.aplicar_regra_caracteres
+        return {'resultados': [regra(str(t)) for t in _lista(dados, 'textos')]}
+
+    def documentos(self, dados):
+        documentos = [str(d).encode('utf-8') for d in _lista(dados, 'documentos')]
+        resultados = []
+        with self._trava:
+            # Modo lote: os termos de todos os documentos numa varredura só
+            assuntos, orientadores = set(), set()
+            for original in documentos:
+                try:
+                    a, o = core.termos_da_arvore(core.arvore_de_bytes(original))
+                except Exception:
+                    continue  # o erro aparece no processamento do documento
+                assuntos.update(a)
+                orientadores.update(o)
+            core.resolver_lista(self.bases, 'keywords', assuntos)
+            core.resolver_lista(self.bases, 'advisors', orientadores)
+
+            for original in documentos:
+                try:
+                    resultado, logs = core.processar_bytes(original, self.bases)
+                    resultados.append({'ok': True, 'xml': resultado.decode('utf-8'), 'logs': logs})
+                except Exception as e:
+                    resultados.append({'ok': False, 'erro': f"Erro Fatal ao processar: {e}"})
+        self._gravar_cache()
+        return {'resultados': resultados}
+
+    def _gravar_cache(self):
+        cache = self.bases.get('cache')
+        if cache:
+            cache.gravar()
+
+
+def _lista(dados, chave):
+    valor = dados.get(chave)
+    if not isinstance(valor, list):
+        raise ValueError(f"campo '{chave}' deve ser uma lista")
+    return valor
+
+
+# --- 2. HTTP ---
+class ManipuladorHTTP(BaseHTTPRequestHandler):
+    servico = None  # definido em servir()
+    rotas_post = {
+        '/assuntos': 'assuntos',
+        '/orientadores': 'orientadores',
+        '/caixa': 'caixa',
+        '/documentos': 'documentos',
+    }
+
+    def do_GET(self):
+        if self.path == '/saude':
+            self._responder(200, self.servico.saude())
+        else:
+            self._responder(404, {'erro': 'rota não encontrada'})
+
+    def do_POST(self):
+        metodo = self.rotas_post.get(self.path)
+        if metodo is None:
+            self._responder(404, {'erro': 'rota não encontrada'})
+            return
+
+        try:
+            cabecalho = (self.headers.get('Content-Length') or '0').strip()
+            if not cabecalho.isdigit():
+                # Corpo não lido: a conexão não pode ser reaproveitada
+                self.close_connection = True
+                raise ValueError("Content-Length deve ser um inteiro >= 0")
+            tamanho = int(cabecalho)
+            if tamanho > LIMITE_CORPO:
+                self.close_connection = True
+                self._responder(413, {'erro': f'corpo maior que {LIMITE_CORPO} bytes'})
+                return
+            dados = json.loads(self.rfile.read(tamanho) or b'{}')
+            if not isinstance(dados, dict):
+                raise ValueError("o corpo deve ser um objeto JSON")
+            resposta = getattr(self.servico, metodo)(dados)
+        except (ValueError, TypeError) as e:
+            self._responder(400, {'erro': str(e)})
+            return
+        except Exception as e:
+            # Documento que quebra o motor: responde 500, o servidor segue atendendo
+            self._responder(500, {'erro': f"{type(e).__name__}: {e}"})
+            return
+        self._responder(200, resposta)
+
+    def _responder(self, codigo, dados):
+        corpo = json.dumps(dados, ensure_ascii=False).encode('utf-8')
+        self.send_response(codigo)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def log_message(self, formato, *args):
+        # Uma linha curta por requisição (o padrão inclui data e IP a cada linha)
+        print(f"{self.command} {self.path} -> {args[1] if len(args) > 1 else ''}")
+
+
+def servir(base_dir, host='127.0.0.1', porta=8765):
+    ManipuladorHTTP.servico = ServicoNormalizacao(base_dir)
+    servidor = ThreadingHTTPServer((host, porta), ManipuladorHTTP)
+    print(f"Serviço de normalização em http://{host}:{porta} (Ctrl+C para sair)")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+        ManipuladorHTTP.servico._gravar_cache()
+        print("Serviço encerrado.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serviço HTTP local de normalização do motor_unb")
+    parser.add_argument("--host", default="127.0.0.1", help="Use 0.0.0.0 só em rede confiável (não há autenticação)")
+    parser.add_argument("--porta", type=int, default=8765)
+    parser.add_argument("--bases", default=os.path.dirname(os.path.abspath(__file__)),
+                        help="Pasta com os CSVs de referência")
+    args = parser.parse_args()
+    servir(args.bases, args.host, args.porta)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+import os
+import pickle
+
+from cache_unb import impressao_arquivo
+
+# Snapshot binário das bases (ao lado dos CSVs; no executável, na pasta de dados do app)
+NOME_SNAPSHOT = "bases_unb.snapshot"
+
+# Mude quando o formato do conteúdo (ex.: atributos do IndiceAutoridade) mudar
+VERSAO_SNAPSHOT = 1
+
+
+def _estado_fonte(caminho):
+    """(mtime_ns, tamanho) de um CSV candidato; None se não existir."""
+    try:
+        st = os.stat(caminho)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def fontes_atuais(base_dir, nomes):
+    return {nome: _estado_fonte(os.path.join(base_dir, nome)) for nome in nomes}
+
+
+def carregar_snapshot(base_dir, nomes, parametros, pasta=None):
+    """
+    Lê o snapshot (de 'pasta'; padrão: base_dir) numa única leitura e confere se ainda vale:
+    - todos os CSVs candidatos ('nomes') com o mesmo mtime/tamanho (ou ausentes);
+    - se só o mtime mudou (cópia, sincronização), o SHA-1 decide;
+    - mesmos 'parametros' (ex.: limiares) e mesma versão de formato.
+    Retorna o conteúdo gravado ou None (é preciso reconstruir a partir dos CSVs).
+    """
+    pasta = pasta or base_dir
+    caminho = os.path.join(pasta, NOME_SNAPSHOT)
+    try:
+        with open(caminho, 'rb') as f:
+            snapshot = pickle.loads(f.read())
+    except Exception:
+        return None
+
+    if not isinstance(snapshot, dict) or snapshot.get('versao') != VERSAO_SNAPSHOT:
+        return None
+    if snapshot.get('parametros') != parametros:
+        return None
+
+    atuais = fontes_atuais(base_dir, nomes)
+    gravadas = snapshot.get('fontes', {})
+    revalidado = False
+    for nome, estado in atuais.items():
+        anterior = gravadas.get(nome)
+        if anterior is None or estado is None:
+            if anterior != estado:
+                return None
+            continue
+        if tuple(anterior['estado']) == estado:
+            continue
+        # Arquivo tocado: só reconstrói se o conteúdo realmente mudou
+        if impressao_arquivo(os.path.join(base_dir, nome)) != anterior['sha1']:
+            return None
+        anterior['estado'] = estado
+        revalidado = True
+
+    if revalidado:
+        gravar_snapshot(pasta, snapshot)
+    return snapshot
+
+
+def montar_snapshot(base_dir, nomes, parametros, conteudo):
+    """Snapshot novo: 'conteudo' (dict) + estado e SHA-1 de cada CSV candidato."""
+    fontes = {}
+    for nome, estado in fontes_atuais(base_dir, nomes).items():
+        fontes[nome] = None if estado is None else {
+            'estado': estado, 'sha1': impressao_arquivo(os.path.join(base_dir, nome))
+        }
+    snapshot = dict(conteudo)
+    snapshot.update({'versao': VERSAO_SNAPSHOT, 'parametros': parametros, 'fontes': fontes})
+    return snapshot
+
+
+def gravar_snapshot(pasta, snapshot):
+    """Grava atomicamente em 'pasta'; sem permissão de escrita o app só perde a aceleração."""
+    caminho = os.path.join(pasta, NOME_SNAPSHOT)
+    temporario = caminho + ".tmp"
+    try:
+        with open(temporario, 'wb') as f:
+            f.write(pickle.dumps(snapshot, protocol=pickle.HIGHEST_PROTOCOL))
+        os.replace(temporario, caminho)
+    except OSError as e:
+        print(f"Snapshot das bases não gravado ({caminho}): {e}")
@@ -0,0 +1,41 @@
+"""
+Testes do motor_unb (python -m pytest teste_gui).
+Bases de autoridade vazias: só as regras do motor entram em jogo, sem os CSVs.
+"""
+import xml.etree.ElementTree as ET
+from datetime import datetime
+
+import motor_unb as core
+from indice_unb import IndiceAutoridade
+
+BASES_VAZIAS = {'keywords': IndiceAutoridade({}), 'advisors': IndiceAutoridade({}), 'cache': None}
+
+# Item bruto que já chega com date.issued e date.submitted (nunca passou pelo motor)
+ITEM_COM_DUAS_DATAS = """<?xml version="1.0" encoding="utf-8"?>
+<dublin_core schema="dc">
+  <dcvalue element="contributor" qualifier="author" language="pt_BR">Rocha, Rafael Martins</dcvalue>
+  <dcvalue element="title" qualifier="none" language="pt_BR">Um estudo sobre o cerrado</dcvalue>
+  <dcvalue element="type" qualifier="none" language="pt_BR">masterThesis</dcvalue>
+  <dcvalue element="date" qualifier="submitted">2019-03-01</dcvalue>
+  <dcvalue element="date" qualifier="issued">2020-05-10</dcvalue>
+</dublin_core>
+""".encode("utf-8")
+
+
+def _datas(xml):
+    raiz = ET.fromstring(xml)
+    return sorted((e.get("qualifier"), e.text) for e in raiz.findall("dcvalue") if e.get("element") == "date")
+
+
+def test_primeira_passagem_com_as_duas_datas():
+    resultado, _ = core.processar_bytes(ITEM_COM_DUAS_DATAS, BASES_VAZIAS)
+    hoje = datetime.now().strftime("%Y-%m-%d")
+    # O issued original vira submitted e o de hoje é acrescentado, como em qualquer item bruto
+    assert _datas(resultado) == [("issued", hoje), ("submitted", "2019-03-01"), ("submitted", "2020-05-10")]
+    assert core.MARCA_MOTOR.encode("utf-8") in resultado
+
+
+def test_segunda_passagem_nao_altera():
+    primeira, _ = core.processar_bytes(ITEM_COM_DUAS_DATAS, BASES_VAZIAS)
+    segunda, _ = core.processar_bytes(primeira, BASES_VAZIAS)
+    assert segunda == primeira
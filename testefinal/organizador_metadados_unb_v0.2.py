@@ -1,11 +1,16 @@
 import os
 import re
 import csv
+import sys
 import unicodedata
 import xml.etree.ElementTree as ET
 from datetime import datetime
 from thefuzz import fuzz, process
 
+# Motor de capitalização compartilhado com o app (teste_gui/caixa_unb.py)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'teste_gui'))
+from caixa_unb import MotorCaixa
+
 # --- CONFIGURAÇÕES ---
 __version__ = "0.5 (Memória de Caminho)"
 
@@ -80,34 +85,16 @@ def carregar_csv_dict(caminho, com_frequencia=False):
 BASE_ADVISORS = carregar_csv_dict(CAMINHO_CSV_ADVISORS)
 BASE_KEYWORDS = carregar_csv_dict(CAMINHO_CSV_KEYWORDS, com_frequencia=True)
 
+# Motor de capitalização compartilhado: aqui palavras curtas ficam minúsculas também no início
+CAIXA = MotorCaixa(PRESERVAR, padrao_limpeza=r'[^\w]', curtas_no_inicio=True)
+
 def aplicar_regra_caracteres(texto):
     if not texto: return texto
-    palavras = texto.strip().split()
-    resultado = []
-    for p in palavras:
-        p_limpa = re.sub(r'[^\w]', '', p)
-        if any(fixo.lower() == p_limpa.lower() for fixo in PRESERVAR):
-            correta = [fixo for fixo in PRESERVAR if fixo.lower() == p_limpa.lower()][0]
-            resultado.append(p.replace(p_limpa, correta))
-        elif len(p_limpa) <= 3:
-            resultado.append(p.lower())
-        else:
-            resultado.append(p.capitalize())
-    return " ".join(resultado)
+    return CAIXA.aplicar(texto)
 
 def tratar_titulo(texto):
-    if not texto: return ""
-    txt = texto.strip()
-    palavras = txt.split()
-    res = []
-    for i, p in enumerate(palavras):
-        p_l = re.sub(r'[^\w]', '', p)
-        if any(f.lower() == p_l.lower() for f in PRESERVAR):
-            correta = [f for f in PRESERVAR if f.lower() == p_l.lower()][0]
-            res.append(p.replace(p_l, correta))
-        else:
-            res.append(p.capitalize() if i == 0 else p.lower())
-    return re.sub(r'\s*:\s*', ' : ', " ".join(res))
+    # Sentence Case: só a primeira palavra maiúscula (siglas preservadas) + " : "
+    return CAIXA.titulo_frase(texto)
 
 # --- PROCESSAMENTO XML ---
 